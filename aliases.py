@@ -0,0 +1,186 @@
+"""
+Looks up the aliases that players see when someone sends a message into Minecraft from Discord.
+
+Every relayed DM and `!say` needs the sender's alias, so aliases are cached in memory after the
+first lookup, including users who have no alias. The cache is only correct as long as every change
+to an alias goes through `AliasCache.set` or `AliasCache.remove`, which `!alias` does.
+
+Each user has one document in the `users` collection, and a unique index on `alias` makes sure no
+two users can claim the same name, even if they try at the same moment.
+"""
+
+import logging
+from typing import Any
+
+from pymongo.collection import Collection
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+import metrics
+from commands import db
+
+log = logging.getLogger(__name__)
+
+LOOKUPS = metrics.Counter('bot_alias_lookups_total', 'Alias lookups, by whether they were answered from the cache.', ('result',))
+
+
+class AliasCache:
+    """
+    An in-process cache of each user's alias.
+    """
+
+    def __init__(self, collection: Collection) -> None:
+        self.collection = collection
+        self.aliases: dict[int, str | None] = {}
+        self.indexed = False
+        self.unique = False
+
+    def ensure_indexes(self) -> None:
+        """
+        Create the indexes that keep aliases unique, the first time an alias is changed.
+        If they can't be built, e.g. because older versions of the bot left duplicates behind,
+        aliases are checked before they are set instead, until `deduplicate` has been run.
+        """
+
+        if self.indexed:
+            return
+        self.indexed = True
+
+        try:
+            self.collection.create_index('user_id', unique=True)
+            self.collection.create_index('alias', unique=True)
+            self.unique = True
+        except PyMongoError as e:
+            log.error(
+                'Unable to make aliases unique, so they will be checked before being set. ' +
+                'An admin can run `!alias cleanup` to fix this: %s', e
+            )
+
+    def deduplicate(self) -> tuple[int, dict[int, str]]:
+        """
+        Remove the duplicates that older versions of the bot could leave behind, then build the indexes.
+        Each user keeps their newest document, and each alias stays with whoever claimed it first.
+        This is a one-off cleanup, run by an admin. It blocks, so run it in a thread.
+
+        Returns:
+            tuple[int, dict[int, str]]: The number of documents removed,
+                and the alias that each user lost to someone who claimed it first.
+        """
+
+        removed = 0
+        lost = {}
+
+        # Users go first, so an alias isn't kept for a document that is about to be removed.
+        for field, newest in (('user_id', True), ('alias', False)):
+            if not (stale := self.duplicates(field, newest)):
+                continue
+
+            if field == 'alias':
+                lost.update({i['user_id']: i['alias'] for i in self.collection.find({'_id': {'$in': stale}})})
+            self.collection.delete_many({'_id': {'$in': stale}})
+            removed += len(stale)
+
+        for user_id, alias in lost.items():
+            log.warning('User %s lost the alias %s, which another user claimed first', user_id, alias, extra={'user_id': user_id})
+        log.info('Removed %d duplicate alias documents', removed)
+
+        self.clear()
+        self.indexed = self.unique = False
+        self.ensure_indexes()
+        return removed, lost
+
+    def duplicates(self, field: str, newest: bool) -> list[Any]:
+        """
+        Find the documents that share a value of a field with another document.
+
+        Args:
+            field (str): The field, e.g. `user_id`.
+            newest (bool): Whether the newest document with each value is kept, rather than the oldest.
+
+        Returns:
+            list[Any]: The IDs of every document except the one that is kept for each value.
+        """
+
+        groups = self.collection.aggregate([
+            {'$match': {field: {'$ne': None}}},
+            {'$sort': {'_id': -1 if newest else 1}},
+            {'$group': {'_id': f'${field}', 'ids': {'$push': '$_id'}, 'count': {'$sum': 1}}},
+            {'$match': {'count': {'$gt': 1}}},
+        ])
+        return [id for group in groups for id in group['ids'][1:]]
+
+    def get(self, user_id: int) -> str | None:
+        """
+        Get the alias for a user.
+
+        Args:
+            user_id (int): The ID of the user.
+
+        Returns:
+            str | None: The alias of the user if it exists, otherwise None.
+        """
+
+        if user_id in self.aliases:
+            LOOKUPS.inc(result='hit')
+            return self.aliases[user_id]
+
+        LOOKUPS.inc(result='miss')
+        data = self.collection.find_one({'user_id': user_id}, {'alias': 1})
+        alias = self.aliases[user_id] = data.get('alias') if data else None
+        return alias
+
+    def set(self, user_id: int, alias: str) -> bool:
+        """
+        Set the alias for a user, in a single atomic write.
+
+        Args:
+            user_id (int): The ID of the user.
+            alias (str): The alias to set for the user.
+
+        Returns:
+            bool: True if the alias was set, False if another user already has that alias.
+        """
+
+        self.ensure_indexes()
+        if not self.unique and self.collection.find_one({'alias': alias, 'user_id': {'$ne': user_id}}):
+            return False
+
+        try:
+            self.collection.update_one({'user_id': user_id}, {'$set': {'alias': alias}}, upsert=True)
+        except DuplicateKeyError:
+            return False
+        finally:
+            self.invalidate(user_id)
+        return True
+
+    def remove(self, user_id: int) -> bool:
+        """
+        Remove the alias for a user.
+
+        Args:
+            user_id (int): The ID of the user.
+
+        Returns:
+            bool: True if the alias was removed, False if the user had no alias.
+        """
+
+        result = self.collection.delete_many({'user_id': user_id})
+        self.invalidate(user_id)
+        return result.deleted_count > 0
+
+    def invalidate(self, user_id: int) -> None:
+        """
+        Forget the cached alias of a user, after it has been changed.
+
+        Args:
+            user_id (int): The ID of the user.
+        """
+        self.aliases.pop(user_id, None)
+
+    def clear(self) -> None:
+        """
+        Forget every cached alias.
+        """
+        self.aliases.clear()
+
+
+ALIASES = AliasCache(db.users)
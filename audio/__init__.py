@@ -0,0 +1,7 @@
+"""
+Audio helpers for the music commands.
+
+This package holds the pieces of the music player that are not commands themselves,
+such as the track queue. It lives outside of the `commands` package so that
+it is not picked up by the command loader.
+"""
@@ -0,0 +1,178 @@
+"""
+On-disk cache of transcoded tracks.
+
+Tracks are stored as Ogg Opus files, keyed by their Subsonic song id, so that a cached
+track can be handed to Discord as-is, without touching the network or re-encoding it.
+The cache is bounded by a byte budget, and the least recently played tracks are evicted first.
+"""
+
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+
+class AudioCache:
+    """
+    A size-bounded LRU cache of Opus-encoded tracks.
+
+    Files are written with the player's default gain already applied,
+    since the player cannot change the volume of a stream it does not re-encode.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int, gain: float, bitrate: str = '128k') -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.gain = gain
+        self.bitrate = bitrate
+        self.size = 0
+        self.entries: OrderedDict[str, int] = OrderedDict()
+        self.pending: set[str] = set()
+        self.tasks: set[asyncio.Task] = set()
+
+        if self.enabled():
+            self.load()
+
+    def enabled(self) -> bool:
+        """
+        Check whether caching is enabled at all.
+
+        Returns:
+            bool: True if the cache has a nonzero byte budget.
+        """
+        return self.max_bytes > 0
+
+    def path(self, song_id: str) -> Path:
+        """
+        Get the path that a track is cached at.
+
+        Args:
+            song_id (str): The Subsonic id of the song.
+
+        Returns:
+            Path: The path of the cached file, whether it exists or not.
+        """
+        return self.directory / f'{song_id}.opus'
+
+    def load(self) -> None:
+        """
+        Rebuild the in-memory index from the files in the cache directory.
+        Files are ordered by modification time, which is bumped every time a track is played.
+        Any partially written files from a previous run are removed.
+        """
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        for i in self.directory.glob('*.part'):
+            i.unlink(missing_ok=True)
+
+        files = sorted(
+            ((i, i.stat()) for i in self.directory.glob('*.opus')),
+            key=lambda i: i[1].st_mtime
+        )
+        for file, stat in files:
+            self.entries[file.stem] = stat.st_size
+            self.size += stat.st_size
+
+        self.evict()
+
+    def get(self, song_id: str | None) -> Path | None:
+        """
+        Look up a cached track, marking it as recently used.
+
+        Args:
+            song_id (str | None): The Subsonic id of the song.
+
+        Returns:
+            Path | None: The path of the cached file, or None if the track is not cached.
+        """
+
+        if song_id is None or song_id not in self.entries:
+            return None
+
+        path = self.path(song_id)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self.size -= self.entries.pop(song_id)
+            return None
+
+        self.entries.move_to_end(song_id)
+        return path
+
+    def evict(self) -> None:
+        """
+        Delete the least recently used tracks until the cache fits in its byte budget.
+        """
+
+        while self.size > self.max_bytes and self.entries:
+            song_id, size = self.entries.popitem(last=False)
+            self.size -= size
+            self.path(song_id).unlink(missing_ok=True)
+
+    async def fill(self, song_id: str, url: str) -> None:
+        """
+        Download and transcode a track into the cache.
+        The file is written under a temporary name and only renamed once it is complete,
+        so a track that is still being filled is never played from the cache.
+
+        Args:
+            song_id (str): The Subsonic id of the song.
+            url (str): The stream URL to read the song from.
+        """
+
+        if song_id in self.entries or song_id in self.pending:
+            return
+
+        self.pending.add(song_id)
+        temp = self.directory / f'{song_id}.part'
+        proc = None
+
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                'ffmpeg', '-nostdin', '-loglevel', 'error', '-y',
+                '-reconnect', '1', '-reconnect_streamed', '1', '-reconnect_delay_max', '5',
+                '-i', url,
+                '-vn', '-filter:a', f'volume={self.gain}',
+                '-c:a', 'libopus', '-b:a', self.bitrate, '-ar', '48000', '-ac', '2',
+                '-f', 'ogg', str(temp),
+                stdin=asyncio.subprocess.DEVNULL,
+            )
+
+            if await proc.wait() != 0:
+                log.warning('Failed to cache song %s: ffmpeg exited with %s', song_id, proc.returncode)
+                return
+
+            size = temp.stat().st_size
+            temp.replace(self.path(song_id))
+            self.entries[song_id] = size
+            self.size += size
+            self.evict()
+
+        except OSError as e:
+            log.warning('Failed to cache song %s: %s', song_id, e)
+
+        finally:
+            if proc is not None and proc.returncode is None:
+                proc.kill()
+            temp.unlink(missing_ok=True)
+            self.pending.discard(song_id)
+
+    def fill_later(self, song_id: str | None, url: str) -> None:
+        """
+        Start filling the cache with a track in the background.
+
+        Args:
+            song_id (str | None): The Subsonic id of the song. Nothing is cached if this is None.
+            url (str): The stream URL to read the song from.
+        """
+
+        if not self.enabled() or song_id is None:
+            return
+
+        task = asyncio.create_task(self.fill(song_id, url))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
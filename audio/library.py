@@ -0,0 +1,275 @@
+"""
+A thin client for the Subsonic REST endpoints that the music player uses.
+
+All requests go through one pooled keep-alive session, so searches and listings don't pay for
+a new connection (and TLS handshake) every time, and the latency of each endpoint is recorded.
+
+Track listings only carry ids and display names. Stream URLs are built
+on demand, when a track gets close to the head of the queue.
+Note that Subsonic does not page album or playlist listings, so those are fetched in a single
+request, which callers should run off of the event loop.
+"""
+
+import hashlib
+import secrets
+import time
+from typing import Any
+from urllib.parse import urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from audio.track import Track
+
+API_VERSION = '1.16.1'
+
+
+class SubsonicError(Exception):
+    """
+    Raised when the Subsonic server returns an error response.
+    """
+
+
+class Latency:
+    """
+    Running latency statistics for one endpoint.
+    """
+
+    __slots__ = ('count', 'errors', 'total', 'max')
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float, error: bool) -> None:
+        """
+        Record the duration of one request.
+
+        Args:
+            seconds (float): How long the request took.
+            error (bool): Whether the request failed.
+        """
+        self.count += 1
+        self.errors += error
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def __str__(self) -> str:
+        mean = self.total / self.count if self.count else 0
+        return f'{self.count} calls, {self.errors} errors, {mean * 1000:.0f} ms avg, {self.max * 1000:.0f} ms max'
+
+
+class Album:
+    """
+    An album in a search result.
+    """
+
+    __slots__ = ('id', 'title', 'artist', 'song_count')
+
+    def __init__(self, album: dict[str, Any]) -> None:
+        self.id = album['id']
+        self.title = album.get('name', 'Unknown')
+        self.artist = album.get('artist')
+        self.song_count = album.get('songCount', 0)
+
+
+class Library:
+    """
+    A client for the Subsonic REST API.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        username: str,
+        password: str,
+        client: str,
+        *,
+        pool_size: int = 4,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 10,
+    ) -> None:
+        self.host = host.rstrip('/')
+        self.username = username
+        self.client = client
+        self.timeout = (connect_timeout, read_timeout)
+        self.latency: dict[str, Latency] = {}
+
+        # The salted token never expires, so compute it once and reuse it for every
+        # request and stream URL, rather than hashing the password again each time.
+        salt = secrets.token_hex(8)
+        self.auth = {
+            'u': username,
+            't': hashlib.md5((password + salt).encode()).hexdigest(),
+            's': salt,
+            'v': API_VERSION,
+            'c': client,
+        }
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def request(self, endpoint: str, **params: Any) -> dict[str, Any]:
+        """
+        Send a request to the Subsonic server.
+
+        Args:
+            endpoint (str): The name of the endpoint, e.g. `getAlbum`.
+            **params: Any extra query parameters.
+
+        Raises:
+            SubsonicError: If the server returned an error.
+            requests.RequestException: If the request itself failed.
+
+        Returns:
+            dict[str, Any]: The `subsonic-response` object of the reply.
+        """
+
+        start = time.perf_counter()
+        error = True
+        try:
+            response = self.session.get(
+                f'{self.host}/rest/{endpoint}',
+                params={**self.auth, 'f': 'json', **params},
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+
+            data = response.json()['subsonic-response']
+            if data.get('status') != 'ok':
+                raise SubsonicError(data.get('error', {}).get('message', 'Unknown error'))
+
+            error = False
+            return data
+
+        finally:
+            self.latency.setdefault(endpoint, Latency()).record(time.perf_counter() - start, error)
+
+    def stream_url(self, song_id: str) -> str:
+        """
+        Build the URL that a song can be streamed from.
+
+        Args:
+            song_id (str): The Subsonic id of the song.
+
+        Returns:
+            str: The stream URL.
+        """
+        return f'{self.host}/rest/stream?' + urlencode({**self.auth, 'id': song_id})
+
+    def search_songs(self, query: str, count: int = 20) -> list[Track]:
+        """
+        Search the library for songs.
+
+        Args:
+            query (str): The search terms.
+            count (int): The maximum number of songs to return.
+
+        Returns:
+            list[Track]: The matching songs, best match first.
+        """
+        result = self.request('search3', query=query, songCount=count, albumCount=0, artistCount=0)
+        return [to_track(i) for i in result.get('searchResult3', {}).get('song', [])]
+
+    def search_albums(self, query: str, count: int = 20) -> list[Album]:
+        """
+        Search the library for albums.
+
+        Args:
+            query (str): The search terms.
+            count (int): The maximum number of albums to return.
+
+        Returns:
+            list[Album]: The matching albums, best match first.
+        """
+        result = self.request('search3', query=query, songCount=0, albumCount=count, artistCount=0)
+        return [Album(i) for i in result.get('searchResult3', {}).get('album', [])]
+
+    def album_tracks(self, album_id: str) -> list[Track]:
+        """
+        List the songs of an album, without resolving their stream URLs.
+
+        Args:
+            album_id (str): The Subsonic id of the album.
+
+        Returns:
+            list[Track]: The songs of the album, in order.
+        """
+        album = self.request('getAlbum', id=album_id)['album']
+        return [to_track(i) for i in album.get('song', [])]
+
+    def find_playlist(self, name: str, negate: list[str]) -> dict[str, Any] | None:
+        """
+        Find the first playlist whose name contains the given text.
+
+        Args:
+            name (str): The text to search for, case insensitive.
+            negate (list[str]): Words that must not appear in the playlist name.
+
+        Returns:
+            dict[str, Any] | None: The playlist summary, or None if no playlist matched.
+        """
+
+        for i in self.request('getPlaylists').get('playlists', {}).get('playlist', []):
+            title = i.get('name', '').lower()
+            if name.lower() in title and not any(k.lower() in title for k in negate):
+                return i
+
+        return None
+
+    def playlist_tracks(self, playlist_id: str) -> list[Track]:
+        """
+        List the songs of a playlist, without resolving their stream URLs.
+
+        Args:
+            playlist_id (str): The Subsonic id of the playlist.
+
+        Returns:
+            list[Track]: The songs of the playlist, in order.
+        """
+        playlist = self.request('getPlaylist', id=playlist_id)['playlist']
+        return [to_track(i) for i in playlist.get('entry', [])]
+
+    def similar_songs(self, song_id: str, count: int) -> list[Track]:
+        """
+        List songs that are similar to the given song.
+
+        Args:
+            song_id (str): The Subsonic id of the song.
+            count (int): The maximum number of songs to return.
+
+        Returns:
+            list[Track]: Similar songs, which may be empty if the server knows of none.
+        """
+        similar = self.request('getSimilarSongs', id=song_id, count=count).get('similarSongs', {})
+        return [to_track(i) for i in similar.get('song', [])]
+
+    def random_songs(self, count: int) -> list[Track]:
+        """
+        List random songs from the library.
+
+        Args:
+            count (int): The number of songs to return.
+
+        Returns:
+            list[Track]: Random songs.
+        """
+        songs = self.request('getRandomSongs', size=count).get('randomSongs', {})
+        return [to_track(i) for i in songs.get('song', [])]
+
+
+def to_track(song: dict[str, Any]) -> Track:
+    """
+    Convert a Subsonic song object into an unresolved track.
+
+    Args:
+        song (dict[str, Any]): The song object returned by the Subsonic server.
+
+    Returns:
+        Track: A track with no stream URL yet.
+    """
+    return Track(song['id'], None, song.get('title', 'Unknown'), song.get('artist'), song.get('duration'))
@@ -0,0 +1,239 @@
+"""
+The now-playing panel for the music player.
+
+Each player keeps a single message in its channel that shows what is playing, how far into
+the track it is and what is up next. The message is edited in place rather than re-sent,
+edits are rate limited, and the message has buttons to control playback.
+"""
+
+import logging
+import time
+from typing import TYPE_CHECKING
+
+import discord
+from discord import Forbidden, HTTPException, NotFound
+
+if TYPE_CHECKING:
+    from commands.music import Player
+
+PROGRESS_WIDTH = 16
+UP_NEXT_COUNT = 3
+
+log = logging.getLogger(__name__)
+
+
+def format_time(seconds: float) -> str:
+    """
+    Format a duration as minutes and seconds.
+
+    Args:
+        seconds (float): The duration in seconds.
+
+    Returns:
+        str: The formatted duration, e.g. `3:07`.
+    """
+    seconds = int(seconds)
+    return f'{seconds // 60}:{seconds % 60:02}'
+
+
+def progress_bar(position: float, duration: int | None) -> str:
+    """
+    Draw a text progress bar for the current track.
+
+    Args:
+        position (float): The current position in seconds.
+        duration (int | None): The length of the track in seconds, if known.
+
+    Returns:
+        str: The progress bar, followed by the elapsed and total time.
+    """
+
+    if not duration:
+        return f'`{format_time(position)}`'
+
+    filled = min(PROGRESS_WIDTH, int(position / duration * PROGRESS_WIDTH))
+    bar = '▬' * filled + '🔘' + '▬' * (PROGRESS_WIDTH - filled)
+    return f'{bar} `{format_time(position)} / {format_time(duration)}`'
+
+
+class PanelView(discord.ui.View):
+    """
+    Playback control buttons attached to the now-playing panel.
+
+    The panel is posted in the voice channel's own chat, so each click finds the channel's current
+    player rather than holding on to the one that posted it, which may since have been replaced.
+    The buttons have fixed IDs, so a view added with `Client.add_view` keeps them working after a restart.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(timeout=None)
+
+    def find_player(self, interaction: discord.Interaction) -> 'Player':
+        """
+        Find the player for the channel that the panel is in.
+
+        Args:
+            interaction (discord.Interaction): The button click.
+
+        Returns:
+            Player: The channel's player, restoring its saved queue if it has none.
+        """
+
+        # Imported here since the music commands import this module.
+        import commands  # pylint: disable=import-outside-toplevel
+        commands.load('commands.music')
+        from commands.music import get_player  # pylint: disable=import-outside-toplevel
+
+        return get_player(interaction.channel)  # type: ignore
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        """
+        Only let people who are in the player's voice channel use the buttons.
+        """
+
+        voice = getattr(interaction.user, 'voice', None)
+        if (
+            not isinstance(interaction.channel, discord.VoiceChannel | discord.StageChannel) or
+            voice is None or voice.channel is None or voice.channel.id != interaction.channel.id
+        ):
+            await interaction.response.send_message(
+                'You must be in the voice channel to control the music.', ephemeral=True
+            )
+            return False
+
+        return True
+
+    @discord.ui.button(emoji='⏯️', style=discord.ButtonStyle.secondary, custom_id='music:toggle')
+    async def toggle(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
+        """
+        Pause or resume playback.
+        """
+        await interaction.response.defer()
+        player = self.find_player(interaction)
+        if player.is_paused():
+            await player.play()
+        else:
+            await player.pause()
+
+    @discord.ui.button(emoji='⏭️', style=discord.ButtonStyle.secondary, custom_id='music:skip')
+    async def skip(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
+        """
+        Skip to the next song in the queue.
+        """
+        await interaction.response.defer()
+        await self.find_player(interaction).next()
+
+    @discord.ui.button(emoji='⏹️', style=discord.ButtonStyle.danger, custom_id='music:stop')
+    async def stop_playback(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
+        """
+        Stop playback and disconnect.
+        """
+        await interaction.response.defer()
+        await self.find_player(interaction).stop()
+
+
+class NowPlayingPanel:
+    """
+    A single now-playing message for a player, edited in place at most once every `interval` seconds.
+    """
+
+    def __init__(self, player: 'Player', interval: float) -> None:
+        self.player = player
+        self.interval = interval
+        self.message: discord.Message | None = None
+        self.view: PanelView | None = None
+        self.last_edit = 0.0
+        self.pending = False
+
+    def render(self) -> str:
+        """
+        Build the text of the panel.
+
+        Returns:
+            str: The panel text.
+        """
+
+        queue = self.player.queue
+        track = queue.current
+        if track is None:
+            return 'Nothing is playing.'
+
+        lines = [
+            f'{"Paused" if self.player.is_paused() else "Playing"} {track}',
+            progress_bar(self.player.position(), track.duration),
+        ]
+
+        upcoming = [f'{position}. {i}' for position, i in queue.page(1, UP_NEXT_COUNT)]
+        if upcoming:
+            lines += ['Up Next:', *upcoming]
+            if queue.upcoming_count() > UP_NEXT_COUNT:
+                lines += [f'(and {queue.upcoming_count() - UP_NEXT_COUNT} more.)']
+
+        return '\n'.join(lines)
+
+    async def update(self) -> None:
+        """
+        Show the current state on the panel, posting the panel if it doesn't exist yet.
+        If the panel was edited too recently, the edit is deferred until the next `tick`.
+        """
+
+        if self.message is not None and time.monotonic() - self.last_edit < self.interval:
+            self.pending = True
+            return
+
+        self.pending = False
+        self.last_edit = time.monotonic()
+        content = self.render()
+
+        try:
+            if self.message is not None:
+                await self.message.edit(content=content)
+                return
+        except NotFound:
+            pass  # Somebody deleted the panel, so post a new one.
+        except (HTTPException, Forbidden) as e:
+            log.warning('Failed to edit now-playing panel: %s', e)
+            return
+
+        try:
+            self.view = PanelView()
+            self.message = await self.player.channel.send(content, view=self.view)
+        except (HTTPException, Forbidden) as e:
+            log.warning('Failed to post now-playing panel: %s', e)
+
+    async def tick(self) -> None:
+        """
+        Apply any deferred edit, and refresh the progress bar while a track is playing.
+        """
+
+        if self.message is None:
+            return
+
+        if self.pending or (
+            self.player.is_playing() and time.monotonic() - self.last_edit >= self.interval
+        ):
+            await self.update()
+
+    async def close(self, text: str) -> None:
+        """
+        Replace the panel with a final message and remove its buttons.
+
+        Args:
+            text (str): The final text to show.
+        """
+
+        if self.message is None:
+            return
+
+        message, self.message = self.message, None
+        self.pending = False
+
+        # Stop the old buttons accepting clicks, even if they can't be removed from the message.
+        if self.view is not None:
+            self.view.stop()
+            self.view = None
+
+        try:
+            await message.edit(content=text, view=None)
+        except (HTTPException, Forbidden, NotFound) as e:
+            log.warning('Failed to close now-playing panel: %s', e)
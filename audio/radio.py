@@ -0,0 +1,136 @@
+"""
+Radio mode for the music player.
+
+When radio mode is on and the queue runs out, the player picks the next song from a small
+buffer of candidates. The buffer is filled in the background with songs similar to what was
+just played, topped up with random songs when there aren't enough similar ones that haven't been
+played recently, so the player never has to wait on the Subsonic server between songs.
+"""
+
+import asyncio
+import logging
+from collections import deque
+
+import requests
+
+from audio.library import Library, SubsonicError
+from audio.track import Track
+
+log = logging.getLogger(__name__)
+
+
+class Radio:
+    """
+    A prefetched buffer of songs to play once the queue runs out.
+    """
+
+    def __init__(self, library: Library, seed: str | None, buffer_size: int = 5, history_size: int = 100) -> None:
+        self.library = library
+        self.seed = seed
+        self.buffer_size = buffer_size
+        self.buffer: deque[Track] = deque()
+        self.history: deque[str] = deque(maxlen=history_size)
+        self.task: asyncio.Task | None = None
+
+        if seed is not None:
+            self.history.append(seed)
+
+    def remember(self, track: Track) -> None:
+        """
+        Record that a song was played, so that it isn't picked again soon,
+        and so that the next candidates are similar to it.
+
+        Args:
+            track (Track): The song that started playing.
+        """
+
+        if track.id is None:
+            return
+
+        self.seed = track.id
+        if track.id not in self.history:
+            self.history.append(track.id)
+
+    def fetch(self, seen: set[str | None], wanted: int) -> tuple[list[Track], bool]:
+        """
+        Ask the Subsonic server for new candidate songs. This blocks, so run it in a thread.
+        Songs similar to the seed come first, and random songs make up any shortfall,
+        so the radio keeps going even once every similar song has been played.
+
+        Args:
+            seen (set[str | None]): The ids of songs that were played recently or are already buffered.
+            wanted (int): How many songs are needed.
+
+        Returns:
+            tuple[list[Track], bool]: Up to `wanted` songs that haven't been seen,
+                and whether the seed has no similar songs left to offer.
+        """
+
+        count = self.buffer_size * 2
+        tracks: list[Track] = []
+        exhausted = False
+
+        def add(candidates: list[Track]) -> None:
+            for track in candidates:
+                if len(tracks) < wanted and track.id not in seen:
+                    tracks.append(track)
+                    seen.add(track.id)
+
+        if self.seed is not None:
+            add(self.library.similar_songs(self.seed, count))
+            exhausted = not tracks
+
+        if len(tracks) < wanted:
+            add(self.library.random_songs(count))
+
+        return tracks, exhausted
+
+    async def refill(self) -> None:
+        """
+        Fill the buffer with new candidate songs.
+        """
+
+        seed = self.seed
+        seen = set(self.history) | {i.id for i in self.buffer}
+        try:
+            tracks, exhausted = await asyncio.to_thread(self.fetch, seen, self.buffer_size - len(self.buffer))
+        except (requests.RequestException, SubsonicError) as e:
+            log.warning('Failed to fetch radio songs: %s', e)
+            return
+
+        # Stop asking for songs like this one, unless a newer song has become the seed since.
+        if exhausted and self.seed == seed:
+            self.seed = None
+
+        buffered = {i.id for i in self.buffer}
+        self.buffer.extend(i for i in tracks if i.id not in buffered)
+
+    def refill_later(self) -> None:
+        """
+        Start filling the buffer in the background, unless it is full or already being filled.
+        """
+
+        if len(self.buffer) >= self.buffer_size or (self.task is not None and not self.task.done()):
+            return
+
+        self.task = asyncio.create_task(self.refill())
+
+    def take(self) -> Track | None:
+        """
+        Take the next song from the buffer, and top the buffer back up in the background.
+
+        Returns:
+            Track | None: The next song, or None if the buffer is empty.
+        """
+
+        track = self.buffer.popleft() if self.buffer else None
+        self.refill_later()
+        return track
+
+    def stop(self) -> None:
+        """
+        Cancel any background refill.
+        """
+
+        if self.task is not None:
+            self.task.cancel()
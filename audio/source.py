@@ -0,0 +1,68 @@
+"""
+Opus audio sources for the music player.
+
+All audio is encoded to Opus by ffmpeg, and any volume change is applied as an ffmpeg filter,
+so discord.py only has to forward packets instead of encoding every frame itself.
+"""
+
+import discord
+
+RECONNECT_OPTIONS = '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5'
+
+
+class OpusSource(discord.FFmpegOpusAudio):
+    """
+    An Opus audio source that keeps track of how far into the track it is,
+    so that playback can be restarted from the same position.
+    """
+
+    def __init__(self, url: str, *, start: float = 0.0, **kwargs) -> None:
+        super().__init__(url, **kwargs)
+        self.start = start
+        self.frames = 0
+
+    def read(self) -> bytes:
+        data = super().read()
+        if data:
+            self.frames += 1
+        return data
+
+    @property
+    def position(self) -> float:
+        """
+        The current position in the track.
+
+        Returns:
+            float: The number of seconds since the start of the track.
+        """
+        return self.start + self.frames * discord.opus.Encoder.FRAME_LENGTH / 1000
+
+
+def create_source(url: str, gain: float, start: float = 0.0, *, local: bool = False) -> OpusSource:
+    """
+    Create an Opus audio source for a track.
+
+    Args:
+        url (str): The stream URL or local path of the track.
+        gain (float): The volume multiplier to apply to the track.
+        start (float): The position in seconds to start playing from.
+        local (bool): Whether the track is a local Opus file.
+            Local files at unity gain are passed through without re-encoding.
+
+    Returns:
+        OpusSource: The audio source.
+    """
+
+    before_options = '' if local else RECONNECT_OPTIONS
+    if start > 0:
+        before_options += f' -ss {start:.2f}'
+
+    if local and gain == 1.0:
+        return OpusSource(url, start=start, codec='copy', before_options=before_options, options='-vn')
+
+    return OpusSource(
+        url,
+        start=start,
+        before_options=before_options,
+        options=f'-vn -filter:a volume={gain:.3f}',
+    )
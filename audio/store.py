@@ -0,0 +1,118 @@
+"""
+Persistence for music queues, so that they survive restarts of the bot.
+
+Each voice channel has one document in the `music_queues` collection.
+Everyday queue changes (adding songs and finishing the current one) are written as
+incremental `$push` and `$pop` updates, and only reordering the queue rewrites the whole list.
+"""
+
+from datetime import datetime
+from typing import Any, Iterable
+
+from pymongo.collection import Collection
+
+from audio.track import Track
+
+
+def to_document(track: Track) -> dict[str, Any]:
+    """
+    Convert a track into its stored form.
+    Stream URLs are not stored, since they carry credentials and can be rebuilt from the song id.
+
+    Args:
+        track (Track): The track to convert.
+
+    Returns:
+        dict[str, Any]: The stored form of the track.
+    """
+    return {'id': track.id, 'title': track.title, 'artist': track.artist, 'duration': track.duration}
+
+
+def from_document(doc: dict[str, Any]) -> Track:
+    """
+    Convert a stored track back into a track.
+
+    Args:
+        doc (dict[str, Any]): The stored form of the track.
+
+    Returns:
+        Track: A track with no stream URL yet.
+    """
+    return Track(doc.get('id'), None, doc.get('title', 'Unknown'), doc.get('artist'), doc.get('duration'))
+
+
+class QueueStore:
+    """
+    Reads and writes the persisted state of music queues.
+    """
+
+    def __init__(self, collection: Collection) -> None:
+        self.collection = collection
+
+    def update(self, channel_id: int, update: dict[str, Any]) -> None:
+        """
+        Apply an update to a channel's queue document, creating it if needed.
+
+        Args:
+            channel_id (int): The ID of the voice channel.
+            update (dict[str, Any]): The MongoDB update to apply.
+        """
+        update.setdefault('$set', {})['updated'] = datetime.utcnow()
+        self.collection.update_one({'channel_id': channel_id}, update, upsert=True)
+
+    def load(self, channel_id: int) -> tuple[list[Track], float]:
+        """
+        Load the persisted queue for a channel.
+
+        Args:
+            channel_id (int): The ID of the voice channel.
+
+        Returns:
+            tuple[list[Track], float]: The queued tracks, and the position in seconds
+                that the first track was at when it was last saved.
+        """
+
+        doc = self.collection.find_one({'channel_id': channel_id})
+        if doc is None:
+            return [], 0.0
+
+        return [from_document(i) for i in doc.get('tracks', [])], float(doc.get('position', 0))
+
+    def append(self, channel_id: int, tracks: Iterable[Track]) -> None:
+        """
+        Append tracks to the end of a channel's queue.
+
+        Args:
+            channel_id (int): The ID of the voice channel.
+            tracks (Iterable[Track]): The tracks that were added.
+        """
+        self.update(channel_id, {'$push': {'tracks': {'$each': [to_document(i) for i in tracks]}}})
+
+    def pop(self, channel_id: int) -> None:
+        """
+        Remove the first track from a channel's queue, resetting the saved position.
+
+        Args:
+            channel_id (int): The ID of the voice channel.
+        """
+        self.update(channel_id, {'$pop': {'tracks': -1}, '$set': {'position': 0}})
+
+    def replace(self, channel_id: int, tracks: Iterable[Track]) -> None:
+        """
+        Overwrite a channel's whole queue, e.g. after it has been reordered.
+
+        Args:
+            channel_id (int): The ID of the voice channel.
+            tracks (Iterable[Track]): All tracks in the queue, in order.
+        """
+        self.update(channel_id, {'$set': {'tracks': [to_document(i) for i in tracks]}})
+
+    def set_position(self, channel_id: int, position: float) -> None:
+        """
+        Save how far into the first track of a channel's queue playback is.
+
+        Args:
+            channel_id (int): The ID of the voice channel.
+            position (float): The position in seconds.
+        """
+        self.update(channel_id, {'$set': {'position': position}})
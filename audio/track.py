@@ -0,0 +1,181 @@
+"""
+Track records and the music queue.
+
+The queue is a deque of small `Track` objects, so that popping the head
+of the queue and appending whole albums stays cheap, even for very long queues.
+"""
+
+import random
+from collections import deque
+from itertools import islice
+from typing import Callable, Iterator
+
+
+class Track:
+    """
+    A single song in the music queue.
+    """
+
+    __slots__ = ('id', 'url', 'title', 'artist', 'duration', 'playing')
+
+    def __init__(
+        self,
+        id: str | None,
+        url: str | None,
+        title: str,
+        artist: str | None,
+        duration: int | None = None,
+    ) -> None:
+        self.id = id
+        self.url = url
+        self.title = title
+        self.artist = artist
+        self.duration = duration
+        self.playing = False
+
+    def __str__(self) -> str:
+        return f'**{self.title}** by *{self.artist}*'
+
+
+class TrackQueue(deque):
+    """
+    A queue of tracks, where the first track may be the one that is currently playing.
+
+    Positions used by the reordering methods are 1-based and count only upcoming tracks,
+    i.e. they never include the track that is currently playing.
+    """
+
+    @property
+    def offset(self) -> int:
+        """
+        The index of the first upcoming track.
+
+        Returns:
+            int: 1 if the head of the queue is currently playing, otherwise 0.
+        """
+        return 1 if len(self) and self[0].playing else 0
+
+    @property
+    def current(self) -> Track | None:
+        """
+        The track that is currently playing, if any.
+
+        Returns:
+            Track | None: The currently playing track, or None.
+        """
+        return self[0] if self.offset else None
+
+    def resolve(self, count: int, resolver: Callable[[str], str]) -> None:
+        """
+        Make sure the first few tracks in the queue have a stream URL.
+        Tracks are enqueued without one, so that long albums and playlists
+        don't hold on to a URL for every track.
+
+        Args:
+            count (int): The number of tracks at the head of the queue to resolve.
+            resolver (Callable[[str], str]): A function that maps a song id to its stream URL.
+        """
+
+        for track in islice(self, count):
+            if track.url is None and track.id is not None:
+                track.url = resolver(track.id)
+
+    def upcoming_count(self) -> int:
+        """
+        Count the tracks that have not started playing yet.
+
+        Returns:
+            int: The number of upcoming tracks.
+        """
+        return len(self) - self.offset
+
+    def _index(self, position: int) -> int:
+        """
+        Convert a 1-based upcoming position into a queue index.
+
+        Args:
+            position (int): The 1-based position among upcoming tracks.
+
+        Raises:
+            IndexError: If the position does not refer to an upcoming track.
+
+        Returns:
+            int: The corresponding index into the queue.
+        """
+        if position < 1 or position > self.upcoming_count():
+            raise IndexError(position)
+        return self.offset + position - 1
+
+    def page(self, page: int, size: int) -> Iterator[tuple[int, Track]]:
+        """
+        Iterate over a single page of upcoming tracks, without copying the queue.
+
+        Args:
+            page (int): The 1-based page number.
+            size (int): The number of tracks per page.
+
+        Returns:
+            Iterator[tuple[int, Track]]: Pairs of (1-based position, track).
+        """
+        start = (page - 1) * size
+        tracks = islice(self, self.offset + start, self.offset + start + size)
+        return enumerate(tracks, start + 1)
+
+    def remove_at(self, position: int) -> Track:
+        """
+        Remove an upcoming track from the queue.
+
+        Args:
+            position (int): The 1-based position among upcoming tracks.
+
+        Raises:
+            IndexError: If the position does not refer to an upcoming track.
+
+        Returns:
+            Track: The track that was removed.
+        """
+        index = self._index(position)
+        track = self[index]
+        del self[index]
+        return track
+
+    def move(self, source: int, dest: int) -> Track:
+        """
+        Move an upcoming track to a different position in the queue.
+
+        Args:
+            source (int): The 1-based position of the track to move.
+            dest (int): The 1-based position that the track should end up at.
+
+        Raises:
+            IndexError: If either position does not refer to an upcoming track.
+
+        Returns:
+            Track: The track that was moved.
+        """
+        dest_index = self._index(dest)
+        track = self.remove_at(source)
+        self.insert(dest_index, track)
+        return track
+
+    def shuffle(self) -> None:
+        """
+        Shuffle all upcoming tracks, leaving the currently playing track in place.
+        """
+        current = self.popleft() if self.offset else None
+        tracks = list(self)
+        random.shuffle(tracks)
+
+        self.clear()
+        if current is not None:
+            self.append(current)
+        self.extend(tracks)
+
+    def clear_upcoming(self) -> None:
+        """
+        Remove all upcoming tracks, leaving the currently playing track in place.
+        """
+        current = self.current
+        self.clear()
+        if current is not None:
+            self.append(current)
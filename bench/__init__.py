@@ -0,0 +1,9 @@
+"""
+Benchmarks for the bot.
+
+These are standalone scripts, run from the repository root with e.g. `python -m bench.opus_pipeline`.
+They do not need a Discord connection. `python -m bench.dispatch` times every command offline,
+`python -m bench.replay` replays gateway events recorded with `--record-events`,
+`python -m bench.marker_format` compares the map marker formats,
+and `python -m bench.poi_export` times exporting points of interest.
+"""
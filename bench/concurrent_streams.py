@@ -0,0 +1,159 @@
+"""
+Measure how CPU and memory use scale with the number of concurrent music streams.
+
+Each stream is an `OpusSource`, the same source the music player uses, read at real time
+(one 20 ms packet every 20 ms) in its own thread, just like discord.py's audio player does.
+For each stream count, the CPU use of this process and of every ffmpeg child is sampled from /proc.
+
+Usage: python -m bench.concurrent_streams path/to/song.mp3 [--streams 1 2 4 8 16] [--seconds 20]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import discord  # noqa: E402
+
+from audio.source import OpusSource, create_source  # noqa: E402
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+FRAME_LENGTH = discord.opus.Encoder.FRAME_LENGTH / 1000
+
+
+def proc_usage(pid: int) -> tuple[float, int]:
+    """
+    Read the CPU time and resident memory of a process from /proc.
+
+    Args:
+        pid (int): The process ID.
+
+    Returns:
+        tuple[float, int]: The CPU time in seconds and the resident set size in bytes.
+    """
+
+    try:
+        with open(f'/proc/{pid}/stat', 'r', encoding='utf8') as fp:
+            fields = fp.read().rsplit(')', 1)[1].split()
+        with open(f'/proc/{pid}/statm', 'r', encoding='utf8') as fp:
+            rss = int(fp.read().split()[1]) * PAGE_SIZE
+    except FileNotFoundError:
+        return 0.0, 0
+
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS, rss
+
+
+def drain(source: OpusSource, stop: threading.Event, ended: list[OpusSource]) -> None:
+    """
+    Read packets from a source at real time until told to stop or the track ends.
+
+    Args:
+        source (OpusSource): The source to read from.
+        stop (threading.Event): Set when the measurement is over.
+        ended (list[OpusSource]): The sources that ran out before the measurement was over, which this adds to.
+    """
+
+    start = time.perf_counter()
+    frames = 0
+    while not stop.is_set():
+        if not source.read():
+            # Once ffmpeg exits its CPU time can't be read, so the measurement would be too low.
+            ended.append(source)
+            return
+
+        frames += 1
+        delay = start + frames * FRAME_LENGTH - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def measure(path: str, streams: int, seconds: float, volume: float) -> tuple[float, float, int, int]:
+    """
+    Play several streams at once and measure their resource usage.
+
+    Args:
+        path (str): The audio file to play.
+        streams (int): How many streams to play at once.
+        seconds (float): How long to measure for.
+        volume (float): The volume multiplier, which forces ffmpeg to re-encode.
+
+    Returns:
+        tuple[float, float, int, int]: The CPU use of this process and of all ffmpeg processes
+            (as a fraction of one core), and the resident memory of each in bytes.
+
+    Raises:
+        ValueError: If the track ended before the measurement was over.
+    """
+
+    sources = [create_source(path, volume, local=True) for _ in range(streams)]
+    pids = [i._process.pid for i in sources]  # pylint: disable=protected-access
+    stop = threading.Event()
+    ended: list[OpusSource] = []
+    threads = [threading.Thread(target=drain, args=(i, stop, ended), daemon=True) for i in sources]
+
+    for i in threads:
+        i.start()
+
+    # Let ffmpeg start up before measuring.
+    time.sleep(1)
+    own_start = proc_usage(os.getpid())[0]
+    child_start = sum(proc_usage(i)[0] for i in pids)
+    wall = time.perf_counter()
+
+    time.sleep(seconds)
+
+    wall = time.perf_counter() - wall
+    own_cpu, own_rss = proc_usage(os.getpid())
+    child = [proc_usage(i) for i in pids]
+
+    stop.set()
+    for i in threads:
+        i.join()
+    for i in sources:
+        i.cleanup()
+
+    if ended:
+        raise ValueError(
+            f'{len(ended)} of {streams} streams ended before the measurement was over, '
+            'so use a longer track or fewer --seconds.'
+        )
+
+    return (
+        (own_cpu - own_start) / wall,
+        (sum(i[0] for i in child) - child_start) / wall,
+        own_rss,
+        sum(i[1] for i in child),
+    )
+
+
+def main() -> None:
+    """
+    Run the measurement for each requested stream count and print a table.
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', help='An audio file to play in every stream.')
+    parser.add_argument('--streams', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--seconds', type=float, default=20)
+    parser.add_argument('--volume', type=float, default=0.25)
+    args = parser.parse_args()
+
+    print(f'{"streams":>7} {"python cpu":>10} {"ffmpeg cpu":>10} {"python rss":>11} {"ffmpeg rss":>11}')
+    for streams in args.streams:
+        try:
+            own_cpu, child_cpu, own_rss, child_rss = measure(args.path, streams, args.seconds, args.volume)
+        except ValueError as e:
+            sys.exit(f'ERROR: {e}')
+        print(
+            f'{streams:>7} {own_cpu:>9.1%} {child_cpu:>10.1%} '
+            f'{own_rss / 2**20:>8.1f} MB {child_rss / 2**20:>8.1f} MB'
+        )
+
+
+if __name__ == '__main__':
+    main()
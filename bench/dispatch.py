@@ -0,0 +1,191 @@
+"""
+Measure how long the bot takes to handle each command, without Discord, MongoDB, Subsonic or Minecraft.
+
+Every scenario is a message fed straight into `DiscordClient.on_message`, the same way discord.py would.
+MongoDB is replaced with an in-memory database and the other services with stand-ins from `bench.fakes`,
+so the numbers measure the bot's own code. Output is sorted and fixed-width, so runs on different
+commits can be compared with `diff`, or with `--json` for scripts.
+
+Usage: python -m bench.dispatch [--iterations 500] [--warmup 50] [--only location play] [--json]
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bench.fakes import OfflineBot, setup_environment  # noqa: E402
+
+# Each scenario is (name, message text, options for `OfflineBot.message`).
+# Commands that are not listed here are measured with `!{command} help`.
+SCENARIOS: list[tuple[str, str, dict[str, Any]]] = [
+    ('help', '!help', {}),
+    ('mention', '<@{bot}>', {}),
+    ('unknown command', '!nonexistent', {}),
+    ('chat (no command)', 'hello everyone', {}),
+    ('point of interest', 'village {n} -{n}', {}),
+    ('dm relay', 'hello from a DM', {'dm': True}),
+    ('alias', '!alias', {}),
+    ('location count', '!location count', {}),
+    ('location list', '!location list 3', {}),
+    ('location delete (missing)', '!location delete nowhere', {}),
+    ('location export', '!location export', {}),
+    ('players', '!players', {}),
+    ('say', '!say hello', {}),
+    ('say (world selector)', '!say world:flatearth hello', {}),
+    ('whitelist', '!whitelist', {}),
+    ('stats', '!stats', {'admin': True}),
+    ('stalls', '!stalls', {'admin': True}),
+    ('play', '!play song 1{n}', {}),
+    ('play album', '!play album album 1', {}),
+    ('queue', '!queue', {}),
+    ('queue page', '!queue page 2', {}),
+    ('volume', '!volume 50', {}),
+    ('pause', '!pause', {}),
+    ('stop', '!stop', {}),
+]
+
+
+def git_revision() -> str:
+    """
+    Get the current commit, so results can be matched to the code they measured.
+
+    Returns:
+        str: The short commit hash, with `+` if there are uncommitted changes.
+    """
+
+    root = Path(__file__).parent.parent
+    try:
+        rev = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=root,
+                             capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=root,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+    return rev + ('+' if dirty else '')
+
+
+def percentile(samples: list[int], fraction: float) -> float:
+    """
+    Get a percentile of some sorted samples.
+
+    Args:
+        samples (list[int]): Sorted samples.
+        fraction (float): The percentile as a fraction, e.g. 0.99.
+
+    Returns:
+        float: The sample at that percentile.
+    """
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+async def measure(bot: OfflineBot, make: Callable[[int], Any], iterations: int, warmup: int) -> dict[str, float]:
+    """
+    Send a message to the bot many times and time how long each one takes to handle.
+
+    Args:
+        bot (OfflineBot): The bot to send messages to.
+        make (Callable[[int], Any]): Builds the message for the given iteration.
+        iterations (int): The number of timed messages.
+        warmup (int): The number of untimed messages sent first.
+
+    Returns:
+        dict[str, float]: Operations per second, and the median and 99th percentile in microseconds.
+    """
+
+    samples = []
+    for i in range(warmup + iterations):
+        message = make(i)
+        start = time.perf_counter_ns()
+        await bot.client.on_message(message)
+        elapsed = time.perf_counter_ns() - start
+        if i >= warmup:
+            samples.append(elapsed)
+
+    samples.sort()
+    return {
+        'ops': 1e9 * len(samples) / sum(samples),
+        'p50': percentile(samples, 0.5) / 1000,
+        'p99': percentile(samples, 0.99) / 1000,
+    }
+
+
+async def run(args: argparse.Namespace) -> dict[str, dict[str, float]]:
+    """
+    Run every selected scenario.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+
+    Returns:
+        dict[str, dict[str, float]]: The results for each scenario.
+    """
+
+    bot = OfflineBot(pois=args.pois)
+    scenarios = list(SCENARIOS)
+    covered = {text.split()[0][1:] for _, text, _ in scenarios if text.startswith('!')}
+    scenarios += [(f'{i} help', f'!{i} help', {}) for i in sorted(bot.commands.all()) if i not in covered]
+
+    results = {}
+    for name, text, options in scenarios:
+        if args.only and not any(i in name for i in args.only):
+            continue
+
+        # Each scenario starts from the same state, so later scenarios are not slowed by earlier ones.
+        bot.reset_music()
+        if name.startswith(('queue', 'volume', 'pause', 'stop')):
+            await bot.client.on_message(bot.message('!play album album 1'))
+
+        def make(i: int, text: str = text, options: dict = options) -> Any:
+            return bot.message(text.format(n=i, bot=bot.client.user.id), **options)
+
+        results[name] = await measure(bot, make, args.iterations, args.warmup)
+
+    bot.reset_music()
+    return results
+
+
+def main() -> None:
+    """
+    Run the benchmark and print the results.
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--warmup', type=int, default=50)
+    parser.add_argument('--pois', type=int, default=1000, help='Points of interest to put in the database.')
+    parser.add_argument('--only', nargs='+', help='Only run scenarios whose names contain one of these.')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON.')
+    args = parser.parse_args()
+
+    random.seed(0)
+    revision = git_revision()
+    setup_environment(log_level='ERROR')
+    results = asyncio.run(run(args))
+
+    if args.json:
+        print(json.dumps({
+            'revision': revision,
+            'python': platform.python_version(),
+            'iterations': args.iterations,
+            'results': results,
+        }, indent=2))
+        return
+
+    print(f'commit {revision}, Python {platform.python_version()}, {args.iterations} iterations')
+    print(f'{"scenario":<28} {"ops/sec":>10} {"p50 µs":>10} {"p99 µs":>10}')
+    for name, result in sorted(results.items()):
+        print(f'{name:<28} {result["ops"]:>10.0f} {result["p50"]:>10.1f} {result["p99"]:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,383 @@
+"""
+Stand-ins for Discord, MongoDB, Subsonic and the Minecraft server, so the bot can be driven offline.
+
+`OfflineBot` builds a `DiscordClient` from main.py wired to these stand-ins. Discord objects
+only implement what the bot uses. MongoDB is replaced with an in-memory mongomock database.
+"""
+
+import atexit
+import json
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime
+from itertools import count
+from pathlib import Path
+from typing import Any
+
+import discord
+
+ROOT = Path(__file__).parent.parent
+IDS = count(10 ** 17)
+
+
+class FakeUser:
+    """
+    A Discord user or guild member.
+    """
+
+    bot = False
+
+    def __init__(self, name: str, voice_channel: 'FakeVoiceChannel | None' = None, id: int | None = None) -> None:
+        self.id = next(IDS) if id is None else id
+        self.name = name
+        self.voice = None if voice_channel is None else type('VoiceState', (), {'channel': voice_channel})()
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class FakeEmoji:
+    """
+    A custom guild emoji.
+    """
+
+    def __init__(self, name: str, id: int | None = None) -> None:
+        self.id = next(IDS) if id is None else id
+        self.name = name
+
+    def __str__(self) -> str:
+        return f'<:{self.name}:{self.id}>'
+
+
+class FakeGuild:
+    """
+    A Discord guild with the dimension emojis that the bot looks for.
+    """
+
+    def __init__(self, id: int | None = None, emojis: list[FakeEmoji] | None = None) -> None:
+        self.id = next(IDS) if id is None else id
+        self.emojis = [FakeEmoji(i) for i in ('overworld', 'nether', 'end')] if emojis is None else emojis
+        self.filesize_limit = discord.utils.DEFAULT_FILE_SIZE_LIMIT_BYTES
+
+
+class FakeMessage:
+    """
+    A message sent by a user or by the bot.
+    """
+
+    def __init__(self, channel: Any, author: FakeUser, content: str, id: int | None = None) -> None:
+        self.id = next(IDS) if id is None else id
+        self.channel = channel
+        self.author = author
+        self.content = content
+        self.guild = getattr(channel, 'guild', None)
+        self.reactions: list[Any] = []
+
+    async def add_reaction(self, emoji: Any) -> None:
+        self.reactions.append(emoji)
+
+    async def remove_reaction(self, emoji: Any, member: Any) -> None:
+        if emoji in self.reactions:
+            self.reactions.remove(emoji)
+
+    async def edit(self, **kwargs: Any) -> 'FakeMessage':
+        self.content = kwargs.get('content', self.content)
+        return self
+
+
+class FakeChannel:
+    """
+    A guild text channel, which remembers the messages sent to it.
+    """
+
+    def __init__(self, name: str, guild: FakeGuild, id: int | None = None) -> None:
+        self.id = next(IDS) if id is None else id
+        self.name = name
+        self.guild = guild
+        self.sent: list[FakeMessage] = []
+        self.messages: dict[int, FakeMessage] = {}
+        self.user = FakeUser('mc.skrunky.com')
+
+    async def send(self, content: str | None = None, **kwargs: Any) -> FakeMessage:
+        message = FakeMessage(self, self.user, content or '')
+        self.sent.append(message)
+        del self.sent[:-100]
+        return message
+
+    async def fetch_message(self, id: int) -> FakeMessage:
+        if id not in self.messages:
+            raise discord.NotFound(type('Response', (), {'status': 404, 'reason': 'Not Found'})(), 'Unknown Message')
+        return self.messages[id]
+
+
+class FakeDMChannel(discord.DMChannel):
+    """
+    A direct message channel. This has to subclass the real class, since the bot checks for it.
+    """
+
+    def __init__(self, recipient: FakeUser, id: int | None = None) -> None:  # pylint: disable=super-init-not-called
+        self.id = next(IDS) if id is None else id
+        self.recipients = [recipient]
+        self.sent: list[FakeMessage] = []
+
+    async def send(self, content: str | None = None, **kwargs: Any) -> FakeMessage:  # type: ignore
+        message = FakeMessage(self, FakeUser('mc.skrunky.com'), content or '')
+        self.sent.append(message)
+        del self.sent[:-100]
+        return message
+
+
+class FakeVoiceClient:
+    """
+    A voice connection that accepts audio sources without playing them.
+    """
+
+    def __init__(self, channel: 'FakeVoiceChannel') -> None:
+        self.channel = channel
+        self.source: Any = None
+        self.playing = False
+        self.paused = False
+        self.connected = True
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+    def is_playing(self) -> bool:
+        return self.playing and not self.paused
+
+    def is_paused(self) -> bool:
+        return self.paused
+
+    def play(self, source: Any) -> None:
+        self.source, self.playing, self.paused = source, True, False
+
+    def stop(self) -> None:
+        self.source, self.playing, self.paused = None, False, False
+
+    def pause(self) -> None:
+        self.paused = self.playing
+
+    def resume(self) -> None:
+        self.paused = False
+
+    async def disconnect(self, force: bool = False) -> None:
+        self.stop()
+        self.connected = False
+
+
+class FakeVoiceChannel(FakeChannel):
+    """
+    A voice channel, which also has a text chat.
+    """
+
+    def __init__(self, name: str, guild: FakeGuild, id: int | None = None) -> None:
+        super().__init__(name, guild, id)
+        self.members: list[FakeUser] = []
+
+    async def connect(self, self_deaf: bool = False) -> FakeVoiceClient:
+        return FakeVoiceClient(self)
+
+
+class FakeSource(discord.AudioSource):
+    """
+    An audio source that never starts ffmpeg.
+    """
+
+    def read(self) -> bytes:
+        return b''
+
+
+class FakeLibrary:
+    """
+    A stand-in for `audio.library.Library` that answers from a generated library without any network access.
+    """
+
+    def __init__(self, songs: int = 2000) -> None:
+        from audio.library import Album, to_track  # pylint: disable=import-outside-toplevel
+
+        self.to_track = to_track
+        self.songs = [
+            {'id': f'song-{i}', 'title': f'Song {i}', 'artist': f'Artist {i % 50}', 'duration': 200}
+            for i in range(songs)
+        ]
+        self.albums = [
+            Album({'id': f'album-{i}', 'name': f'Album {i}', 'artist': f'Artist {i % 50}', 'songCount': 12})
+            for i in range(songs // 12)
+        ]
+        self.latency: dict[str, Any] = {}
+
+    def stream_url(self, song_id: str) -> str:
+        return f'http://127.0.0.1/rest/stream?id={song_id}'
+
+    def search_songs(self, query: str, count: int = 20) -> list:
+        query = query.lower()
+        return [self.to_track(i) for i in self.songs if query in i['title'].lower()][:count]
+
+    def search_albums(self, query: str, count: int = 20) -> list:
+        query = query.lower()
+        return [i for i in self.albums if query in i.title.lower()][:count]
+
+    def album_tracks(self, album_id: str) -> list:
+        index = int(album_id.split('-')[1])
+        return [self.to_track(i) for i in self.songs[index * 12:index * 12 + 12]]
+
+    def find_playlist(self, name: str, negate: list[str]) -> dict | None:
+        return {'id': 'playlist-0', 'name': 'Playlist 0'} if name.lower() in 'playlist 0' else None
+
+    def playlist_tracks(self, playlist_id: str) -> list:
+        return [self.to_track(i) for i in self.songs[:500]]
+
+    def similar_songs(self, song_id: str, count: int) -> list:
+        return [self.to_track(i) for i in self.songs[:count]]
+
+    def random_songs(self, count: int) -> list:
+        return [self.to_track(i) for i in self.songs[-count:]]
+
+
+def setup_environment(log_level: str = 'WARNING') -> Path:
+    """
+    Prepare a temporary directory with a secrets file and the Minecraft server files that
+    the bot reads, and point the bot at them. This must run before main.py or `commands` is imported.
+
+    Args:
+        log_level (str): The log level for the bot.
+
+    Returns:
+        Path: The temporary directory, which is also the new working directory.
+    """
+
+    temp = Path(tempfile.mkdtemp(prefix='mc-discord-bot-'))
+    atexit.register(shutil.rmtree, temp, ignore_errors=True)
+    server = temp / 'minecraftbe' / 'flatearth'
+    (server / 'logs').mkdir(parents=True)
+    (temp / 'bot').mkdir()
+
+    (server / 'allowlist.json').write_text(json.dumps([{'name': f'Player{i}'} for i in range(30)]), encoding='utf8')
+
+    lines = []
+    for i in range(200):
+        action = 'connected' if i % 3 else 'disconnected'
+        lines += [f'2024-01-01 00:00:00 [2024-01-01 00:00:00:000 INFO] Player {action}: Player{i % 30}, xuid: {i}\n']
+    today = datetime.now().strftime('%Y.%m.%d.')
+    (server / 'logs' / f'flatearth.{today}00.00.00.log').write_text(''.join(lines), encoding='utf8')
+
+    (temp / 'secrets.json').write_text(json.dumps({
+        'token': 'offline',
+        'guild': 0,
+        'subsonic': {
+            'url': 'http://127.0.0.1:9',
+            'username': 'offline',
+            'password': 'offline',
+            'cache': {'path': str(temp / 'cache'), 'max_bytes': 0},
+        },
+    }), encoding='utf8')
+
+    os.environ['MC_BOT_SECRETS'] = str(temp / 'secrets.json')
+    os.chdir(temp / 'bot')
+    sys.argv = [sys.argv[0], '--metrics-port', '0', '--log-level', log_level]
+    sys.path.insert(0, str(ROOT))
+    return temp
+
+
+class OfflineBot:
+    """
+    The bot's `DiscordClient`, wired up to the stand-ins instead of Discord, MongoDB, Subsonic and Minecraft.
+    """
+
+    def __init__(self, pois: int = 1000) -> None:
+        import mongomock  # pylint: disable=import-outside-toplevel
+
+        import commands  # pylint: disable=import-outside-toplevel
+        import main  # pylint: disable=import-outside-toplevel
+
+        self.commands = commands
+        self.main = main
+        self.mc_commands: list[str] = []
+
+        # Swap the database for an in-memory one everywhere it is referenced.
+        commands.load_all()
+        self.db = mongomock.MongoClient().flatearth
+        commands.db = self.db
+        for cmd in commands.loaded().values():
+            cmd.db = self.db
+
+        for module in list(sys.modules.values()):
+            if getattr(module, '__name__', '').startswith('commands.') and hasattr(module, 'mc_command'):
+                module.mc_command = lambda text, world=None: self.mc_commands.append(text)  # type: ignore
+
+        if aliases := sys.modules.get('aliases'):
+            aliases.ALIASES.collection = self.db.users  # type: ignore
+            aliases.ALIASES.clear()  # type: ignore
+
+        if music := sys.modules.get('commands.music'):
+            music.LIBRARY = FakeLibrary()  # type: ignore
+            music.STORE.collection = self.db.music_queues  # type: ignore
+            music.create_source = lambda *args, **kwargs: FakeSource()  # type: ignore
+
+        self.client = main.DiscordClient(intents=discord.Intents.all())
+        self.client._connection.user = FakeUser('mc.skrunky.com')  # type: ignore # pylint: disable=protected-access
+
+        self.guild = FakeGuild()
+        self.games = FakeChannel('games', self.guild)
+        self.voice = FakeVoiceChannel('General', self.guild)
+        self.user = FakeUser('player', self.voice)
+        self.admin = FakeUser('admin', self.voice)
+        self.voice.members = [self.user, self.admin]
+        self.dm = FakeDMChannel(self.user)
+
+        self.seed(pois)
+
+    def seed(self, pois: int) -> None:
+        """
+        Fill the database with users, an admin and points of interest.
+
+        Args:
+            pois (int): The number of points of interest to create.
+        """
+
+        self.db.admins.insert_one({'id': str(self.admin.id)})
+        self.db.users.insert_one({'user_id': self.user.id, 'alias': 'PlayerOne'})
+
+        dimensions = ['overworld', 'nether', 'end']
+        self.db.messages.insert_many([{
+            'message_id': next(IDS),
+            'emojis': [dimensions[i % 3]],
+            'text': f'place {i} {i * 10} {-i * 10}',
+            'label': f'PLACE {i}',
+            'coords': [i * 10, -i * 10],
+            'author': self.user.id,
+            'updated': False,
+            'created': datetime.utcnow(),
+            'last_updated': None,
+        } for i in range(pois)])
+
+    def message(self, content: str, *, admin: bool = False, dm: bool = False, channel: Any = None) -> FakeMessage:
+        """
+        Build a message as if a user had sent it.
+
+        Args:
+            content (str): The text of the message.
+            admin (bool): Whether the message is from an admin.
+            dm (bool): Whether the message was sent as a DM.
+            channel (Any): The channel to send it in, if not the games channel.
+
+        Returns:
+            FakeMessage: The message.
+        """
+
+        channel = self.dm if dm else (channel or self.games)
+        message = FakeMessage(channel, self.admin if admin else self.user, content)
+        if isinstance(channel, FakeChannel):
+            channel.messages[message.id] = message
+        return message
+
+    def reset_music(self) -> None:
+        """
+        Forget all music players and saved queues.
+        """
+
+        if music := sys.modules.get('commands.music'):
+            music.PLAYERS.clear()  # type: ignore
+            self.db.music_queues.delete_many({})
@@ -0,0 +1,141 @@
+"""
+Compare the size and load time of the full and compact map marker formats.
+
+Both formats are rendered for the same generated markers, then measured raw and compressed.
+Load time is how long it takes to run the script and get the expanded markers, measured in
+Node.js if it is installed (which is close to what a browser does), and otherwise estimated
+from how long Python takes to parse the JSON inside it.
+
+Usage: python -m bench.marker_format [--markers 10000] [--repeat 20]
+"""
+
+import argparse
+import gzip
+import json
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import markers  # noqa: E402
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Runs a marker script repeatedly and prints the median time in milliseconds.
+NODE_SCRIPT = '''
+const fs = require('fs');
+const vm = require('vm');
+const source = fs.readFileSync(process.argv[2], 'utf8');
+const times = [];
+let result;
+for (let i = 0; i < Number(process.argv[3]); i++) {
+    const context = {};
+    const start = process.hrtime.bigint();
+    vm.runInNewContext(source, context);
+    result = context.UnminedCustomMarkers;
+    times.push(Number(process.hrtime.bigint() - start) / 1e6);
+}
+times.sort((a, b) => a - b);
+console.log(JSON.stringify({ms: times[times.length >> 1], count: result.markers.length, first: result.markers[0]}));
+'''
+
+
+def generate(count: int) -> list[dict]:
+    """
+    Generate markers like the ones the bot stores.
+
+    Args:
+        count (int): The number of markers.
+
+    Returns:
+        list[dict]: The markers.
+    """
+
+    rng = random.Random(0)
+    return [{
+        'x': rng.randint(-30000, 30000),
+        'z': rng.randint(-30000, 30000),
+        'text': f'{rng.choice(["BASE", "VILLAGE", "PORTAL", "FARM", "MESA BIOME"])} {i}',
+        **markers.STYLE,
+    } for i in range(count)]
+
+
+def load_time(text: str, repeat: int) -> tuple[float, dict | None]:
+    """
+    Measure how long it takes to load a marker script.
+
+    Args:
+        text (str): The script.
+        repeat (int): How many times to load it.
+
+    Returns:
+        tuple[float, dict | None]: The median time in milliseconds, and the first marker
+            as loaded by Node.js, or None if Node.js is not installed.
+    """
+
+    if node := shutil.which('node'):
+        with tempfile.TemporaryDirectory() as temp:
+            (Path(temp) / 'markers.js').write_text(text, encoding='utf8')
+            (Path(temp) / 'load.js').write_text(NODE_SCRIPT, encoding='utf8')
+            out = subprocess.run([node, str(Path(temp) / 'load.js'), str(Path(temp) / 'markers.js'), str(repeat)],
+                                 capture_output=True, text=True, check=True).stdout
+        result = json.loads(out)
+        return result['ms'], result['first']
+
+    # Both formats are a JSON value wrapped in a little JavaScript.
+    if text.startswith(markers.LOADER):
+        data = text[len(markers.LOADER):-len(');')]
+    else:
+        data = text[text.index('markers: ') + len('markers: '):-len('}')]
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        json.loads(data)
+        times.append(time.perf_counter() - start)
+    return sorted(times)[len(times) // 2] * 1000, None
+
+
+def main() -> None:
+    """
+    Render both formats and print a comparison.
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--markers', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    data = generate(args.markers)
+    engine = 'Node.js' if shutil.which('node') else 'Python json (no Node.js found)'
+    print(f'{args.markers} markers, load time measured with {engine}')
+    print(f'{"format":<8} {"raw KB":>10} {"gzip KB":>10} {"brotli KB":>10} {"render ms":>10} {"load ms":>10}')
+
+    loaded = {}
+    for format in ('full', 'compact'):
+        start = time.perf_counter()
+        text = markers.render(data, format)
+        render_ms = (time.perf_counter() - start) * 1000
+
+        body = text.encode()
+        gzipped = len(gzip.compress(body, 9, mtime=0)) / 1024
+        brotlied = f'{len(brotli.compress(body, quality=9)) / 1024:.1f}' if brotli else '-'
+        load_ms, loaded[format] = load_time(text, args.repeat)
+
+        print(f'{format:<8} {len(body) / 1024:>10.1f} {gzipped:>10.1f} {brotlied:>10} {render_ms:>10.1f} {load_ms:>10.1f}')
+
+    if loaded['full'] is not None and loaded['full'] != loaded['compact']:
+        print('ERROR: The compact format does not load the same markers as the full format.')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
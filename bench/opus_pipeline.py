@@ -0,0 +1,102 @@
+"""
+Compare the CPU cost of the old PCM playback pipeline against the Opus passthrough pipeline.
+
+The old pipeline has ffmpeg decode to PCM, scales every frame in Python with
+`PCMVolumeTransformer` and then encodes it with libopus, which is what discord.py's
+voice client does for PCM sources. The new pipeline has ffmpeg do all of that itself.
+
+Both pipelines are drained as fast as possible, and the CPU time spent in this process
+and in ffmpeg is reported per minute of audio.
+
+Usage: python -m bench.opus_pipeline path/to/song.mp3 [--volume 0.25]
+"""
+
+import argparse
+import resource
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import discord  # noqa: E402
+
+from audio.source import create_source  # noqa: E402
+
+
+def cpu_times() -> tuple[float, float]:
+    """
+    Get the CPU time used so far by this process and by its finished children.
+
+    Returns:
+        tuple[float, float]: The (own, children) CPU time in seconds.
+    """
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime, children.ru_utime + children.ru_stime
+
+
+def run_pcm(path: str, volume: float) -> int:
+    """
+    Drain the old pipeline: FFmpegPCMAudio, PCMVolumeTransformer and Python-side Opus encoding.
+
+    Returns:
+        int: The number of 20 ms frames produced.
+    """
+    source = discord.PCMVolumeTransformer(discord.FFmpegPCMAudio(path, options='-vn'), volume=volume)
+    encoder = discord.opus.Encoder()
+    frames = 0
+    while data := source.read():
+        if len(data) < discord.opus.Encoder.FRAME_SIZE:
+            break
+        encoder.encode(data, discord.opus.Encoder.SAMPLES_PER_FRAME)
+        frames += 1
+    source.cleanup()
+    return frames
+
+
+def run_opus(path: str, volume: float) -> int:
+    """
+    Drain the new pipeline: ffmpeg applies the volume and encodes to Opus itself.
+
+    Returns:
+        int: The number of 20 ms frames produced.
+    """
+    source = create_source(path, volume, local=True)
+    frames = 0
+    while source.read():
+        frames += 1
+    source.cleanup()
+    return frames
+
+
+def main() -> None:
+    """
+    Run both pipelines on the given file and print a comparison.
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', help='An audio file to play through each pipeline.')
+    parser.add_argument('--volume', type=float, default=0.25)
+    args = parser.parse_args()
+
+    if not discord.opus.is_loaded():
+        discord.opus._load_default()  # pylint: disable=protected-access
+
+    print(f'{"pipeline":<8} {"audio (s)":>10} {"wall (s)":>9} {"python cpu/min":>15} {"ffmpeg cpu/min":>15}')
+    for name, func in (('pcm', run_pcm), ('opus', run_opus)):
+        own_start, child_start = cpu_times()
+        wall = time.perf_counter()
+        frames = func(args.path, args.volume)
+        wall = time.perf_counter() - wall
+        own, child = cpu_times()
+
+        minutes = frames * discord.opus.Encoder.FRAME_LENGTH / 1000 / 60
+        print(
+            f'{name:<8} {minutes * 60:>10.1f} {wall:>9.2f} '
+            f'{(own - own_start) / minutes:>15.3f} {(child - child_start) / minutes:>15.3f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
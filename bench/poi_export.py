@@ -0,0 +1,118 @@
+"""
+Measure exporting points of interest with `!location export`, in every format.
+
+The export reads from a stand-in collection that returns pre-generated documents, rather than the
+in-memory MongoDB from `bench.fakes`, which takes minutes just to sort 100k documents. So the numbers
+are for the bot's own work: formatting, compressing and spooling. Peak memory is what the export
+allocates on top of the documents, as seen by `tracemalloc` in a separate run.
+
+Usage: python -m bench.poi_export [--pois 100000]
+"""
+
+import argparse
+import gzip
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pois  # noqa: E402
+
+
+class Cursor:
+    """
+    A cursor over documents that are already in order.
+    """
+
+    def __init__(self, docs: list[dict[str, Any]]) -> None:
+        self.docs = docs
+
+    def sort(self, *args: Any) -> 'Cursor':
+        return self
+
+    def batch_size(self, size: int) -> 'Cursor':
+        return self
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        # MongoDB hands out a new copy of each document, so do the same.
+        return (dict(i) for i in self.docs)
+
+
+class Collection:
+    """
+    A `messages` collection that holds only points of interest.
+    """
+
+    def __init__(self, docs: list[dict[str, Any]]) -> None:
+        self.docs = docs
+
+    def find(self, *args: Any) -> Cursor:
+        return Cursor(self.docs)
+
+
+def generate(count: int) -> list[dict[str, Any]]:
+    """
+    Generate points of interest like the ones the bot stores, sorted by label.
+
+    Args:
+        count (int): The number of points of interest.
+
+    Returns:
+        list[dict[str, Any]]: The message documents.
+    """
+
+    rng = random.Random(0)
+    dimensions = ['overworld', 'nether', 'end']
+    docs = []
+    for i in range(count):
+        coords = [rng.randint(-30000, 30000) for _ in range(rng.choice([2, 3]))]
+        docs.append({
+            'emojis': rng.sample(dimensions, rng.randint(1, 2)),
+            'label': f'{rng.choice(["BASE", "VILLAGE", "PORTAL", "FARM", "MESA BIOME"])} {i}',
+            'coords': coords,
+            'author': rng.randint(10 ** 17, 10 ** 18),
+            'created': datetime(2024, 1, 1),
+        })
+    return sorted(docs, key=lambda i: i['label'])
+
+
+def main() -> None:
+    """
+    Run the benchmark and print the results.
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pois', type=int, default=100000, help='Points of interest to export.')
+    args = parser.parse_args()
+
+    collection = Collection(generate(args.pois))
+
+    print(f'{args.pois} points of interest')
+    print(f'{"format":<8} {"seconds":>8} {"rows/sec":>10} {"raw KB":>10} {"gzip KB":>10} {"peak MB":>8}')
+    for format in pois.FORMATS:
+        start = time.perf_counter()
+        fp, count = pois.export(collection, format)  # type: ignore
+        elapsed = time.perf_counter() - start
+        with fp:
+            compressed = fp.read()
+
+        # Memory is measured in a second run, since tracing slows everything down.
+        tracemalloc.start()
+        pois.export(collection, format)[0].close()  # type: ignore
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        raw = len(gzip.decompress(compressed))
+        print(
+            f'{format:<8} {elapsed:>8.2f} {count / elapsed:>10.0f} {raw / 1024:>10.0f} ' +
+            f'{len(compressed) / 1024:>10.0f} {peak / 1024 ** 2:>8.1f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,320 @@
+"""
+Replay recorded gateway events into the bot offline, to measure how it copes with real bursts of traffic.
+
+Events are recorded by running the bot with `--record-events events.jsonl`. They are replayed into
+`DiscordClient` the same way discord.py dispatches them, each in its own task, against an in-memory
+MongoDB and the other stand-ins from `bench.fakes`. Replay can run at the recorded pace (`--speed 1`),
+faster (`--speed 10`), or as fast as possible (`--speed 0`). The marker pipeline runs every 15 seconds
+of recorded time, as it does in the bot.
+
+If there is no recording to hand, `--generate N` writes N events of a synthetic busy evening instead.
+
+Usage: python -m bench.replay events.jsonl [--speed 0] [--pois 1000]
+       python -m bench.replay events.jsonl --generate 5000 [--rate 5]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Coroutine
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import discord  # noqa: E402
+
+from bench.fakes import (FakeChannel, FakeDMChannel, FakeEmoji, FakeGuild,  # noqa: E402
+                         FakeMessage, FakeUser, FakeVoiceChannel, OfflineBot,
+                         setup_environment)
+
+MARKER_INTERVAL = 15
+
+
+class Replay:
+    """
+    Turns recorded events back into the objects the bot's event handlers expect.
+    """
+
+    def __init__(self, bot: OfflineBot) -> None:
+        self.bot = bot
+        self.guilds: dict[int, FakeGuild] = {}
+        self.channels: dict[int, Any] = {}
+        self.users: dict[int, FakeUser] = {}
+
+        async def fetch_channel(id: int) -> Any:
+            return self.channels[id]
+
+        bot.client.fetch_channel = fetch_channel  # type: ignore
+
+    def guild(self, desc: dict[str, Any] | None) -> FakeGuild | None:
+        """
+        Get the guild an event happened in, creating it the first time it is seen.
+        """
+
+        if desc is None:
+            return None
+
+        if desc['id'] not in self.guilds:
+            emojis = [FakeEmoji(i['name'], i['id']) for i in desc['emojis']]
+            self.guilds[desc['id']] = FakeGuild(desc['id'], emojis)
+        return self.guilds[desc['id']]
+
+    def channel(self, desc: dict[str, Any], guild: FakeGuild | None, user: FakeUser, voice: bool = False) -> Any:
+        """
+        Get the channel an event happened in, creating it the first time it is seen.
+        """
+
+        if desc['id'] not in self.channels:
+            if desc['dm']:
+                self.channels[desc['id']] = FakeDMChannel(user, desc['id'])
+            elif voice:
+                self.channels[desc['id']] = FakeVoiceChannel(desc['name'], guild or FakeGuild(), desc['id'])
+            else:
+                self.channels[desc['id']] = FakeChannel(desc['name'], guild or FakeGuild(), desc['id'])
+        return self.channels[desc['id']]
+
+    def user(self, desc: dict[str, Any]) -> Any:
+        """
+        Get the author of a message, creating them the first time they are seen.
+        """
+
+        # Messages from bots are treated as the bot's own, which it ignores.
+        if desc['bot']:
+            return self.bot.client.user
+
+        if desc['id'] not in self.users:
+            self.users[desc['id']] = FakeUser(desc['name'], id=desc['id'])
+        return self.users[desc['id']]
+
+    def handler(self, event: dict[str, Any]) -> Coroutine:
+        """
+        Build the event handler call for an event.
+
+        Args:
+            event (dict[str, Any]): The recorded event.
+
+        Returns:
+            Coroutine: The handler, ready to be scheduled.
+        """
+
+        if event['type'] == 'message':
+            guild = self.guild(event['guild'])
+            author = self.user(event['author'])
+            channel = self.channel(event['channel'], guild, author)
+
+            if event['voice_channel'] and isinstance(author, FakeUser):
+                voice = self.channel(event['voice_channel'], guild, author, voice=True)
+                author.voice = type('VoiceState', (), {'channel': voice})()
+                if author not in voice.members:
+                    voice.members.append(author)
+
+            message = FakeMessage(channel, author, event['content'], event['id'])
+            if isinstance(channel, FakeChannel):
+                channel.messages[message.id] = message
+            return self.bot.client.on_message(message)  # type: ignore
+
+        event_type = 'REACTION_ADD' if event['type'] == 'reaction_add' else 'REACTION_REMOVE'
+        payload = discord.RawReactionActionEvent({
+            'message_id': event['message_id'],
+            'channel_id': event['channel_id'],
+            'user_id': event['user_id'],
+            'guild_id': event['guild_id'],
+            'type': 0,
+        }, discord.PartialEmoji(name=event['emoji']['name'], id=event['emoji']['id']), event_type)  # type: ignore
+
+        if event_type == 'REACTION_ADD':
+            return self.bot.client.on_raw_reaction_add(payload)
+        return self.bot.client.on_raw_reaction_remove(payload)
+
+
+def percentiles(samples: list[float]) -> str:
+    """
+    Summarize some durations.
+
+    Args:
+        samples (list[float]): Durations in seconds.
+
+    Returns:
+        str: The count, median and 99th percentile in milliseconds.
+    """
+
+    if not samples:
+        return f'{0:>7} {"-":>10} {"-":>10}'
+
+    samples = sorted(samples)
+    p50 = samples[len(samples) // 2]
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    return f'{len(samples):>7} {p50 * 1000:>10.2f} {p99 * 1000:>10.2f}'
+
+
+async def replay(bot: OfflineBot, events: list[dict[str, Any]], speed: float) -> None:
+    """
+    Replay events into the bot and print how long it took to handle them.
+
+    Args:
+        bot (OfflineBot): The bot to replay events into.
+        events (list[dict[str, Any]]): The recorded events, in order.
+        speed (float): How many times faster than recorded to replay, or 0 for as fast as possible.
+    """
+
+    replayer = Replay(bot)
+    latency: dict[str, list[float]] = {}
+    markers: list[float] = []
+    errors: dict[str, int] = {}
+
+    async def run(event_type: str, handler: Coroutine, due: float) -> None:
+        try:
+            await handler
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            error = f'{event_type}: {type(e).__name__}: {e}'
+            errors[error] = errors.get(error, 0) + 1
+        # Latency is measured from when the event arrived, so it includes time spent waiting behind other events.
+        latency.setdefault(event_type, []).append(time.perf_counter() - due)
+
+    def update_markers() -> None:
+        start = time.perf_counter()
+        bot.client.update_markers()  # type: ignore
+        markers.append(time.perf_counter() - start)
+
+    tasks = []
+    first = events[0]['time']
+    next_tick = first + MARKER_INTERVAL
+    start = time.perf_counter()
+
+    for event in events:
+        while event['time'] >= next_tick:
+            update_markers()
+            next_tick += MARKER_INTERVAL
+
+        due = start + (event['time'] - first) / speed if speed else time.perf_counter()
+        if (delay := due - time.perf_counter()) > 0:
+            await asyncio.sleep(delay)
+
+        handler = replayer.handler(event)
+        tasks.append(asyncio.create_task(run(event['type'], handler, due)))
+        await asyncio.sleep(0)
+
+    await asyncio.gather(*tasks)
+    update_markers()
+    elapsed = time.perf_counter() - start
+
+    recorded = events[-1]['time'] - first
+    print(f'{len(events)} events spanning {recorded:.1f}s, replayed in {elapsed:.2f}s '
+          f'({len(events) / elapsed:.0f} events/sec)')
+    print(f'{"event":<18} {"count":>7} {"p50 ms":>10} {"p99 ms":>10}')
+    for event_type, samples in sorted(latency.items()):
+        print(f'{event_type:<18} {percentiles(samples)}')
+    print(f'{"marker update":<18} {percentiles(markers)}')
+    print(f'{bot.db.markers.count_documents({})} markers')
+    for error, count in sorted(errors.items()):
+        print(f'{count} x {error}')
+
+
+def generate(path: str, count: int, rate: float) -> None:
+    """
+    Write a synthetic busy evening: chat, points of interest, reactions to mark their dimension, and commands.
+    Events arrive in bursts, with an average of `rate` events per second.
+
+    Args:
+        path (str): The file to write the events to.
+        count (int): The number of events to write.
+        rate (float): The average number of events per second.
+    """
+
+    rng = random.Random(0)
+    guild = {'id': 1, 'emojis': [{'id': 10 + i, 'name': name} for i, name in enumerate(['overworld', 'nether', 'end'])]}
+    games = {'id': 2, 'name': 'games', 'dm': False}
+    voice = {'id': 3, 'name': 'General', 'dm': False}
+    users = [{'id': 100 + i, 'name': f'player{i}', 'bot': False} for i in range(20)]
+    commands = ['!players', '!location list', '!location count', '!help', '!whitelist', '!play song 1', '!queue']
+    pois: list[tuple[int, dict, set[str]]] = []
+
+    now = time.time()
+    with open(path, 'w', encoding='utf8') as fp:
+        for i in range(count):
+            # Bursts: most events follow closely on the previous one, with occasional lulls.
+            now += rng.expovariate(rate * 4) if rng.random() < 0.8 else rng.expovariate(rate / 4)
+            user = rng.choice(users)
+            roll = rng.random()
+
+            if roll < 0.25 and pois:
+                # Authors mark their points of interest with a dimension, and sometimes take it back.
+                message_id, author, marked = rng.choice(pois)
+                emoji = rng.choice(guild['emojis'])
+                remove = emoji['name'] in marked and rng.random() < 0.3
+                (marked.discard if remove else marked.add)(emoji['name'])
+                event = {
+                    'type': 'reaction_remove' if remove else 'reaction_add',
+                    'message_id': message_id,
+                    'channel_id': games['id'],
+                    'guild_id': guild['id'],
+                    'user_id': author['id'],
+                    'emoji': emoji,
+                }
+            else:
+                if roll < 0.4:
+                    content = f'base {i} {rng.randint(-5000, 5000)} {rng.randint(-5000, 5000)}'
+                elif roll < 0.5:
+                    content = rng.choice(commands)
+                else:
+                    content = f'chat message number {i}'
+
+                event = {
+                    'type': 'message',
+                    'id': 10 ** 6 + i,
+                    'content': content,
+                    'author': user,
+                    'channel': games,
+                    'guild': guild,
+                    'voice_channel': voice,
+                }
+                if content.startswith('base'):
+                    pois.append((event['id'], user, set()))
+
+            event['time'] = now
+            fp.write(json.dumps(event) + '\n')
+
+
+def main() -> None:
+    """
+    Replay a recording, or generate one.
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', help='A file of events recorded with --record-events.')
+    parser.add_argument('--speed', type=float, default=0, help='1 for the recorded pace, 10 for ten times faster, or 0 for as fast as possible.')
+    parser.add_argument('--pois', type=int, default=1000, help='Points of interest to put in the database first.')
+    parser.add_argument('--generate', type=int, metavar='N', help='Write N synthetic events to the file instead of replaying it.')
+    parser.add_argument('--rate', type=float, default=5, help='Average events per second when generating.')
+    args = parser.parse_args()
+
+    path = str(Path(args.path).resolve())
+    if args.generate:
+        generate(path, args.generate, args.rate)
+        print(f'Wrote {args.generate} events to {path}')
+        return
+
+    import event_recorder  # pylint: disable=import-outside-toplevel
+
+    events = event_recorder.load(path)
+    if not events:
+        print('No events to replay.')
+        return
+
+    temp = setup_environment(log_level='ERROR')
+
+    async def run() -> None:
+        bot = OfflineBot(pois=args.pois)
+        bot.main.MAP_PATH = str(temp / 'maps')
+        for dimension in ('overworld', 'nether', 'end'):
+            (temp / 'maps' / dimension).mkdir(parents=True)
+        await replay(bot, events, args.speed)
+
+    asyncio.run(run())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+"""
+A local stand-in for a Subsonic server, for exercising the music client without a real library.
+
+It serves a generated library of albums, playlists and songs over the handful of REST endpoints
+that `audio.library` uses, and `stream` serves the same audio file for every song.
+An optional delay simulates a slow or distant server.
+
+Usage:
+    python -m bench.subsonic_server [--port 4040] [--delay 0.05] [--stream path/to/song.mp3]
+    python -m bench.subsonic_server --probe 200
+        Start the server and send requests to it through `audio.library.Library`,
+        then print the latency of each endpoint.
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from audio.library import Library  # noqa: E402
+
+
+def song(index: int) -> dict:
+    """
+    Generate a song object.
+
+    Args:
+        index (int): The song number.
+
+    Returns:
+        dict: A Subsonic song object.
+    """
+    return {
+        'id': f'song-{index}',
+        'title': f'Song {index}',
+        'artist': f'Artist {index % 50}',
+        'album': f'Album {index // 12}',
+        'duration': 180 + index % 120,
+    }
+
+
+def make_handler(songs: int, delay: float, stream: bytes) -> type[BaseHTTPRequestHandler]:
+    """
+    Build a request handler class for a generated library.
+
+    Args:
+        songs (int): The number of songs in the library.
+        delay (float): Seconds to wait before answering each request.
+        stream (bytes): The body to serve for every stream request.
+
+    Returns:
+        type[BaseHTTPRequestHandler]: The handler class.
+    """
+
+    def respond(endpoint: str, params: dict[str, str]) -> dict:
+        if endpoint == 'search3':
+            query = params.get('query', '').lower()
+            matches = [song(i) for i in range(songs) if query in song(i)['title'].lower()]
+            albums = [
+                {'id': f'album-{i}', 'name': f'Album {i}', 'artist': f'Artist {i % 50}', 'songCount': 12}
+                for i in range(songs // 12) if query in f'album {i}'
+            ]
+            return {'searchResult3': {
+                'song': matches[:int(params.get('songCount', 20))],
+                'album': albums[:int(params.get('albumCount', 20))],
+            }}
+
+        if endpoint == 'getAlbum':
+            index = int(params['id'].split('-')[1])
+            return {'album': {'id': params['id'], 'song': [song(i) for i in range(index * 12, index * 12 + 12)]}}
+
+        if endpoint == 'getPlaylists':
+            return {'playlists': {'playlist': [{'id': f'playlist-{i}', 'name': f'Playlist {i}'} for i in range(10)]}}
+
+        if endpoint == 'getPlaylist':
+            return {'playlist': {'id': params['id'], 'entry': [song(i) for i in range(min(songs, 500))]}}
+
+        if endpoint in ('getSimilarSongs', 'getRandomSongs'):
+            count = int(params.get('count', params.get('size', 10)))
+            offset = int(time.time() * 1000) % songs
+            key = 'similarSongs' if endpoint == 'getSimilarSongs' else 'randomSongs'
+            return {key: {'song': [song((offset + i * 7) % songs) for i in range(count)]}}
+
+        return {'status': 'failed', 'error': {'code': 70, 'message': f'Unknown endpoint {endpoint}'}}
+
+    class Handler(BaseHTTPRequestHandler):
+        """
+        Answers Subsonic REST requests from the generated library.
+        """
+
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def do_GET(self) -> None:  # pylint: disable=invalid-name
+            """
+            Handle a single request.
+            """
+
+            url = urlparse(self.path)
+            endpoint = url.path.rsplit('/', 1)[-1]
+            params = {key: val[0] for key, val in parse_qs(url.query).items()}
+            time.sleep(delay)
+
+            if endpoint == 'stream':
+                body, content_type = stream, 'audio/mpeg'
+            else:
+                data = {'status': 'ok', 'version': '1.16.1', **respond(endpoint, params)}
+                body, content_type = json.dumps({'subsonic-response': data}).encode(), 'application/json'
+
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args) -> None:
+            pass
+
+    return Handler
+
+
+def serve(port: int, songs: int = 5000, delay: float = 0.0, stream: bytes = b'') -> ThreadingHTTPServer:
+    """
+    Start the stand-in server on a background thread.
+
+    Args:
+        port (int): The port to listen on, or 0 to pick a free one.
+        songs (int): The number of songs in the generated library.
+        delay (float): Seconds to wait before answering each request.
+        stream (bytes): The body to serve for every stream request.
+
+    Returns:
+        ThreadingHTTPServer: The running server. Its URL is `http://127.0.0.1:{server.server_port}`.
+    """
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(songs, delay, stream))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def probe(server: ThreadingHTTPServer, count: int, pool_size: int) -> None:
+    """
+    Send requests to the server through the music library client and print per-endpoint latency.
+
+    Args:
+        server (ThreadingHTTPServer): The running server.
+        count (int): The number of requests to send to each endpoint.
+        pool_size (int): The connection pool size of the client.
+    """
+
+    library = Library(f'http://127.0.0.1:{server.server_port}', 'user', 'password', 'probe', pool_size=pool_size)
+    for _ in range(count):
+        library.search_songs('song 1')
+        library.search_albums('album 1')
+        library.album_tracks('album-3')
+        library.similar_songs('song-1', 10)
+
+    for endpoint, latency in library.latency.items():
+        print(f'{endpoint:<16} {latency}')
+
+
+def main() -> None:
+    """
+    Run the stand-in server, or probe it.
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=4040)
+    parser.add_argument('--songs', type=int, default=5000)
+    parser.add_argument('--delay', type=float, default=0.0)
+    parser.add_argument('--stream', type=Path, help='An audio file to serve for every stream request.')
+    parser.add_argument('--probe', type=int, metavar='COUNT', help='Send COUNT requests per endpoint and exit.')
+    parser.add_argument('--pool-size', type=int, default=4)
+    args = parser.parse_args()
+
+    stream = args.stream.read_bytes() if args.stream else b''
+    server = serve(0 if args.probe else args.port, args.songs, args.delay, stream)
+
+    if args.probe:
+        probe(server, args.probe, args.pool_size)
+        server.shutdown()
+        return
+
+    print(f'Serving a stand-in Subsonic library at http://127.0.0.1:{server.server_port}', flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+"""
+Relays chat and players joining or leaving from the Minecraft worlds into Discord.
+
+Each world's server log is tailed incrementally, reading only what was appended since the last
+check. Events are held for a short window and then sent together as one Discord message, so a
+burst of activity (e.g. everyone logging in at once) doesn't run into Discord's rate limits.
+The time from a line being logged to its message reaching Discord is recorded as a metric.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable
+
+import discord
+
+import metrics
+from worlds import World
+
+log = logging.getLogger(__name__)
+
+EVENTS = metrics.Counter('bot_bridge_events_total', 'Events relayed from Minecraft to Discord.', ('world', 'kind'))
+MESSAGES = metrics.Counter('bot_bridge_messages_total', 'Discord messages sent by the chat bridge.', ('outcome',))
+LATENCY_SECONDS = metrics.Histogram('bot_bridge_latency_seconds', 'Time from a line being logged to it being posted in Discord.')
+
+MAX_MESSAGE_LENGTH = 2000
+MAX_READ_BYTES = 1024 ** 2
+
+TIMESTAMP = re.compile(r'\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}):(\d{3})')
+PATTERNS = [
+    ('join', re.compile(r' INFO\] Player connected: (?P<player>[^,]+),')),
+    ('leave', re.compile(r' INFO\] Player disconnected: (?P<player>[^,]+),')),
+    ('chat', re.compile(r' INFO\] (?:\[Chat\] )?<(?P<player>[^>]+)> (?P<text>.*)$')),
+]
+
+
+class Event:
+    """
+    Something that happened in a world, as read from its log.
+    """
+
+    __slots__ = ('world', 'kind', 'player', 'text', 'logged')
+
+    def __init__(self, world: str, kind: str, player: str, text: str, logged: float) -> None:
+        self.world = world
+        self.kind = kind
+        self.player = player
+        self.text = text
+        self.logged = logged
+
+    def __str__(self) -> str:
+        player = discord.utils.escape_markdown(self.player)
+        if self.kind == 'join':
+            return f'**{player}** joined the game.'
+        if self.kind == 'leave':
+            return f'**{player}** left the game.'
+        return f'<**{player}**> {discord.utils.escape_mentions(discord.utils.escape_markdown(self.text))}'
+
+
+def parse(world: str, line: str) -> Event | None:
+    """
+    Parse a line of a server log.
+
+    Args:
+        world (str): The name of the world the line is from.
+        line (str): The line.
+
+    Returns:
+        Event | None: The event, or None if the line isn't one that gets relayed.
+    """
+
+    for kind, pattern in PATTERNS:
+        if match := pattern.search(line):
+            logged = time.time()
+            if stamp := TIMESTAMP.search(line):
+                logged = min(logged, datetime.strptime(stamp[1], '%Y-%m-%d %H:%M:%S').timestamp() + int(stamp[2]) / 1000)
+
+            return Event(world, kind, match['player'].strip(), match.groupdict().get('text') or '', logged)
+
+    return None
+
+
+class LogTail:
+    """
+    Follows a world's latest log file, including when the server starts a new one.
+    """
+
+    def __init__(self, world: World) -> None:
+        self.world = world
+        self.path: Path | None = None
+        self.offset = 0
+        self.partial = b''
+
+    def latest(self) -> Path | None:
+        """
+        Find today's newest log file. Log file names contain the date and time, so the newest sorts last.
+
+        Returns:
+            Path | None: The log file, or the current one if there are none for today yet.
+        """
+
+        today = datetime.now().strftime('%Y.%m.%d.')
+        return max(self.world.logs.glob(f'{self.world.name}.{today}*'), default=self.path)
+
+    def read_from(self, path: Path) -> list[str]:
+        """
+        Read the complete lines added to a file since the last read.
+
+        Args:
+            path (Path): The file.
+
+        Returns:
+            list[str]: The new lines.
+        """
+
+        try:
+            with open(path, 'rb') as fp:
+                if fp.seek(0, 2) < self.offset:
+                    # The file was truncated, so start again from the beginning.
+                    self.offset, self.partial = 0, b''
+                fp.seek(self.offset)
+                data = fp.read(MAX_READ_BYTES)
+        except FileNotFoundError:
+            return []
+
+        self.offset += len(data)
+        *lines, self.partial = (self.partial + data).split(b'\n')
+        return [i.decode('utf8', 'replace').rstrip('\r') for i in lines]
+
+    def read(self) -> list[str]:
+        """
+        Read the lines logged since the last read. The first read only finds where the log ends,
+        so old lines are not relayed when the bot starts.
+
+        Returns:
+            list[str]: The new lines.
+        """
+
+        latest = self.latest()
+        if self.path is None:
+            if latest is not None:
+                self.path, self.offset = latest, latest.stat().st_size
+            return []
+
+        lines = []
+        if latest != self.path and latest is not None:
+            # Finish the old file before moving on to the new one.
+            lines += self.read_from(self.path)
+            self.path, self.offset, self.partial = latest, 0, b''
+
+        return lines + self.read_from(self.path)
+
+
+class Bridge:
+    """
+    Relays events from every world's log into a Discord channel, in batches.
+    """
+
+    def __init__(
+        self,
+        worlds: list[World],
+        send: Callable[[str], Awaitable[None]],
+        window: float = 2.0,
+    ) -> None:
+        """
+        Args:
+            worlds (list[World]): The worlds to relay events from.
+            send (Callable[[str], Awaitable[None]]): Sends a message to the Discord channel.
+            window (float): How many seconds to collect events for before sending them.
+        """
+
+        self.tails = [LogTail(i) for i in worlds]
+        self.send = send
+        self.window = window
+        self.pending: list[Event] = []
+        self.pending_since = 0.0
+        self.show_world = len(worlds) > 1
+
+    async def tick(self) -> None:
+        """
+        Read any new log lines, and send the pending events once they have waited for the window.
+        This is meant to be run every second or so.
+        """
+
+        for tail in self.tails:
+            for line in await asyncio.to_thread(tail.read):
+                if event := parse(tail.world.name, line):
+                    if not self.pending:
+                        self.pending_since = time.monotonic()
+                    self.pending.append(event)
+                    EVENTS.inc(world=event.world, kind=event.kind)
+
+        if self.pending and time.monotonic() - self.pending_since >= self.window:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """
+        Send every pending event, in as few messages as possible.
+        """
+
+        events, self.pending = self.pending, []
+        lines = [f'[{i.world}] {i}' if self.show_world else str(i) for i in events]
+
+        messages = ['']
+        for line in lines:
+            line = line[:MAX_MESSAGE_LENGTH]
+            if len(messages[-1]) + len(line) + 1 > MAX_MESSAGE_LENGTH:
+                messages.append('')
+            messages[-1] += ('\n' if messages[-1] else '') + line
+
+        for text in messages:
+            try:
+                await self.send(text)
+                MESSAGES.inc(outcome='success')
+            except discord.DiscordException as e:
+                MESSAGES.inc(outcome='failure')
+                log.warning('Failed to relay %d events: %s', len(events), e)
+                return
+
+        now = time.time()
+        for event in events:
+            LATENCY_SECONDS.observe(max(0.0, now - event.logged))
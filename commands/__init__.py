@@ -2,31 +2,114 @@
 This module initializes the command system for the bot.
 It registers commands, subcommands, and repeatable tasks,
 and provides utility functions for command handling.
+
+Command modules are not imported up front. Their `@command` decorators are read from the
+source instead, which is enough for `!help`, and each module is imported the first time
+one of its commands is used.
 """
 
-__all__ = ['get', 'all', 'command', 'Command', 'subcommand',
-           'repeat', 'bad_cmd', 'bad_subcmd', 'Message', 'mc_command', 'db']
+__all__ = ['get', 'all', 'loaded', 'load_all', 'command', 'Command', 'subcommand',
+           'repeat', 'bad_cmd', 'bad_subcmd', 'Message', 'mc_command', 'db', 'options', 'secrets',
+           'worlds', 'select_world', 'bad_world']
 
 import argparse
-import subprocess
+import ast
+import functools
+import importlib
+import json
+import logging
+import os
+import sys
+import time
 from pathlib import Path
-from typing import Callable
+from typing import Any, Callable
 
 from discord import Message
 from pymongo import MongoClient
 from pymongo.database import Database
 
+import logger
+import metrics
+from worlds import World, load as load_worlds
+
 commands = {}
 temp_subcommands = {}
 temp_repeatables = {}
 valid_choices = ['minecraft', 'music']
 
+# Called with each command as its module is imported, e.g. to start its repeating tasks.
+load_hooks: list[Callable[['Command'], None]] = []
+
+# Called when a command changes markers directly, with which dimensions changed, so the map files are rewritten.
+marker_hooks: list[Callable[[dict[str, bool]], None]] = []
+
+# How long each command module took to import, in seconds.
+import_times: dict[str, float] = {}
+
+log = logging.getLogger(__name__)
+
+IMPORT_SECONDS = metrics.Gauge('bot_command_import_seconds', 'Time taken to import each command module.', ('module',))
+
 ARGS = argparse.ArgumentParser()
 ARGS.add_argument('-f', '--features', nargs='+', type=str,
                   default=valid_choices, choices=valid_choices)
-features = ARGS.parse_args().features
+ARGS.add_argument('--metrics-port', type=int, default=9108,
+                  help='Port to serve metrics on, or 0 to disable.')
+ARGS.add_argument('--stall-threshold', type=float, default=250,
+                  help='Milliseconds the event loop may block before it is reported as stalled.')
+ARGS.add_argument('--log-level', nargs='+', type=str, default=['INFO'],
+                  help='Log level, and/or per-module levels like commands.music=DEBUG.')
+ARGS.add_argument('--marker-port', type=int, default=0,
+                  help='Port to serve map markers on over HTTP, or 0 to disable.')
+ARGS.add_argument('--marker-format', choices=['compact', 'full'], default='compact',
+                  help='Write map markers compactly with a loader, or in the full format Unmined reads directly.')
+ARGS.add_argument('--no-marker-files', action='store_true',
+                  help='Do not write map markers to files, e.g. when they are served over HTTP instead.')
+ARGS.add_argument('--chat-bridge', action='store_true',
+                  help='Relay chat and players joining or leaving from the server logs into the games channel.')
+ARGS.add_argument('--record-events', type=str, default=None, metavar='PATH',
+                  help='Record incoming messages and reactions to a JSON Lines file, for bench.replay.')
+
+# The secrets file can be moved with an environment variable, e.g. to run the benchmarks.
+secrets_path = Path(os.environ.get('MC_BOT_SECRETS', Path(__file__).parent.parent / 'secrets.json'))
+
+# The connection is made in the background on first use, not when the bot starts.
+db = MongoClient(connect=False, event_listeners=[metrics.MongoListener()]).flatearth
+
+
+@functools.cache
+def options() -> argparse.Namespace:
+    """
+    Get the command line options. They are parsed the first time this is called.
+
+    Returns:
+        argparse.Namespace: The parsed options.
+    """
+    return ARGS.parse_args()
+
+
+@functools.cache
+def secrets() -> dict[str, Any]:
+    """
+    Get the contents of the secrets file. It is read the first time this is called.
+
+    Returns:
+        dict[str, Any]: The parsed secrets file.
+    """
 
-db = MongoClient().flatearth
+    with open(secrets_path, 'r', encoding='utf8') as fp:
+        return json.load(fp)
+
+
+@functools.cache
+def worlds() -> dict[str, World]:
+    """
+    Get the configured Minecraft worlds. The first one is the default.
+
+    Returns:
+        dict[str, World]: The worlds, by name.
+    """
+    return load_worlds(secrets().get('worlds'))
 
 
 class Command:
@@ -49,14 +132,32 @@ class Command:
     def __str__(self) -> str:
         return f'!{self.id}'
 
-    def log(self, msg: str) -> None:
+    def log(self, msg: str, **fields: Any) -> None:
         """
-        Log a message to the console, flushing the output immediately.
+        Log a message from this command.
+        The message is tagged with the command, user and channel that it was run from.
 
         Args:
             msg (str): The message to log.
+            **fields: Any extra fields to include in the log entry.
+                Fields named after a log record attribute, e.g. `name`, are prefixed with `field_`.
+        """
+
+        # Logging refuses extra fields that would overwrite a record attribute.
+        extra = {f'field_{k}' if k in logger.RECORD_FIELDS else k: v for k, v in fields.items()}
+        logging.getLogger(type(self).__module__).info(msg, extra=extra)
+
+    def stats(self) -> dict[str, Any]:
         """
-        print(msg, flush=True)
+        Report any runtime statistics for this command, e.g. for the `!stats` command.
+
+        This method can be overridden by subclasses that hold on to resources.
+
+        Returns:
+            dict[str, Any]: A mapping of statistic names to their values.
+        """
+
+        return {}
 
     async def default(self, message: Message, cmd: list[str]) -> str | None:
         """
@@ -105,7 +206,18 @@ class Command:
             method = self.default
             self.sub = 'NO SUB'
 
-        return await method(**params)
+        token = logger.set_context(
+            command=self.id,
+            subcommand=self.sub,
+            user=str(message.author),
+            user_id=message.author.id,
+            channel=getattr(message.channel, 'name', None) or 'DM',
+        )
+        try:
+            with metrics.COMMAND_SECONDS.time(command=self.id, subcommand=self.sub):
+                return await method(**params)
+        finally:
+            logger.CONTEXT.reset(token)
 
 
 def command(
@@ -126,7 +238,7 @@ def command(
         Callable: A decorator that wraps the command class.
     """
 
-    if feature and feature not in features:
+    if feature and feature not in options().features:
         def dummy(object: Command) -> None:
             return None
         return dummy
@@ -150,18 +262,38 @@ def command(
     return wrapper
 
 
-def subcommand(func: Callable) -> Callable:
+def subcommand(func: Callable | str) -> Callable:
     """
     Decorator to register a function as a subcommand of a command.
+    The subcommand is named after the function, unless a name is given, e.g. `@subcommand('import')`
+    for a subcommand whose name is a keyword.
 
     Args:
-        func (Callable): The function to register as a subcommand.
+        func (Callable | str): The function to register as a subcommand, or the name to register it under.
 
     Returns:
-        Callable: The original function, now registered as a subcommand.
+        Callable: The original function, now registered as a subcommand,
+            or a decorator that registers a function under the given name.
     """
 
-    temp_subcommands[func.__name__] = func
+    if isinstance(func, str):
+        return functools.partial(register_subcommand, func)
+    return register_subcommand(func.__name__, func)
+
+
+def register_subcommand(name: str, func: Callable) -> Callable:
+    """
+    Register a function as a subcommand of the command that is being defined.
+
+    Args:
+        name (str): The name of the subcommand.
+        func (Callable): The function to register.
+
+    Returns:
+        Callable: The original function.
+    """
+
+    temp_subcommands[name] = func
     return func
 
 
@@ -211,26 +343,156 @@ def bad_subcmd(subcmd: str) -> str:
     return f'ERROR: Invalid subcommand "{subcmd}".'
 
 
-def mc_command(text: str) -> None:
+def bad_world() -> str:
+    """
+    Generate an error message for an unknown world.
+
+    Returns:
+        str: An error message listing the valid worlds.
+    """
+
+    return 'ERROR: Unknown world. Valid worlds are ' + ', '.join(f'`{i}`' for i in worlds()) + '.'
+
+
+def select_world(cmd: list[str], first_only: bool = False) -> tuple[World | None, list[str]]:
+    """
+    Take an optional `world:{name}` selector out of a command's arguments.
+    World names are not case sensitive.
+
+    Args:
+        cmd (list[str]): The command arguments.
+        first_only (bool): Only look for the selector in the first argument,
+            for commands whose other arguments are free text.
+
+    Returns:
+        tuple[World | None, list[str]]: The selected world, or the default world if none was given,
+            or None if the name is unknown; and the arguments without the selector.
+    """
+
+    world = next(iter(worlds().values()))
+    rest = []
+    for index, i in enumerate(cmd):
+        if i.lower().startswith('world:') and (index == 0 or not first_only):
+            name = i[6:].lower()
+            world = next((val for key, val in worlds().items() if key.lower() == name), None)
+        else:
+            rest.append(i)
+
+    return world, rest
+
+
+def mc_command(text: str, world: World | None = None) -> None:
     """
-    Send a command to the Minecraft server running in a screen session.
+    Send a command to a Minecraft server running in a screen session.
 
     Args:
         text (str): The command to send to the Minecraft server.
+        world (World | None): The world to send it to. Defaults to the default world.
     """
 
-    subprocess.run(
-        [
-            'screen', '-r', 'flatearth', '-p', '0', '-X', 'stuff',
-            text.replace('\\', '\\\\').replace('$', '\\$') + '\\n'
-        ],
-        check=False
-    )
+    (world or next(iter(worlds().values()))).command(text)
+
+
+class CommandInfo:
+    """
+    What is known about a command before its module has been imported.
+    """
+
+    __slots__ = ('id', 'desc', 'feature', 'admin_only', 'module')
+
+    def __init__(self, name: str, description: str, feature: str | None = None, *,
+                 admin_only: bool = False, module: str = '') -> None:
+        self.id = name
+        self.desc = description
+        self.feature = feature
+        self.admin_only = admin_only
+        self.module = module
+
+    def __str__(self) -> str:
+        return f'!{self.id}'
+
+
+def literal(node: ast.expr) -> Any:
+    """
+    Evaluate a decorator argument, allowing for strings split with `+`.
+
+    Args:
+        node (ast.expr): The argument.
+
+    Returns:
+        Any: Its value.
+    """
+
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+        return literal(node.left) + literal(node.right)
+    return ast.literal_eval(node)
+
+
+@functools.cache
+def discover() -> dict[str, CommandInfo]:
+    """
+    Find every command in the 'commands' directory by reading the `@command` decorators,
+    without importing the modules. Commands for disabled features are left out.
+    The directory is only read the first time this is called.
+
+    Returns:
+        dict[str, CommandInfo]: The commands, by name.
+    """
+
+    found = {}
+    for path in sorted(Path(__file__).parent.glob('*.py')):
+        if path.name == '__init__.py':
+            continue
+
+        for node in ast.parse(path.read_text(encoding='utf8')).body:
+            if not isinstance(node, ast.ClassDef):
+                continue
+
+            for decorator in node.decorator_list:
+                if (
+                    isinstance(decorator, ast.Call) and
+                    isinstance(decorator.func, ast.Name) and
+                    decorator.func.id == 'command'
+                ):
+                    info = CommandInfo(
+                        *[literal(i) for i in decorator.args],
+                        **{i.arg: literal(i.value) for i in decorator.keywords if i.arg},
+                        module=f'commands.{path.stem}',
+                    )
+                    if not info.feature or info.feature in options().features:
+                        found[info.id] = info
+
+    return found
+
+
+def load(module: str) -> None:
+    """
+    Import a command module, registering its commands, and record how long the import took.
+
+    Args:
+        module (str): The name of the module, e.g. `commands.music`.
+    """
+
+    if module in sys.modules:
+        return
+
+    before = set(commands)
+    start = time.perf_counter()
+    importlib.import_module(module)
+    elapsed = time.perf_counter() - start
+
+    import_times[module] = elapsed
+    IMPORT_SECONDS.set(elapsed, module=module)
+    log.info('Imported %s in %.1f ms', module, elapsed * 1000, extra={'command_module': module, 'seconds': elapsed})
+
+    for name in set(commands) - before:
+        for hook in load_hooks:
+            hook(commands[name])
 
 
 def get(name: str) -> Command | None:
     """
-    Retrieve a command by its name.
+    Retrieve a command by its name, importing its module if this is the first time it is used.
 
     Args:
         name (str): The name of the command to retrieve.
@@ -238,24 +500,38 @@ def get(name: str) -> Command | None:
     Returns:
         Command | None: The command object if found, otherwise None.
     """
+
+    if name not in commands and (info := discover().get(name)):
+        load(info.module)
     return commands.get(name)
 
 
-def all() -> dict[str, Command]:
+def all() -> dict[str, CommandInfo]:
+    """
+    Retrieve all available commands, whether or not their modules have been imported.
+
+    Returns:
+        dict[str, CommandInfo]: A dictionary of all commands,
+            where keys are command names and values are their names, descriptions, etc.
+    """
+    return discover()
+
+
+def loaded() -> dict[str, Command]:
     """
-    Retrieve all registered commands.
+    Retrieve the commands whose modules have been imported.
 
     Returns:
-        dict[str, Command]: A dictionary of all commands,
+        dict[str, Command]: A dictionary of loaded commands,
             where keys are command names and values are Command objects.
     """
     return commands
 
 
-# Dynamically import and register all commands in the 'commands' directory.
-for i in [
-    f.name[:-3]
-    for f in Path(__file__).parent.iterdir()
-    if f.name != '__init__.py' and not f.is_dir()
-]:
-    __import__(f'commands.{i}')
+def load_all() -> None:
+    """
+    Import every command module now, rather than when each command is first used.
+    """
+
+    for module in sorted({i.module for i in discover().values()}):
+        load(module)
@@ -4,9 +4,12 @@ This command allows users to set, remove, and show their aliases,
 which are the usernames that players see when they send messages to the server.
 """
 
+import asyncio
+
 from discord import Message
 
-from commands import Command, command, subcommand
+from aliases import ALIASES
+from commands import Command, bad_subcmd, command, subcommand
 
 
 @command('alias', (
@@ -33,19 +36,7 @@ class AliasCmd(Command):
                 False if another user already has that alias.
         """
 
-        if user := self.db.users.find_one({'alias': alias}):
-            if user.get('user_id') == user_id:
-                self.db.users.update_one({'user_id': user_id}, {
-                                         '$set': {'alias': alias}})
-                return True
-
-            return False
-
-        self.db.users.insert_one({
-            'user_id': user_id,
-            'alias': alias,
-        })
-        return True
+        return ALIASES.set(user_id, alias)
 
     def delete_alias(self, user_id: int) -> bool:
         """
@@ -59,11 +50,7 @@ class AliasCmd(Command):
                 False if no alias was found for the user.
         """
 
-        if not self.db.users.find_one({'user_id': user_id}):
-            return False
-
-        self.db.users.delete_one({'user_id': user_id})
-        return True
+        return ALIASES.remove(user_id)
 
     def get_alias(self, user_id: int) -> str | None:
         """
@@ -76,13 +63,11 @@ class AliasCmd(Command):
             str | None: The alias of the user if it exists, otherwise None.
         """
 
-        if data := self.db.users.find_one({'user_id': user_id}):
-            return data.get('alias')
-        return None
+        return ALIASES.get(user_id)
 
     async def default(self, message: Message, cmd: list[str]) -> str:
         if len(cmd) > 0:
-            if self.set_alias(message.author.id, cmd[1]):
+            if self.set_alias(message.author.id, ' '.join(cmd)):
                 return 'Alias has been updated.'
 
             return 'Failed to set alias: a different person is already using that name.'
@@ -111,6 +96,9 @@ class AliasCmd(Command):
             f'* `{self} remove`: Remove your alias, setting username to match your discord name.',
             f'* `{self} show`: Show your current alias.',
             f'* `{self} {{anything else}}`: Sets your alias to the chosen name.',
+            *([
+                f'* `{self} cleanup`: Remove duplicate aliases left by older versions of the bot.',
+            ] if self.user_is_admin else []),
         ])
 
     @subcommand
@@ -148,3 +136,30 @@ class AliasCmd(Command):
             return f'Current alias: {alias}'
 
         return 'No alias was found.'
+
+    @subcommand
+    async def cleanup(self, message: Message, cmd: list[str]) -> str:
+        """
+        Remove duplicate aliases left by older versions of the bot, so aliases can be kept unique.
+        This command can only be used by users with admin privileges.
+
+        Args:
+            message (Message): The Discord message object.
+            cmd (list[str]): The command arguments.
+
+        Returns:
+            str: A message saying what was removed.
+        """
+
+        if not self.user_is_admin:
+            return bad_subcmd('cleanup')
+
+        removed, lost = await asyncio.to_thread(ALIASES.deduplicate)
+        response = f'Removed {removed} duplicate alias document{"s" if removed != 1 else ""}.'
+        if lost:
+            response += '\nThese users lost an alias that someone else claimed first:'
+            response += ''.join(f'\n> User `{user_id}`: `{alias}`' for user_id, alias in lost.items())
+        if not ALIASES.unique:
+            response += '\nERROR: Aliases still could not be made unique. See the log for details.'
+
+        return response
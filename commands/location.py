@@ -2,16 +2,24 @@
 Command to view and edit points of interest in the Flat Earth.
 """
 
+import asyncio
 import re
 from datetime import datetime
 from math import ceil
+from typing import Any
 
+import discord
 from discord import Message
+from pymongo.errors import PyMongoError
 
-from commands import Command, bad_subcmd, command, subcommand
+import pois
+from commands import Command, bad_subcmd, command, marker_hooks, subcommand
 
 MAX_POI = 10
 
+# How many skipped rows of an import to describe.
+MAX_IMPORT_ERRORS = 10
+
 
 @command('location', 'View or edit points of interest in the Flat Earth.', 'minecraft')
 class LocationCmd(Command):
@@ -96,15 +104,16 @@ class LocationCmd(Command):
 
         return emojis
 
-    def update_message_emojis(self, id: int, emojis: list[str]) -> None:
+    def update_message_emojis(self, id: Any, emojis: list[str]) -> None:
         """
         Update the emojis for a message with the given ID.
+        Imported points of interest have no Discord message, so messages are found by their database ID.
 
         Args:
-            id (int): The ID of the message to update.
+            id (Any): The database ID (`_id`) of the message to update.
             emojis (list[str]): A list of emojis to set for the message.
         """
-        self.db.messages.update_one({'message_id': id}, {'$set': {
+        self.db.messages.update_one({'_id': id}, {'$set': {
             'emojis': emojis,
             'updated': True,
             'last_updated': datetime.utcnow(),
@@ -122,6 +131,17 @@ class LocationCmd(Command):
                     f'* `{self} delete {{location name}}`: Delete a point of interest. ' +
                     'The name is not case sensitive.'
                 ),
+                (
+                    f'* `{self} export {{format}}`: Download every point of interest as a compressed file. ' +
+                    f'The format is one of {", ".join(f"`{i}`" for i in pois.FORMATS)}, and defaults to `csv`.'
+                ),
+                *([
+                    (
+                        f'* `{self} import`: Import points of interest from an attached CSV or JSON file, ' +
+                        f'e.g. one from `{self} export`. Rows need `label`, `x` and `z`, and can have ' +
+                        '`y` and `dimensions` (separated by `;`).'
+                    ),
+                ] if self.user_is_admin else []),
                 (
                     'To add a new point of interest, ' +
                     'type a description of the location along with the coordinates, ' +
@@ -143,6 +163,62 @@ class LocationCmd(Command):
 
         return bad_subcmd(cmd[0])
 
+    # `import` is a keyword, so it can't be the name of the method.
+    @subcommand('import')
+    async def import_pois(self, message: Message, cmd: list[str]) -> str:
+        """
+        Import points of interest from a file attached to the message.
+        This command can only be used by users with admin privileges.
+
+        Args:
+            message (Message): The Discord message object, with the file attached.
+            cmd (list[str]): The command arguments, which are not used.
+
+        Returns:
+            str: A message saying how many points of interest were imported, and which rows were skipped.
+        """
+
+        if not self.user_is_admin:
+            return bad_subcmd('import')
+
+        if len(message.attachments) != 1:
+            return 'ERROR: Please attach one CSV or JSON file of points of interest.'
+
+        attachment = message.attachments[0]
+        if attachment.size > pois.MAX_IMPORT_BYTES:
+            return f'ERROR: The file is too large. Files can be up to {pois.MAX_IMPORT_BYTES // 1024 ** 2} MB.'
+
+        data = await attachment.read()
+        try:
+            rows = await asyncio.to_thread(pois.read, data, attachment.filename)
+        except ValueError as e:
+            return f'ERROR: {e}'
+
+        try:
+            count, merged, errors = await asyncio.to_thread(pois.insert, self.db, rows, message.author.id)
+        except PyMongoError as e:
+            return f'ERROR: The import stopped partway through, so only some points of interest were imported: {e}'
+        finally:
+            # Rewrite the map once, now that every marker is in place (or as many as were written).
+            for hook in marker_hooks:
+                hook({i: True for i in pois.DIMENSIONS})
+
+        self.log(f'Imported {count} points of interest from {attachment.filename}, skipped {len(errors)} rows')
+
+        response = f'Imported {count} point{"s" if count != 1 else ""} of interest.'
+        if merged:
+            response += (
+                f'\n{merged} row{"s were" if merged != 1 else " was"} at the same position as an earlier row, ' +
+                'and replaced it.'
+            )
+        if errors:
+            response += f'\nSkipped {len(errors)} invalid row{"s" if len(errors) != 1 else ""}:'
+            response += ''.join(f'\n> {i}' for i in errors[:MAX_IMPORT_ERRORS])
+            if len(errors) > MAX_IMPORT_ERRORS:
+                response += f'\n> ...and {len(errors) - MAX_IMPORT_ERRORS} more.'
+
+        return response
+
     @subcommand
     async def count(self, message: Message, cmd: list[str]) -> str:
         """
@@ -197,9 +273,42 @@ class LocationCmd(Command):
             return 'ERROR: PoI exists but also doesnt??? Poke and prod zachy!!'
 
         self.update_message_emojis(
-            msg['message_id'], [])  # Delete all locations
+            msg['_id'], [])  # Delete all locations
         return f'Deleted `{msg["label"]}`.'
 
+    @subcommand
+    async def export(self, message: Message, cmd: list[str]) -> str | None:
+        """
+        Send every point of interest as a compressed file attachment.
+
+        Args:
+            message (Message): The Discord message object.
+            cmd (list[str]): The command arguments, where the first argument
+                is the format to export in.
+
+        Returns:
+            str | None: An error message, or None if the file was sent.
+        """
+
+        format = cmd[0].lower() if len(cmd) else 'csv'
+        if format not in pois.FORMATS:
+            return f'ERROR: Unknown format `{format}`. Valid formats are {", ".join(f"`{i}`" for i in pois.FORMATS)}.'
+
+        fp, count = await asyncio.to_thread(pois.export, self.db.messages, format)
+        with fp:
+            size = fp.seek(0, 2)
+            limit = message.guild.filesize_limit if message.guild else discord.utils.DEFAULT_FILE_SIZE_LIMIT_BYTES
+            if size > limit:
+                return f'ERROR: The export is {size / 1024 ** 2:.1f} MB, which is too large to upload.'
+
+            fp.seek(0)
+            await message.channel.send(
+                f'Exported {count} point{"s" if count != 1 else ""} of interest.',
+                file=discord.File(fp, filename=f'points_of_interest.{format}.gz'),
+            )
+
+        return None
+
     @subcommand
     async def list(self, message: Message, cmd: list[str]) -> str:
         """
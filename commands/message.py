@@ -3,18 +3,21 @@
 import json
 from typing import Any
 
-from discord import Message
+from discord import DMChannel, Message
 
-from commands import Command, command, mc_command
+from aliases import ALIASES
+from commands import Command, bad_world, command, mc_command, select_world, worlds
+from worlds import World
 
 
-def send_message_minecraft(author: str, content: str) -> None:
+def send_message_minecraft(author: str, content: str, world: World | None = None) -> None:
     """
     Send a message to the Minecraft server as if it was sent by a player.
 
     Args:
         author (str): The name of the player sending the message.
         content (str): The content of the message to be sent.
+        world (World | None): The world to send it to. Defaults to the default world.
     """
 
     # Don't send empty messages
@@ -62,7 +65,7 @@ def send_message_minecraft(author: str, content: str) -> None:
             'text': f'<{author}> {content}'
         }]
     }
-    mc_command('tellraw @a ' + json.dumps(response))
+    mc_command('tellraw @a ' + json.dumps(response), world)
 
 
 @command('say', 'Send a message to the Flat Earth.', 'minecraft')
@@ -73,37 +76,30 @@ class MessageCmd(Command):
     formatted as if they were sent by a player with an alias.
     """
 
-    def get_alias(self, user_id: int) -> str | None:
-        """
-        Get the alias for a user.
-
-        Args:
-            user_id (int): The ID of the user whose alias is to be retrieved.
-
-        Returns:
-            str | None: The alias of the user if it exists, otherwise None.
-        """
-
-        if data := self.db.users.find_one({'user_id': user_id}):
-            return data.get('alias')
-        return None
-
     async def default(self, message: Message, cmd: list[str]) -> Any:
         if len(cmd) == 0 or cmd[0] == 'help':
             return ''.join([
                 'To send a message to the Flat Earth, ',
                 'specify some text like `!say your message here`.\n',
                 'Alternatively, you can DM me and all messages ',
-                'will go directly to the Flat Earth.',
+                'will go directly to the Flat Earth.\n',
+                'To send it to another world, add `world:{name}` to the command.',
             ]), None
 
-        alias = self.get_alias(message.author.id)
-        if alias := self.get_alias(message.author.id):
-            self.log(f'Received DM from {message.author}({alias}): {message.content}')
+        # Relayed DMs are plain chat, so only an explicit `!say` can pick a world, with its first word.
+        if isinstance(message.channel, DMChannel) and message.content.lstrip()[:1] not in ('!', '/'):
+            world = next(iter(worlds().values()))
+        else:
+            world, cmd = select_world(cmd, first_only=True)
+            if world is None:
+                return bad_world()
+
+        if alias := ALIASES.get(message.author.id):
+            self.log(f'Received DM from {message.author}({alias}): {message.content}', alias=alias)
         else:
             alias = str(message.author)
             self.log(f'Received DM from {message.author}: {message.content}')
 
-        send_message_minecraft(alias, ' '.join(cmd[1::]))
+        send_message_minecraft(alias, ' '.join(cmd), world)
 
         return None, '✅'  # Don't respond to the message, just react to it.
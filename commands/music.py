@@ -6,30 +6,58 @@ and control playback within a Discord voice channel.
 """
 
 import asyncio
-import json
+import logging
+import re
+import time
+from math import ceil
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable
 
 import discord
+import requests
 from discord import Message
 
-import subsonic
-from commands import Command, command, repeat, subcommand
-
-with open(str(Path(__file__).parent.parent) + '/secrets.json', 'r', encoding='utf8') as fp:
-    data = json.load(fp)
-    SUBSONIC = subsonic.SubsonicClient(
-        host=data['subsonic']['url'],
-        username=data['subsonic']['username'],
-        password=data['subsonic']['password'],
-        client='discord'
-    )
-
-
-FFMPEG_OPTIONS = {
-    'before_options': '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5',
-    'options': '-vn',
-}
+from audio.cache import AudioCache
+from audio.library import Library, SubsonicError
+from audio.panel import NowPlayingPanel
+from audio.radio import Radio
+from audio.source import OpusSource, create_source
+from audio.store import QueueStore
+from audio.track import Track, TrackQueue
+from commands import Command, command, db, repeat, secrets, subcommand
+
+SUBSONIC_CONFIG = secrets()['subsonic']
+LIBRARY = Library(
+    host=SUBSONIC_CONFIG['url'],
+    username=SUBSONIC_CONFIG['username'],
+    password=SUBSONIC_CONFIG['password'],
+    client='discord',
+    pool_size=int(SUBSONIC_CONFIG.get('pool_size', 4)),
+    connect_timeout=float(SUBSONIC_CONFIG.get('connect_timeout', 3.05)),
+    read_timeout=float(SUBSONIC_CONFIG.get('read_timeout', 10)),
+)
+CACHE_CONFIG = SUBSONIC_CONFIG.get('cache', {})
+IDLE_TIMEOUT = float(SUBSONIC_CONFIG.get('idle_timeout', 300))
+
+
+QUEUE_PAGE_SIZE = 10
+RESOLVE_AHEAD = 2
+VOLUME = 0.25
+MAX_VOLUME_PERCENT = 200
+POSITION_SAVE_INTERVAL = 15
+PANEL_EDIT_INTERVAL = 10
+# How long to keep a replaced source running, so the audio thread has finished reading from it.
+SOURCE_CLEANUP_DELAY = 0.2
+
+CACHE = AudioCache(
+    Path(CACHE_CONFIG.get('path', str(Path(__file__).parent.parent / 'cache' / 'music'))),
+    int(CACHE_CONFIG.get('max_bytes', 2 * 1024 ** 3)),
+    VOLUME,
+)
+
+STORE = QueueStore(db.music_queues)
+
+log = logging.getLogger(__name__)
 
 
 class Player:
@@ -37,63 +65,154 @@ class Player:
         self.client: discord.VoiceClient | None = None
         self.channel = channel
         self.name = channel.name
-        self.queue: list[dict[str, Any]] = []
+        self.queue = TrackQueue()
         self.stopped = True
+        self.volume = VOLUME
+        self.volume_changed = False
+        self.resume_at = 0.0
+        self.position_saved = time.monotonic()
+        self.lock = asyncio.Lock()
+        self.panel = NowPlayingPanel(self, PANEL_EDIT_INTERVAL)
+        self.idle_since: float | None = None
+        self.radio: Radio | None = None
+
+    def restore(self) -> None:
+        tracks, self.resume_at = STORE.load(self.channel.id)
+        self.queue.extend(tracks)
+
+    def add_songs(self, tracks: Iterable[Track]) -> None:
+        tracks = list(tracks)
+        self.queue.extend(tracks)
+        STORE.append(self.channel.id, tracks)
+
+    def pop_song(self) -> None:
+        self.queue.popleft()
+        self.resume_at = 0.0
+        STORE.pop(self.channel.id)
+
+    def save_queue(self) -> None:
+        STORE.replace(self.channel.id, self.queue)
+
+    def position(self) -> float:
+        if self.client and isinstance(self.client.source, OpusSource):
+            return self.client.source.position
+        return self.resume_at
+
+    def save_position(self, force: bool = False) -> None:
+        if not self.queue.current:
+            return
 
-    def add_song(self, url: str, title: str, artist: str | None) -> None:
-        self.queue += [{
-            'url': url,
-            'title': title,
-            'artist': artist,
-            'playing': False,
-        }]
+        now = time.monotonic()
+        if force or now - self.position_saved >= POSITION_SAVE_INTERVAL:
+            self.position_saved = now
+            STORE.set_position(self.channel.id, self.position())
 
     async def require_client(self) -> discord.VoiceClient | None:
         if not self.client or not self.client.is_connected():
+            # Discord only allows one voice connection per guild.
             for player in PLAYERS.values():
-                if player.client and player.client.is_connected():
-                    await self.channel.send('**ERROR**: Already connected to a voice channel.')
+                if (
+                    player is not self and
+                    player.channel.guild.id == self.channel.guild.id and
+                    player.client and player.client.is_connected()
+                ):
+                    await self.channel.send('**ERROR**: Already connected to a voice channel in this server.')
                     return
 
             try:
                 self.client = await self.channel.connect(self_deaf=True)
             except (asyncio.TimeoutError, discord.ClientException, discord.opus.OpusNotLoaded) as e:
-                print(f'ERROR: {e}', flush=True)
+                log.error('Failed to connect to %s: %s', self.name, e, extra={'channel': self.name})
                 await self.channel.send(f'**ERROR**: {e}')
                 return None
 
         return self.client
 
-    async def play_next_song(self) -> None:
-        # If the current song was in progress but no longer is,
-        # Remove it and play the next one
-        if len(self.queue) > 0 and self.queue[0]['playing'] == True:
-            self.queue.pop(0)
+    async def play_next_song(self, skipping: Track | None) -> None:
+        # Commands and the queue check can both try to advance the same player.
+        async with self.lock:
+            # Only advance past the track the caller saw, in case another caller already has.
+            if self.queue.current is not skipping:
+                return
 
-        if len(self.queue) == 0:
-            return
+            # If the current song was in progress but no longer is,
+            # Remove it and play the next one
+            if len(self.queue) > 0 and self.queue[0].playing:
+                self.pop_song()
+
+            if len(self.queue) == 0 and self.radio and (track := self.radio.take()):
+                self.add_songs([track])
+
+            if len(self.queue) == 0:
+                await self.panel.close('Finished playing the queue.')
+                return
+
+            if not (client := await self.require_client()):
+                return
+
+            self.queue.resolve(RESOLVE_AHEAD, LIBRARY.stream_url)
+            item = self.queue[0]
+            item.playing = True
+            if self.radio:
+                self.radio.remember(item)
+
+            client.stop()
+            client.play(self.open_source(item, self.resume_at))
+            self.resume_at = 0.0
 
-        if not (client := await self.require_client()):
+        await self.panel.update()
+
+    def open_source(self, track: Track, start: float = 0.0) -> OpusSource:
+        self.volume_changed = False
+
+        # Cached tracks already have the default volume applied,
+        # so they only need re-encoding if the volume has been changed.
+        if path := CACHE.get(track.id):
+            return create_source(str(path), self.volume / VOLUME, start, local=True)
+
+        if start == 0:
+            CACHE.fill_later(track.id, track.url)
+
+        return create_source(track.url, self.volume, start)
+
+    def set_volume(self, volume: float) -> None:
+        self.volume = volume
+
+        # Replacing the source would resume playback, so wait until the player is resumed.
+        if self.is_paused():
+            self.volume_changed = True
             return
 
-        item = self.queue[0]
-        item['playing'] = True
+        self.reopen_source()
 
-        client.stop()
+    def reopen_source(self) -> None:
+        # Restart the current track at the same position with the new volume.
+        if not self.client or not (track := self.queue.current):
+            return
+
+        old_source = self.client.source
+        if not isinstance(old_source, OpusSource):
+            return
 
-        client.play(discord.FFmpegPCMAudio(item['url'], **FFMPEG_OPTIONS))  # type: ignore
-        if client.source is not None:
-            client.source = discord.PCMVolumeTransformer(client.source, volume=0.25)
+        self.client.source = self.open_source(track, old_source.position)
 
-        await self.channel.send(f'Playing **{item["title"]}** by *{item["artist"]}*')
+        # The audio thread reads the source without a lock, so it may still be reading the old one.
+        # Killing its ffmpeg now would end the read early, which the player takes as the end of the song.
+        try:
+            asyncio.get_running_loop().call_later(SOURCE_CLEANUP_DELAY, old_source.cleanup)
+        except RuntimeError:
+            old_source.cleanup()
 
     async def play(self) -> None:
         if self.is_paused():
             if not (client := await self.require_client()):
                 return
+            if self.volume_changed:
+                self.reopen_source()
             client.resume()
+            await self.panel.update()
         if not self.is_playing():
-            await self.play_next_song()
+            await self.play_next_song(self.queue.current)
 
     def is_playing(self) -> bool:
         if self.client:
@@ -105,6 +224,8 @@ class Player:
             return
 
         self.client.pause()
+        self.save_position(force=True)
+        await self.panel.update()
 
     def is_paused(self) -> bool:
         if self.client:
@@ -112,31 +233,100 @@ class Player:
         return False
 
     async def next(self) -> None:
-        await self.play_next_song()
+        await self.play_next_song(self.queue.current)
 
     async def stop(self) -> None:
         if self.is_paused() or self.is_playing():
             # Remove the current song from the queue.
             if len(self.queue) > 0:
-                self.queue.pop(0)
+                self.pop_song()
 
         # Stop the player and disconnect
+        self.set_radio(None)
+        await self.release('Playback stopped.')
+
+    def set_radio(self, radio: Radio | None) -> None:
+        if self.radio:
+            self.radio.stop()
+        self.radio = radio
+
+    async def disconnect(self) -> None:
+        # Keep the current song at the head of the queue, so it resumes where it left off.
+        if track := self.queue.current:
+            self.save_position(force=True)
+            self.resume_at = self.position()
+            track.playing = False
+
+        await self.release('Disconnected after being idle.')
+
+    async def release(self, text: str) -> None:
+        # Stopping the voice client also cleans up the source, which kills ffmpeg.
         if self.client:
             self.client.stop()
-            await self.client.disconnect()
+            await self.client.disconnect(force=True)
             self.client = None
 
+        self.idle_since = None
+        await self.panel.close(text)
+        self.evict()
+
+    def evict(self) -> None:
+        # Players with nothing left to play don't need to be kept around.
+        if len(self.queue) == 0 and PLAYERS.get(self.channel.id) is self:
+            del PLAYERS[self.channel.id]
+
     def is_stopped(self) -> bool:
-        return self.client is not None
+        return self.client is None
+
+    def has_listeners(self) -> bool:
+        return any(not i.bot for i in self.channel.members)
+
+    def is_idle(self) -> bool:
+        return not self.is_playing() or not self.has_listeners()
+
+    async def tick(self) -> None:
+        if not self.client:
+            self.evict()
+            return
+
+        # The voice connection was lost, so let go of it instead of retrying every tick.
+        if not self.client.is_connected():
+            await self.disconnect()
+            return
+
+        if self.is_playing():
+            self.save_position()
 
+        # Keep radio candidates ready before the queue runs out.
+        if self.radio and self.queue.upcoming_count() == 0:
+            self.radio.refill_later()
 
-PLAYERS: dict[str, Player] = {}
+        await self.panel.tick()
+
+        if not self.is_idle():
+            self.idle_since = None
+        elif self.idle_since is None:
+            self.idle_since = time.monotonic()
+        elif time.monotonic() - self.idle_since >= IDLE_TIMEOUT:
+            await self.disconnect()
+            return
+
+        if self.is_paused() or self.is_stopped():
+            return
+
+        await self.play()
+
+
+PLAYERS: dict[int, Player] = {}
 
 
 def get_player(channel: discord.channel.VocalGuildChannel) -> Player:
-    if channel.name not in PLAYERS:
-        PLAYERS[channel.name] = Player(channel)
-    return PLAYERS[channel.name]
+    if channel.id not in PLAYERS:
+        # Restore any queue that was saved before the bot last restarted.
+        player = Player(channel)
+        player.restore()
+        PLAYERS[channel.id] = player
+    return PLAYERS[channel.id]
 
 
 def get_channel(message: Message) -> tuple[discord.VoiceChannel | None, str | None]:
@@ -158,6 +348,22 @@ class MusicCmdPlay(Command):
     This command allows users to search for songs, albums, and manage a queue.
     """
 
+    def stats(self) -> dict[str, Any]:
+        sources = [
+            i.client.source for i in PLAYERS.values()
+            if i.client and isinstance(i.client.source, OpusSource)
+        ]
+
+        return {
+            'Music players': len(PLAYERS),
+            'Voice connections': sum(1 for i in PLAYERS.values() if i.client and i.client.is_connected()),
+            'Queued songs': sum(len(i.queue) for i in PLAYERS.values()),
+            'Playback ffmpeg processes': sum(1 for i in sources if i._process.poll() is None),  # pylint: disable=protected-access
+            'Cache ffmpeg processes': len(CACHE.pending),
+            'Cached songs': f'{len(CACHE.entries)} ({CACHE.size / 2**20:.1f} MB)',
+            **{f'Subsonic {key}': str(val) for key, val in LIBRARY.latency.items()},
+        }
+
     async def default(self, message: Message, cmd: list[str]) -> str | None:
         channel, msg = get_channel(message)
         if channel is None:
@@ -168,9 +374,6 @@ class MusicCmdPlay(Command):
         negate = [i[1::] for i in cmd if i[0] == '-']
 
         if len(query) == 0:
-            if channel.name not in PLAYERS:
-                return 'No music is currently playing in this channel. See `!play help` for usage info.'
-
             player = get_player(channel)
             if len(player.queue) == 0:
                 return 'No songs are in the queue. To add a song, append some search terms to your command, or use `!play help` for usage info.'
@@ -178,9 +381,13 @@ class MusicCmdPlay(Command):
             await player.play()
             return
 
-        results = SUBSONIC.search(' '.join(cmd))
+        try:
+            songs = await asyncio.to_thread(LIBRARY.search_songs, ' '.join(cmd))
+        except (requests.RequestException, SubsonicError) as e:
+            return f'**ERROR**: Failed to search: {e}'
+
         song = None
-        for i in results.songs:
+        for i in songs:
             if any(k.lower() in i.title.lower() for k in negate):
                 continue
 
@@ -192,7 +399,7 @@ class MusicCmdPlay(Command):
             return 'Song not found.'
 
         player = get_player(channel)
-        player.add_song(song.uri, song.title, song.artist)
+        player.add_songs([song])
         await player.play()
 
         if len(player.queue) == 1:
@@ -223,9 +430,6 @@ class MusicCmdPlay(Command):
         negate = [i[1::] for i in cmd if i[0] == '-']
 
         if len(query) == 0:
-            if channel.name not in PLAYERS:
-                return 'No music is currently playing in this channel. See `!play help` for usage info.'
-
             player = get_player(channel)
             if len(player.queue) == 0:
                 return 'No songs are in the queue. To add a song, append some search terms to your command, or use `!play help` for usage info.'
@@ -233,9 +437,13 @@ class MusicCmdPlay(Command):
             await player.play()
             return
 
-        results = SUBSONIC.search(' '.join(cmd))
+        try:
+            albums = await asyncio.to_thread(LIBRARY.search_albums, ' '.join(cmd))
+        except (requests.RequestException, SubsonicError) as e:
+            return f'**ERROR**: Failed to search: {e}'
+
         album = None
-        for i in results.albums:
+        for i in albums:
             if any([k.lower() in i.title.lower() for k in negate]):
                 continue
 
@@ -246,17 +454,101 @@ class MusicCmdPlay(Command):
         if album is None:
             return 'Album not found.'
 
+        try:
+            tracks = await asyncio.to_thread(LIBRARY.album_tracks, album.id)
+        except (requests.RequestException, SubsonicError) as e:
+            return f'**ERROR**: Failed to load album: {e}'
+
         await channel.send(
             f"Adding album **{album.title}** by *{album.artist}* " +
-            f"({len(album.songs)} songs) to the queue."
+            f"({len(tracks)} songs) to the queue."
         )
 
         player = get_player(channel)
-        for song in album.songs:
-            player.add_song(song.uri, song.title, song.artist)
+        player.add_songs(tracks)
 
         await player.play()
 
+    @subcommand
+    async def playlist(self, message: Message, cmd: list[str]) -> str | None:
+        """
+        Add an entire playlist to the music queue.
+        This command searches for a playlist by name and adds all its songs to the queue.
+
+        Args:
+            message (Message): The Discord message that triggered the command.
+            cmd (list[str]): The command arguments, where the first element is the command name.
+
+        Returns:
+            str | None: A message indicating the result of the operation, or None if successful.
+        """
+
+        channel, msg = get_channel(message)
+        if channel is None:
+            return msg
+
+        query = ' '.join([i for i in cmd if i[0] != '-'])
+        negate = [i[1::] for i in cmd if i[0] == '-']
+
+        if len(query) == 0:
+            return 'Please specify a playlist name, e.g. `!play playlist road trip`.'
+
+        try:
+            playlist = await asyncio.to_thread(LIBRARY.find_playlist, query, negate)
+            if playlist is None:
+                return 'Playlist not found.'
+
+            tracks = await asyncio.to_thread(LIBRARY.playlist_tracks, playlist['id'])
+        except (requests.RequestException, SubsonicError) as e:
+            return f'**ERROR**: Failed to load playlist: {e}'
+
+        await channel.send(
+            f"Adding playlist **{playlist.get('name')}** " +
+            f"({len(tracks)} songs) to the queue."
+        )
+
+        player = get_player(channel)
+        player.add_songs(tracks)
+
+        await player.play()
+
+    @subcommand
+    async def radio(self, message: Message, cmd: list[str]) -> str | None:
+        """
+        Turn radio mode on or off.
+        In radio mode, similar songs are played automatically once the queue runs out.
+
+        Args:
+            message (Message): The Discord message that triggered the command.
+            cmd (list[str]): The command arguments, where the first element may be `off`.
+
+        Returns:
+            str | None: A message indicating the result of the operation.
+        """
+
+        channel, msg = get_channel(message)
+        if channel is None:
+            return msg
+
+        player = get_player(channel)
+
+        if len(cmd) and cmd[0] == 'off':
+            if not player.radio:
+                return 'Radio mode is not on.'
+            player.set_radio(None)
+            return 'Radio mode is off. Playback will stop once the queue runs out.'
+
+        # Base the radio on the last song in the queue, or pick random songs if there isn't one.
+        seed = player.queue[-1].id if len(player.queue) else None
+        radio = Radio(LIBRARY, seed)
+        player.set_radio(radio)
+
+        # Only wait on the server this once, so there is something to play right away.
+        await radio.refill()
+        await player.play()
+
+        return 'Radio mode is on. Similar songs will play once the queue runs out.'
+
     @subcommand
     async def help(self, message: Message, cmd: list[str]) -> str | None:
         """
@@ -284,6 +576,9 @@ class MusicCmdPlay(Command):
             '----',
             '`!play next` skips to the next song in the queue.',
             '`!play album {album name}` adds an entire album to the queue.',
+            '`!play playlist {playlist name}` adds an entire playlist to the queue.',
+            '`!play radio` keeps playing similar songs once the queue runs out.',
+            '`!play radio off` turns radio mode back off.',
         ])
 
     @subcommand
@@ -316,25 +611,13 @@ class MusicCmdPlay(Command):
         is playing the next song in the queue if no song is currently playing.
         """
 
-        # Continue in the currently connected channel, if any
-        for player in PLAYERS.values():
-            if not player.client:
-                continue
+        # Check every player at once, so that one slow voice connection doesn't hold up the rest.
+        players = list(PLAYERS.values())
+        results = await asyncio.gather(*(i.tick() for i in players), return_exceptions=True)
 
-            if not player.client.is_connected():
-                await player.play()
-                await player.pause()
-                continue
-
-            if player.is_paused() or player.is_stopped():
-                continue
-
-            await player.play()
-
-        # Otherwise, pick the first channel
-        # for player in PLAYERS.values():
-        #     await player.play()
-        #     break
+        for player, result in zip(players, results):
+            if isinstance(result, Exception):
+                log.error('Failed to check queue for %s', player.name, exc_info=result, extra={'channel': player.name})
 
 
 @command('pause', 'Stop any music that\'s currently playing.', 'music')
@@ -373,14 +656,101 @@ class MusicCmdStop(Command):
         await player.stop()
 
 
+@command('volume', 'Show or change the music volume.', 'music')
+class MusicCmdVolume(Command):
+    """
+    Command to show or change the volume of the music player.
+    The volume is given as a percentage of the default volume.
+    """
+
+    async def default(self, message: Message, cmd: list[str]) -> str | None:
+        channel, msg = get_channel(message)
+        if channel is None:
+            return msg
+
+        player = get_player(channel)
+        percent = round(player.volume / VOLUME * 100)
+
+        if len(cmd) == 0:
+            return f'Volume is at {percent}%.'
+
+        if cmd[0] == 'help':
+            return '\n'.join([
+                'Show or change the music volume.',
+                f'* `{self}`: Show the current volume.',
+                f'* `{self} {{percent}}`: Set the volume, from 0 to {MAX_VOLUME_PERCENT}%.',
+            ])
+
+        value = cmd[0].rstrip('%')
+        if not re.match(r'^\d+$', value) or int(value) > MAX_VOLUME_PERCENT:
+            return f'ERROR: Volume must be a number from 0 to {MAX_VOLUME_PERCENT}.'
+
+        player.set_volume(VOLUME * int(value) / 100)
+        return f'Volume changed from {percent}% to {int(value)}%.'
+
+
 @command('queue', 'List all songs in the music queue.', 'music')
 class MusicCmdQueue(Command):
     """
     Command to manage the music queue.
     This command allows users to view the current music queue, see what song is currently playing,
-    and clear the queue if necessary.
+    and reorder, shuffle or clear the queue if necessary.
     """
 
+    def show_page(self, player: Player, page_number: int) -> str:
+        """
+        Format a single page of the music queue.
+
+        Args:
+            player (Player): The player whose queue should be shown.
+            page_number (int): The 1-based page number to show.
+
+        Returns:
+            str: The formatted page, including the currently playing song, if any.
+        """
+
+        response = ''
+        queue = player.queue
+        page_ct = max(1, ceil(queue.upcoming_count() / QUEUE_PAGE_SIZE))
+
+        if page_number > page_ct:
+            response += f'Invalid page number `{page_number}`, defaulting to `{page_ct}`.\n'
+            page_number = page_ct
+
+        if current := queue.current:
+            response += f'Currently Playing:\n- {current}\n'
+
+        if queue.upcoming_count():
+            response += f'Up Next, page {page_number} of {page_ct} ({queue.upcoming_count()} total):'
+            for position, track in queue.page(page_number, QUEUE_PAGE_SIZE):
+                response += f'\n{position}. {track}'
+
+        return response.strip()
+
+    def parse_positions(self, player: Player, cmd: list[str], count: int) -> list[int] | str:
+        """
+        Parse queue positions from the command arguments.
+
+        Args:
+            player (Player): The player whose queue the positions refer to.
+            cmd (list[str]): The command arguments.
+            count (int): The number of positions that are expected.
+
+        Returns:
+            list[int] | str: The parsed positions, or an error message if they are invalid.
+        """
+
+        if len(cmd) < count:
+            return f'ERROR: Expected {count} position{"s" if count != 1 else ""}. See `{self} help` for usage info.'
+
+        positions = []
+        for i in cmd[:count]:
+            if not re.match(r'^\d+$', i) or not 1 <= int(i) <= player.queue.upcoming_count():
+                return f'ERROR: Invalid queue position `{i}`.'
+            positions += [int(i)]
+
+        return positions
+
     async def default(self, message: Message, cmd: list[str]) -> str | None:
         channel, msg = get_channel(message)
         if channel is None:
@@ -391,42 +761,14 @@ class MusicCmdQueue(Command):
         if len(player.queue) == 0:
             return 'There are no songs in the queue.'
 
-        offset = 0
-        msg = []
-        if player.queue[0]['playing']:
-            offset = 1
-            msg += [
-                'Currently Playing:',
-                f'- **{player.queue[0]["title"]}** by *{player.queue[0]["artist"]}*',
-            ]
-
-        if len(player.queue) > offset:
-            msg += ['Up Next:']
-
-        maxprint = offset + 2
-        for i in range(offset, min(offset + maxprint, len(player.queue))):
-            msg += [f'{i - offset + 1}. **{player.queue[i]["title"]}** by *{player.queue[i]["artist"]}*']
-
-        if maxprint < len(player.queue):
-            msg += [f'\n(and {len(player.queue) - maxprint} more.)']
-
-        # Split up big responses into multiple messages
-        text = msg.pop(0)
-        for i in msg:
-            if len(text + '\n' + i) > 2000:
-                await message.channel.send(text)
-                text = i
-            else:
-                text += '\n' + i
-
-        return text
+        return self.show_page(player, 1)
 
     @subcommand
     async def help(self, message: Message, cmd: list[str]) -> str:
         """
         Display help information for the queue command.
         This method provides usage instructions for the queue command, including
-        how to view the queue and clear it.
+        how to view, reorder and clear the queue.
 
         Args:
             message (Message): The Discord message that triggered the command.
@@ -438,10 +780,122 @@ class MusicCmdQueue(Command):
 
         return '\n'.join([
             'View and edit the music queue.',
-            '`!queue` lists all songs in the queue and what\'s playing, if anything.',
+            '`!queue` lists the first page of songs in the queue and what\'s playing, if anything.',
+            '`!queue page {page}` lists the given page of songs in the queue.',
+            '`!queue remove {position}` removes the song at the given position from the queue.',
+            '`!queue move {from} {to}` moves a song to a different position in the queue.',
+            '`!queue shuffle` shuffles all upcoming songs.',
             '`!queue clear` removes all songs from the queue, except what\'s currently playing.',
         ])
 
+    @subcommand
+    async def page(self, message: Message, cmd: list[str]) -> str | None:
+        """
+        List a single page of the music queue.
+
+        Args:
+            message (Message): The Discord message that triggered the command.
+            cmd (list[str]): The command arguments, where the first element is the page number.
+
+        Returns:
+            str | None: The requested page of the queue.
+        """
+
+        channel, msg = get_channel(message)
+        if channel is None:
+            return msg
+
+        player = get_player(channel)
+
+        if len(player.queue) == 0:
+            return 'There are no songs in the queue.'
+
+        response = ''
+        page_number = 1
+        if len(cmd):
+            if not re.match(r'^\d+$', cmd[0]) or int(cmd[0]) < 1:
+                response += f'Invalid page number `{cmd[0]}`, defaulting to `1`.\n'
+            else:
+                page_number = int(cmd[0])
+
+        return response + self.show_page(player, page_number)
+
+    @subcommand
+    async def remove(self, message: Message, cmd: list[str]) -> str | None:
+        """
+        Remove a song from the music queue.
+
+        Args:
+            message (Message): The Discord message that triggered the command.
+            cmd (list[str]): The command arguments, where the first element is the queue position.
+
+        Returns:
+            str | None: A message indicating which song was removed, or an error message.
+        """
+
+        channel, msg = get_channel(message)
+        if channel is None:
+            return msg
+
+        player = get_player(channel)
+        positions = self.parse_positions(player, cmd, 1)
+        if isinstance(positions, str):
+            return positions
+
+        track = player.queue.remove_at(positions[0])
+        player.save_queue()
+        return f'Removed {track} from the queue.'
+
+    @subcommand
+    async def move(self, message: Message, cmd: list[str]) -> str | None:
+        """
+        Move a song to a different position in the music queue.
+
+        Args:
+            message (Message): The Discord message that triggered the command.
+            cmd (list[str]): The command arguments, where the first two elements
+                are the current and new queue positions.
+
+        Returns:
+            str | None: A message indicating which song was moved, or an error message.
+        """
+
+        channel, msg = get_channel(message)
+        if channel is None:
+            return msg
+
+        player = get_player(channel)
+        positions = self.parse_positions(player, cmd, 2)
+        if isinstance(positions, str):
+            return positions
+
+        track = player.queue.move(positions[0], positions[1])
+        player.save_queue()
+        return f'Moved {track} to position {positions[1]}.'
+
+    @subcommand
+    async def shuffle(self, message: Message, cmd: list[str]) -> str | None:
+        """
+        Shuffle all upcoming songs in the music queue.
+
+        Args:
+            message (Message): The Discord message that triggered the command.
+            cmd (list[str]): The command arguments.
+
+        Returns:
+            str | None: A message indicating that the queue has been shuffled.
+        """
+
+        channel, msg = get_channel(message)
+        if channel is None:
+            return msg
+
+        player = get_player(channel)
+        player.queue.shuffle()
+        player.save_queue()
+
+        return 'The queue has been shuffled.'
+
     @subcommand
     async def clear(self, message: Message, cmd: list[str]) -> str | None:
         """
@@ -461,6 +915,7 @@ class MusicCmdQueue(Command):
             return msg
 
         player = get_player(channel)
-        player.queue = [i for i in player.queue if i['playing']]
+        player.queue.clear_upcoming()
+        player.save_queue()
 
         return 'Any upcoming songs have been removed from the queue.'
@@ -1,11 +1,11 @@
 """A command to list players currently logged into the Minecraft server."""
 
 from datetime import datetime
-from pathlib import Path
 
 from discord import Message
 
-from commands import Command, command
+from commands import Command, bad_world, command, select_world, worlds
+from worlds import World
 
 
 @command('players', 'List what players are logged in.', 'minecraft')
@@ -16,10 +16,13 @@ class PlayersCmd(Command):
     and returns a list of players who are currently online.
     """
 
-    def get_logfile_paths(self) -> list[str]:
+    def get_logfile_paths(self, world: World) -> list[str]:
         """
         Get the paths of today's log files.
-        The log files are expected to be in the format 'flatearth.YYYY.MM.DD.*'.
+        The log files are expected to be in the format '{world}.YYYY.MM.DD.*'.
+
+        Args:
+            world (World): The world whose logs to look for.
 
         Returns:
             list[str]: A list of paths to the log files for today.
@@ -27,7 +30,7 @@ class PlayersCmd(Command):
 
         now = datetime.now().strftime('%Y.%m.%d.')
         logfile_paths = []
-        for i in Path('../minecraftbe/flatearth/logs/').glob(f'flatearth.{now}*'):
+        for i in world.logs.glob(f'{world.name}.{now}*'):
             if len(logfile_paths) == 0 or str(i) > logfile_paths[-1]:
                 logfile_paths += [str(i)]
 
@@ -45,7 +48,6 @@ class PlayersCmd(Command):
                 are booleans indicating if the player is online.
         """
 
-        logfile_paths = self.get_logfile_paths()
         players = {}
 
         for logfile_path in logfile_paths:
@@ -65,10 +67,19 @@ class PlayersCmd(Command):
 
         return players
 
-    async def default(self, message: Message, cmd: list[str]) -> str:
-        # Scan today's log files for list of online players
+    def list_players(self, world: World) -> str:
+        """
+        List the players logged in to a world.
 
-        logfile_paths = self.get_logfile_paths()
+        Args:
+            world (World): The world to check.
+
+        Returns:
+            str: A message listing the players who are online.
+        """
+
+        # Scan today's log files for list of online players
+        logfile_paths = self.get_logfile_paths(world)
 
         if len(logfile_paths) == 0:
             return 'ERROR: Failed to get list of users: cannot open server log.'
@@ -84,3 +95,14 @@ class PlayersCmd(Command):
             response += ''.join([f'\n> {i}' for i in player_list])
 
         return response
+
+    async def default(self, message: Message, cmd: list[str]) -> str:
+        if any(i.lower().startswith('world:') for i in cmd):
+            world, cmd = select_world(cmd)
+            return bad_world() if world is None else self.list_players(world)
+
+        # With several worlds and none picked, show them all.
+        if len(worlds()) == 1:
+            return self.list_players(next(iter(worlds().values())))
+
+        return '\n'.join(f'**{world}**: {self.list_players(world)}' for world in worlds().values())
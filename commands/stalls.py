@@ -0,0 +1,71 @@
+"""
+Show recent stalls of the event loop.
+"""
+
+import re
+
+from discord import Message
+
+import stall_detector
+from commands import Command, command, subcommand
+
+MAX_STACK_LINES = 12
+
+
+@command('stalls', 'Show recent times the bot stalled, and what it was doing.', admin_only=True)
+class StallsCmd(Command):
+    """
+    Command to show the stalls recorded by the stall detector,
+    including the stack of the event loop at the time of a stall.
+    """
+
+    async def default(self, message: Message, cmd: list[str]) -> str:
+        detector = stall_detector.DETECTOR
+        if detector is None:
+            return 'The stall detector is not running.'
+
+        incidents = detector.recent()
+
+        if len(cmd):
+            if not re.match(r'^\d+$', cmd[0]) or not 1 <= int(cmd[0]) <= len(incidents):
+                return f'ERROR: Invalid stall number `{cmd[0]}`.'
+
+            incident = incidents[int(cmd[0]) - 1]
+            stack = ''.join(incident.stack[-MAX_STACK_LINES:])
+            response = (
+                f'Stall {cmd[0]} at {incident.started:%Y-%m-%d %H:%M:%S}, ' +
+                f'{incident.duration * 1000:.0f} ms in `{incident.handler}`:\n'
+            )
+            # Trim the oldest frames so the message fits in Discord's limit.
+            return response + '```\n' + stack[-(1900 - len(response)):] + '```'
+
+        if len(incidents) == 0:
+            return f'No stalls longer than {detector.threshold * 1000:.0f} ms have been recorded.'
+
+        return '\n'.join([
+            f'Recent stalls longer than {detector.threshold * 1000:.0f} ms, newest first:',
+            *[
+                f'{n}. {i.started:%Y-%m-%d %H:%M:%S}: {i.duration * 1000:.0f} ms in `{i.handler}`'
+                for n, i in enumerate(incidents, 1)
+            ],
+            f'Use `{self} {{number}}` to see where a stall happened.',
+        ])
+
+    @subcommand
+    async def help(self, message: Message, cmd: list[str]) -> str:
+        """
+        Display help information for the stalls command.
+
+        Args:
+            message (Message): The Discord message object.
+            cmd (list[str]): The command arguments.
+
+        Returns:
+            str: A help message detailing the usage of the stalls command.
+        """
+
+        return '\n'.join([
+            'Show recent times the bot stalled, and what it was doing.',
+            f'* `{self}`: List recent stalls.',
+            f'* `{self} {{number}}`: Show the stack trace of a stall.',
+        ])
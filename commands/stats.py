@@ -0,0 +1,72 @@
+"""
+Show resource usage of the bot.
+"""
+
+import os
+import resource
+from pathlib import Path
+
+from discord import Message
+
+from commands import Command, command, import_times, loaded
+from scheduler import SCHEDULER
+
+
+def memory_usage() -> int:
+    """
+    Get the current resident memory of the bot.
+
+    Returns:
+        int: The resident set size in bytes.
+    """
+
+    try:
+        with open('/proc/self/statm', 'r', encoding='utf8') as fp:
+            return int(fp.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (FileNotFoundError, ValueError):
+        # Fall back to the peak usage, which is reported in kilobytes on Linux.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def child_processes() -> int:
+    """
+    Count the processes that the bot has started and that are still running, such as ffmpeg.
+
+    Returns:
+        int: The number of child processes.
+    """
+
+    pid = str(os.getpid())
+    count = 0
+    for i in Path('/proc').glob('[0-9]*/stat'):
+        try:
+            if i.read_text(encoding='utf8').rsplit(')', 1)[1].split()[1] == pid:
+                count += 1
+        except (OSError, IndexError):
+            pass
+
+    return count
+
+
+@command('stats', 'Show resource usage of the bot.', admin_only=True)
+class StatsCmd(Command):
+    """
+    Command to show resource usage of the bot, along with any statistics that other commands report.
+    """
+
+    async def default(self, message: Message, cmd: list[str]) -> str:
+        stats = {
+            'Memory': f'{memory_usage() / 2**20:.1f} MB',
+            'Child processes': child_processes(),
+        }
+
+        for i in loaded().values():
+            stats.update(i.stats())
+
+        stats.update(SCHEDULER.stats())
+        stats.update({f'Import time of {key}': f'{val * 1000:.0f} ms' for key, val in import_times.items()})
+
+        return '\n'.join([
+            'Bot statistics:',
+            *[f'* {key}: {val}' for key, val in stats.items()],
+        ])
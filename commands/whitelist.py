@@ -6,7 +6,8 @@ import json
 
 from discord import Message
 
-from commands import Command, bad_subcmd, command, mc_command, subcommand
+from commands import Command, bad_subcmd, bad_world, command, mc_command, select_world, subcommand
+from worlds import World
 
 
 @command('whitelist', 'Show whitelist info or add/remove players from the whitelist.', 'minecraft')
@@ -17,19 +18,26 @@ class WhitelistCmd(Command):
     add players to it, or remove players from it.
     """
 
-    def get_whitelist(self) -> list[str]:
+    def get_whitelist(self, world: World) -> list[str]:
         """
         Load the whitelist from the allowlist.json file.
 
+        Args:
+            world (World): The world whose whitelist to load.
+
         Returns:
             list[str]: A list of whitelisted player names.
         """
 
-        with open('../minecraftbe/flatearth/allowlist.json', 'r', encoding='utf8') as fp:
+        with open(world.allowlist, 'r', encoding='utf8') as fp:
             return [i.get('name', 'ERROR') for i in json.load(fp)]
 
     async def default(self, message: Message, cmd: list[str]) -> str:
-        whitelist = self.get_whitelist()
+        world, cmd = select_world(cmd)
+        if world is None:
+            return bad_world()
+
+        whitelist = self.get_whitelist(world)
 
         if len(cmd) == 0:
             return '\n'.join([
@@ -42,7 +50,7 @@ class WhitelistCmd(Command):
         if player in whitelist:
             return f'ERROR: Player `{player}` is already in the whitelist.'
 
-        mc_command(f'whitelist add {player}')
+        mc_command(f'whitelist add {player}', world)
         return f'Added player `{player}` to the whitelist.'
 
     @subcommand
@@ -82,6 +90,7 @@ class WhitelistCmd(Command):
                 f'* `{self} remove {{username}}`: Remove a player from the whitelist.',
                 f'* `{self} {{username}}`: Add a player to the whitelist.',
             ] if self.user_is_admin else []),
+            'Add `world:{name}` to any of these to pick a world other than the default.',
         ])
 
     @subcommand
@@ -102,17 +111,21 @@ class WhitelistCmd(Command):
         if not self.user_is_admin:
             return bad_subcmd('remove')
 
+        world, cmd = select_world(cmd)
+        if world is None:
+            return bad_world()
+
         if len(cmd) == 0:
             return (
                 'ERROR: No player name specified. ' +
                 f'Correct usage is `{self} {self.sub} {{username}}`.'
             )
 
-        whitelist = self.get_whitelist()
+        whitelist = self.get_whitelist(world)
         player = cmd[0]
 
         if player not in whitelist:
             return f'ERROR: Player `{player}` is not in the whitelist.'
 
-        mc_command(f'whitelist remove {player}')
+        mc_command(f'whitelist remove {player}', world)
         return f'Removed player `{player}` from the whitelist.'
@@ -0,0 +1,146 @@
+"""
+Records incoming gateway events to a JSON Lines file, so they can be replayed offline with `bench.replay`.
+
+Only the events the bot handles are recorded: messages and raw reaction adds and removes.
+Each line holds just the fields the bot reads, along with the time the event arrived.
+Recording is off unless the bot is started with `--record-events PATH`, since it stores message text.
+Events are handed to a background thread to be written, the same way log records are, so the
+event loop never waits on the disk.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import time
+from typing import Any
+
+import discord
+
+log = logging.getLogger(__name__)
+
+
+def describe_channel(channel: Any) -> dict[str, Any]:
+    """
+    Describe a channel with the fields the bot looks at.
+
+    Args:
+        channel (Any): The channel the event happened in.
+
+    Returns:
+        dict[str, Any]: The channel ID, name and whether it is a DM.
+    """
+
+    return {
+        'id': channel.id,
+        'name': getattr(channel, 'name', None),
+        'dm': isinstance(channel, discord.DMChannel),
+    }
+
+
+class EventRecorder:
+    """
+    Appends gateway events to a JSON Lines file.
+    """
+
+    def __init__(self, path: str) -> None:
+        # Line buffered, so a crash loses at most the events still waiting to be written.
+        self.file = open(path, 'a', encoding='utf8', buffering=1)  # pylint: disable=consider-using-with
+        self.count = 0
+        self.queue: queue.SimpleQueue = queue.SimpleQueue()
+        self.listener = logging.handlers.QueueListener(self.queue, self)
+        self.listener.start()
+        atexit.register(self.close)
+        log.info('Recording gateway events to %s', path)
+
+    def write(self, event: dict[str, Any]) -> None:
+        """
+        Queue an event to be written, stamped with the current time.
+
+        Args:
+            event (dict[str, Any]): The event to write.
+        """
+
+        event['time'] = time.time()
+        self.queue.put_nowait(event)
+
+    def handle(self, event: dict[str, Any]) -> None:
+        """
+        Write an event to the file. This is called from the writer thread.
+
+        Args:
+            event (dict[str, Any]): The event to write.
+        """
+
+        try:
+            self.file.write(json.dumps(event, separators=(',', ':')) + '\n')
+            self.count += 1
+        except (OSError, ValueError) as e:
+            log.warning('Failed to record event: %s', e)
+
+    def message(self, message: discord.Message) -> None:
+        """
+        Record a message.
+
+        Args:
+            message (discord.Message): The message that was sent.
+        """
+
+        voice = getattr(message.author, 'voice', None)
+        self.write({
+            'type': 'message',
+            'id': message.id,
+            'content': message.content,
+            'author': {'id': message.author.id, 'name': str(message.author), 'bot': message.author.bot},
+            'channel': describe_channel(message.channel),
+            'guild': None if message.guild is None else {
+                'id': message.guild.id,
+                'emojis': [{'id': i.id, 'name': i.name} for i in message.guild.emojis],
+            },
+            'voice_channel': describe_channel(voice.channel) if voice and voice.channel else None,
+        })
+
+    def reaction(self, payload: discord.RawReactionActionEvent) -> None:
+        """
+        Record a reaction being added or removed.
+
+        Args:
+            payload (discord.RawReactionActionEvent): The reaction event.
+        """
+
+        self.write({
+            'type': 'reaction_add' if payload.event_type == 'REACTION_ADD' else 'reaction_remove',
+            'message_id': payload.message_id,
+            'channel_id': payload.channel_id,
+            'guild_id': payload.guild_id,
+            'user_id': payload.user_id,
+            'emoji': {'id': payload.emoji.id, 'name': payload.emoji.name},
+        })
+
+    def close(self) -> None:
+        """
+        Write any events that are still queued, then close the file.
+        """
+
+        if not self.file.closed:
+            self.listener.stop()
+            self.file.close()
+
+
+def load(path: str) -> list[dict[str, Any]]:
+    """
+    Load recorded events, in the order they arrived.
+
+    Args:
+        path (str): The file the events were recorded to.
+
+    Returns:
+        list[dict[str, Any]]: The events.
+    """
+
+    with open(path, 'r', encoding='utf8') as fp:
+        events = [json.loads(line) for line in fp if line.strip()]
+
+    events.sort(key=lambda i: i['time'])
+    return events
@@ -0,0 +1,127 @@
+"""
+Structured, non-blocking logging for the bot.
+
+Log records are put on an in-memory queue by the code that logs them, and a background thread
+formats them as JSON lines and writes them to stdout (and from there, to journald).
+This keeps the cost of writing and flushing logs off of the event loop.
+
+Records logged while a command runs automatically carry the command, user and channel.
+"""
+
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from datetime import datetime, timezone
+from typing import Any
+
+CONTEXT: contextvars.ContextVar[dict[str, Any]] = contextvars.ContextVar('log_context', default={})
+
+# Attributes that every log record has, which should not be treated as context fields.
+RECORD_FIELDS = set(logging.LogRecord('', 0, '', 0, '', None, None).__dict__) | {'message', 'asctime'}
+
+
+class ContextFilter(logging.Filter):
+    """
+    Adds the current context fields (e.g. command, user and channel) to each log record.
+    This runs in the thread that logged the record, since context variables don't cross threads.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for key, val in CONTEXT.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, val)
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats log records as single-line JSON objects.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+
+        for key, val in record.__dict__.items():
+            if key not in RECORD_FIELDS:
+                entry[key] = val
+
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class ContextQueueHandler(logging.handlers.QueueHandler):
+    """
+    A queue handler that keeps exceptions and context fields as separate fields for the
+    JSON formatter, rather than flattening each record into a single string before queueing it.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render the message now, since its arguments may change after this returns,
+        # but leave the formatting of the whole record to the listener thread.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+FORMATTER = JsonFormatter()
+
+
+def setup(levels: list[str]) -> None:
+    """
+    Send all logging through a queue to a background thread that writes JSON lines to stdout.
+
+    Args:
+        levels (list[str]): Log levels, each either a bare level for the root logger (e.g. `INFO`)
+            or a `module=LEVEL` pair to set the level of a single module (e.g. `commands.music=DEBUG`).
+    """
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+
+    handler = ContextQueueHandler(log_queue)
+    handler.addFilter(ContextFilter())
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(FORMATTER)
+
+    listener = logging.handlers.QueueListener(log_queue, output)
+    listener.start()
+    atexit.register(listener.stop)
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(logging.INFO)
+
+    for i in levels:
+        name, _, level = i.rpartition('=')
+        logging.getLogger(name or None).setLevel(level.upper())
+
+
+def set_context(**fields: Any) -> contextvars.Token:
+    """
+    Add fields to every record logged from the current task, until the context is reset.
+
+    Args:
+        **fields: The context fields, e.g. `command='play'`.
+
+    Returns:
+        contextvars.Token: A token to pass to `CONTEXT.reset()` to restore the previous context.
+    """
+    return CONTEXT.set({**CONTEXT.get(), **fields})
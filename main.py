@@ -1,21 +1,39 @@
 #!/usr/bin/env python3
 
-import json
-import re
-from datetime import datetime
-from pathlib import Path
+import time
 
-import discord
-from discord import Forbidden, HTTPException, NotFound
-from discord.ext import tasks
-from mcstatus import BedrockServer
+# Taken before anything else is imported, so the startup time includes imports.
+STARTED = time.perf_counter()
 
-import commands
+import logging  # noqa: E402
+from datetime import datetime  # noqa: E402
+from functools import partial  # noqa: E402
 
-with open(str(Path(__file__).parent) + '/secrets.json', 'r', encoding='utf8') as fp:
-    data = json.load(fp)
-    DISCORD_TOKEN = data['token']
-    GUILD_ID = data['guild']
+import discord  # noqa: E402
+from discord import Forbidden, HTTPException, NotFound  # noqa: E402
+
+import bridge  # noqa: E402
+import commands  # noqa: E402
+import event_recorder  # noqa: E402
+import logger  # noqa: E402
+import markers  # noqa: E402
+import metrics  # noqa: E402
+import pois  # noqa: E402
+import stall_detector  # noqa: E402
+import worlds  # noqa: E402
+from scheduler import SCHEDULER  # noqa: E402
+
+OPTIONS = commands.options()
+logger.setup(OPTIONS.log_level)
+log = logging.getLogger('main')
+
+DISCORD_TOKEN = commands.secrets()['token']
+GUILD_ID = commands.secrets()['guild']
+
+MAP_PATH = '/var/www/html/maps'
+RECORDER = event_recorder.EventRecorder(OPTIONS.record_events) if OPTIONS.record_events else None
+
+STARTUP_SECONDS = metrics.Gauge('bot_startup_seconds', 'Time from starting the bot until each stage of startup.', ('stage',))
 
 
 def read_message(id: int) -> dict | None:
@@ -74,35 +92,91 @@ class DiscordClient(discord.Client):
         """
         super().__init__(*args, **kwargs)
         self.activity = None
+        self.metrics_server = None
+        self.markers = markers.MarkerServer()
+        self.marker_server = None
+        self.bridge = None
+
+        SCHEDULER.add('status', self.sync_status_message, 15)
+
+        # Commands are imported when first used, so their tasks start then too.
+        commands.load_hooks.append(self.start_repeat_tasks)
+        commands.marker_hooks.append(self.set_markers)
+
+    async def setup_hook(self) -> None:
+        """
+        Called once, before connecting to Discord.
+        Listens for clicks on now-playing panels that were posted before the bot last restarted.
+        """
+
+        if 'music' in OPTIONS.features:
+            self.add_view(panel.PanelView())
 
     async def on_ready(self):
         """
         Called when the client is ready and connected to Discord.
         It initializes the bot, sets the status message, and starts repeating tasks.
+        This is called again after every reconnect, so anything started here must only start once.
         """
 
-        print('Logged in as ', self.user)
-        self.sync_status_message.start()
+        elapsed = time.perf_counter() - STARTED
+        STARTUP_SECONDS.set(elapsed, stage='ready')
+        log.info('Logged in as %s, %.2f s after starting', self.user, elapsed)
+        stall_detector.start(OPTIONS.stall_threshold / 1000)
+
+        if OPTIONS.metrics_port and self.metrics_server is None:
+            self.metrics_server = await metrics.serve(OPTIONS.metrics_port)
+            log.info('Serving metrics on port %d', OPTIONS.metrics_port)
+
+        if OPTIONS.marker_port and self.marker_server is None:
+            self.set_markers({'overworld': True, 'nether': True, 'end': True})
+            self.marker_server = await self.markers.serve(OPTIONS.marker_port)
+            log.info('Serving map markers on port %d', OPTIONS.marker_port)
+
+        if OPTIONS.chat_bridge and 'minecraft' in OPTIONS.features and self.bridge is None:
+            self.bridge = bridge.Bridge(list(commands.worlds().values()), self.send_to_games)
+            SCHEDULER.add('chat bridge', self.bridge.tick, 1)
 
         self.activity = None
 
         # Set up all tasks to start repeating
-        for cmd in commands.all().values():
-            for task in cmd.repeat_tasks:
-                async def run_task(fn=task[0], obj=cmd):
-                    """
-                    Run a repeating task with the provided function and command list.
-                    This is a workaround to avoid issues with passing parameters to tasks.
-                    """
-                    await fn(obj)
+        for cmd in commands.loaded().values():
+            self.start_repeat_tasks(cmd)
+        SCHEDULER.start()
+
+    def start_repeat_tasks(self, cmd: commands.Command) -> None:
+        """
+        Schedule the repeating tasks of a command. Tasks that are already scheduled are left alone.
+
+        Args:
+            cmd (commands.Command): The command whose tasks to schedule.
+        """
+
+        for fn, seconds in cmd.repeat_tasks:
+            SCHEDULER.add(f'!{cmd.id} {fn.__name__}', partial(fn, cmd), seconds)
+
+    async def send_to_games(self, text: str) -> None:
+        """
+        Send a message to the games channel of the bot's guild.
+
+        Args:
+            text (str): The message to send.
+        """
+
+        guild = self.get_guild(GUILD_ID)
+        channel = discord.utils.get(guild.text_channels, name='games') if guild else None
+        if channel is None:
+            log.warning('Cannot find the games channel to send a message to.')
+            return
 
-                tasks.loop(seconds=task[1])(run_task).start()
+        await channel.send(text, allowed_mentions=discord.AllowedMentions.none())
 
     def set_markers(self, updated) -> None:
         """
         Update the custom markers for the Minecraft map based on the provided updates.
         This function generates JavaScript files for each dimension that has markers,
         removing the '_id' and 'dimension' fields from each marker.
+        If markers are served over HTTP, the in-memory copy is updated as well.
 
         Args:
             updated (dict): A dictionary indicating which dimensions have updated markers.
@@ -117,42 +191,77 @@ class DiscordClient(discord.Client):
                 del marker['dimension']
                 return marker
 
-            text = 'UnminedCustomMarkers = { isEnabled: true, markers: ' + json.dumps([
+            text = markers.render([
                 process(i) for i in commands.db.markers.find({'dimension': dimension})
-            ], indent=2) + '}'
+            ], OPTIONS.marker_format)
+
+            if OPTIONS.marker_port:
+                self.markers.update(dimension, text)
+
+            if not OPTIONS.no_marker_files:
+                with open(
+                    f'{MAP_PATH}/{dimension}/custom.markers.js',
+                    'w', encoding='utf8'
+                ) as f:
+                    f.write(text)
+
+            log.info('Updated %s map.', dimension, extra={'dimension': dimension})
 
-            with open(
-                f'/var/www/html/maps/{dimension}/custom.markers.js',
-                'w', encoding='utf8'
-            ) as f:
-                f.write(text)
+    async def on_socket_event_type(self, event_type: str) -> None:
+        """
+        Called for every event received from the Discord gateway.
 
-            print(f'Updated {dimension} map.', flush=True)
+        Args:
+            event_type (str): The type of the event, e.g. `MESSAGE_CREATE`.
+        """
+        metrics.GATEWAY_EVENTS.inc(type=event_type)
 
-    @tasks.loop(seconds=15)
     async def sync_status_message(self) -> None:
         """
         A task that runs every 15 seconds to update the bot's status and markers.
-        It checks the Minecraft server status, updates the Discord bot's presence,
+        """
+
+        with metrics.STATUS_TICK_SECONDS.time():
+            await self.update_status()
+
+    async def update_status(self) -> None:
+        """
+        Update the bot's status and markers.
+        It checks the status of every Minecraft server, updates the Discord bot's presence,
         and updates any markers based on messages in the database.
         """
 
-        # Update discord bot status to reflect whether players are online
-        status = MINECRAFT.status()
-        count = status.players.online
+        # Update discord bot status to reflect whether players are online, in any world
+        counts = await worlds.players_online(list(commands.worlds().values()))
+        online = [i for i in counts.values() if i is not None]
+        count = sum(online)
+        busy = sum(1 for i in online if i)
 
-        if count == 0:
+        if not online:
+            status = discord.Status.idle
+            activity = 'an offline server'
+        elif count == 0:
             status = discord.Status.idle
             activity = 'an empty server'
         else:
             status = discord.Status.online
             activity = str(count) + ' player' + ('' if count == 1 else 's')
+            if busy > 1:
+                activity += f' in {busy} worlds'
 
         if self.activity != activity:
             act = discord.Activity(
                 name=activity, type=discord.ActivityType.watching)
             await self.change_presence(status=status, activity=act)
 
+        self.update_markers()
+
+    def update_markers(self) -> None:
+        """
+        Convert any messages that changed since the last update into markers,
+        and rewrite the marker files for the dimensions that changed.
+        """
+
         # Fetch any updated messages and convert them into markers
         updated = {
             'overworld': False,
@@ -161,11 +270,10 @@ class DiscordClient(discord.Client):
         }
 
         for message in commands.db.messages.find({'updated': True}):
-            x_coord = message['coords'][0]
-            z_coord = message['coords'][1] if len(message['coords']) == 2 else message['coords'][2]
+            x_coord, _, z_coord = pois.position(message['coords'])
             label = message['label']
 
-            print(f'Updating marker for {label} at {x_coord}, {z_coord}', flush=True)
+            log.info('Updating marker for %s at %s, %s', label, x_coord, z_coord)
 
             # Remove any marker on the specified position, in any dimension.
             for i in commands.db.markers.find({'x': x_coord, 'z': z_coord}):
@@ -177,16 +285,9 @@ class DiscordClient(discord.Client):
                 marker = {
                     'x': x_coord,
                     'z': z_coord,
-                    'image': 'custom.pin.png',
-                    'imageAnchor': [0.5, 1],
-                    'imageScale': 0.3,
                     'dimension': dimension,
                     'text': f'{label}',
-                    'textColor': 'white',
-                    'offsetX': 0,
-                    'offsetY': 20,
-                    'font': 'bold 20px Calibri,sans serif',
-                    'style': 'border: 2px solid red;',
+                    **markers.STYLE,
                 }
                 commands.db.markers.insert_one(marker)
                 updated[dimension] = True
@@ -209,19 +310,8 @@ class DiscordClient(discord.Client):
         if not message.guild:
             return  # Ignore DMs
 
-        pattern = re.compile(r'(-?\b([0-9]+)([, ]+|$)){2,}')
-        match = pattern.search(message.content)
-
-        if match:
-            begin, end = match.span(0)
-            pre = message.content[0:begin]
-            mid = message.content[begin:end]
-            post = message.content[end::]
-
-            text = f'{pre} {post}'.replace(
-                ',', '').replace(':', '').strip().upper()
-            coords = [int(i) for i in mid.replace(',', ' ').split()]
-
+        if parsed := pois.parse(message.content):
+            text, coords = parsed
             msg = {
                 'emojis': [],
                 'text': message.content,
@@ -237,7 +327,7 @@ class DiscordClient(discord.Client):
                         try:
                             await message.add_reaction(emoji)
                         except (HTTPException, Forbidden, NotFound, TypeError) as e:
-                            print(f'Failed to react with custom emoji: {e}', flush=True)
+                            log.warning('Failed to react with custom emoji: %s', e)
                         break
 
     async def on_message(self, message: discord.Message):
@@ -249,12 +339,15 @@ class DiscordClient(discord.Client):
             message (discord.Message): The message that was sent.
         """
 
+        if RECORDER:
+            RECORDER.message(message)
+
         # Don't respond to ourselves
         if message.author == self.user:
             return
 
         if not self.user:
-            print('Discord client is not logged in. Exiting...')
+            log.error('Discord client is not logged in. Exiting...')
             return
 
         # Only respond to commands & messages if this is a DM, or it's in the games channel
@@ -294,6 +387,7 @@ class DiscordClient(discord.Client):
         # Now commands are all uniform,
         # Remove command indicator from first param
         this_command[0] = this_command[0][1::]
+        stall_detector.name_task(f'discord.py: on_message !{this_command[0]}')
 
         if cmd := commands.get(this_command[0]):
 
@@ -321,9 +415,12 @@ class DiscordClient(discord.Client):
         """
 
         if not self.user:
-            print('Discord client is not logged in. Exiting...')
+            log.error('Discord client is not logged in. Exiting...')
             return
 
+        if RECORDER:
+            RECORDER.reaction(payload)
+
         if payload.emoji.name not in ['overworld', 'nether', 'end']:
             return
 
@@ -357,7 +454,7 @@ class DiscordClient(discord.Client):
                     try:
                         await message.remove_reaction(emoji, self.user)
                     except (HTTPException, Forbidden, NotFound, TypeError) as e:
-                        print(f'Failed to react with custom emoji: {e}', flush=True)
+                        log.warning('Failed to react with custom emoji: %s', e)
                     break
 
     async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent) -> None:
@@ -372,9 +469,12 @@ class DiscordClient(discord.Client):
         """
 
         if not self.user:
-            print('Discord client is not logged in. Exiting...')
+            log.error('Discord client is not logged in. Exiting...')
             return
 
+        if RECORDER:
+            RECORDER.reaction(payload)
+
         if payload.emoji.name not in ['overworld', 'nether', 'end']:
             return
 
@@ -392,8 +492,10 @@ class DiscordClient(discord.Client):
         update_message_emojis(payload.message_id, msg['emojis'])
 
 
-MINECRAFT = BedrockServer.lookup('127.0.0.1')
+STARTUP_SECONDS.set(time.perf_counter() - STARTED, stage='imported')
+log.info('Started in %.2f s', time.perf_counter() - STARTED)
 
-INTENTS = discord.Intents.all()
-CLIENT = DiscordClient(intents=INTENTS)
-CLIENT.run(DISCORD_TOKEN)
+if __name__ == '__main__':
+    INTENTS = discord.Intents.all()
+    CLIENT = DiscordClient(intents=INTENTS, http_trace=metrics.http_trace())
+    CLIENT.run(DISCORD_TOKEN, log_handler=None)
@@ -0,0 +1,240 @@
+"""
+Builds the map marker files that Unmined loads, and optionally serves them over HTTP straight from memory.
+
+Markers are written in one of two formats. `full` is the structure Unmined reads, with every marker
+repeating the same style fields. `compact` stores the style once and each marker as `[x, z, text]`,
+followed by any fields that differ from the shared style, and a small loader shim expands it back into
+the full structure when the browser runs the script. The compact format is versioned, so the shim can
+refuse data it doesn't understand rather than drawing the wrong markers.
+
+Each dimension's payload is kept in memory with a strong ETag, along with gzip and (if the `brotli`
+package is installed) brotli versions that are compressed once, in a background thread, whenever the
+markers change. Browsers that already have the current markers get a 304 with no body.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+import metrics
+
+COMPACT_VERSION = 1
+
+# The style of every marker, unless it is overridden.
+STYLE = {
+    'image': 'custom.pin.png',
+    'imageAnchor': [0.5, 1],
+    'imageScale': 0.3,
+    'textColor': 'white',
+    'offsetX': 0,
+    'offsetY': 20,
+    'font': 'bold 20px Calibri,sans serif',
+    'style': 'border: 2px solid red;',
+}
+
+# Expands the compact format into what Unmined expects. `d` is the compact data.
+LOADER = (
+    'UnminedCustomMarkers=(function(d){'
+    'if(d.v!==%d)throw new Error("Unsupported marker format "+d.v);'
+    'return{isEnabled:true,markers:d.m.map(function(m){'
+    'return Object.assign({},d.s,m[3],{x:m[0],z:m[1],text:m[2]})})}'
+    '})(' % COMPACT_VERSION
+)
+
+REQUESTS = metrics.Counter('bot_marker_requests_total', 'Requests for map markers.', ('dimension', 'status', 'encoding'))
+
+
+def render(markers: list[dict], format: str = 'compact') -> str:
+    """
+    Format markers as the script that Unmined loads from `custom.markers.js`.
+
+    Args:
+        markers (list[dict]): The markers, without any database fields.
+        format (str): `compact`, or `full` for the structure Unmined expects with no loader.
+
+    Returns:
+        str: The script.
+    """
+
+    if format == 'full':
+        return 'UnminedCustomMarkers = { isEnabled: true, markers: ' + json.dumps(markers, indent=2) + '}'
+
+    rows = []
+    for marker in markers:
+        row = [marker.get('x'), marker.get('z'), marker.get('text', '')]
+        overrides = {
+            key: val for key, val in marker.items()
+            if key not in ('x', 'z', 'text') and (key not in STYLE or STYLE[key] != val)
+        }
+        if overrides:
+            row.append(overrides)
+        rows.append(row)
+
+    data = {'v': COMPACT_VERSION, 's': STYLE, 'm': rows}
+    return LOADER + json.dumps(data, separators=(',', ':')) + ');'
+
+
+class Payload:
+    """
+    One version of a dimension's markers, in every encoding that can be served.
+    """
+
+    __slots__ = ('body', 'tag', 'gzip', 'brotli')
+
+    def __init__(self, body: bytes) -> None:
+        self.body = body
+        self.tag = hashlib.sha256(body).hexdigest()[:32]
+        self.gzip: bytes | None = None
+        self.brotli: bytes | None = None
+
+    def compress(self) -> None:
+        """
+        Compress the body. This is slow for large marker sets, so it runs in a thread.
+        """
+
+        self.gzip = gzip.compress(self.body, 9, mtime=0)
+        if brotli is not None:
+            self.brotli = brotli.compress(self.body, quality=9)
+
+    def etag(self, encoding: str) -> str:
+        """
+        Get the strong ETag of one encoding. Each encoding has its own, since their bytes differ.
+
+        Args:
+            encoding (str): The content encoding, or `identity`.
+
+        Returns:
+            str: The quoted ETag.
+        """
+        return f'"{self.tag}"' if encoding == 'identity' else f'"{self.tag}-{encoding}"'
+
+    def choose(self, accept_encoding: str) -> tuple[str, bytes]:
+        """
+        Pick the smallest encoding that the client accepts and that is ready.
+
+        Args:
+            accept_encoding (str): The request's Accept-Encoding header.
+
+        Returns:
+            tuple[str, bytes]: The encoding and the body in that encoding.
+        """
+
+        accepted = set()
+        for i in accept_encoding.lower().split(','):
+            name, _, params = i.partition(';')
+            try:
+                weight = float(params.strip().removeprefix('q=') or 1)
+            except ValueError:
+                weight = 1
+            if weight > 0:
+                accepted.add(name.strip())
+
+        if self.brotli is not None and 'br' in accepted:
+            return 'br', self.brotli
+        if self.gzip is not None and ('gzip' in accepted or '*' in accepted):
+            return 'gzip', self.gzip
+        return 'identity', self.body
+
+
+class MarkerServer:
+    """
+    Holds the current markers of each dimension, and serves them over HTTP.
+    """
+
+    def __init__(self) -> None:
+        self.payloads: dict[str, Payload] = {}
+
+    def update(self, dimension: str, text: str) -> bool:
+        """
+        Replace a dimension's markers. Compressed versions are made in a background thread,
+        and until they are ready the uncompressed markers are served.
+
+        Args:
+            dimension (str): The dimension, e.g. `overworld`.
+            text (str): The marker script, from `render`.
+
+        Returns:
+            bool: Whether the markers changed.
+        """
+
+        payload = Payload(text.encode())
+        if (current := self.payloads.get(dimension)) and current.tag == payload.tag:
+            return False
+
+        self.payloads[dimension] = payload
+        try:
+            asyncio.get_running_loop().run_in_executor(None, payload.compress)
+        except RuntimeError:
+            payload.compress()
+        return True
+
+    async def handle_request(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Answer a single HTTP request for `/{dimension}/custom.markers.js`.
+        """
+
+        try:
+            request = (await reader.readline()).decode('latin-1').split()
+            headers = {}
+            while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+                key, _, value = line.decode('latin-1').partition(':')
+                headers[key.strip().lower()] = value.strip()
+
+            parts = request[1].split('?')[0].strip('/').split('/') if len(request) >= 2 else []
+            dimension = parts[-2] if len(parts) >= 2 and parts[-1] == 'custom.markers.js' else ''
+            payload = self.payloads.get(dimension)
+
+            if len(request) < 2 or request[0] not in ('GET', 'HEAD'):
+                status, encoding, lines, body = '405 Method Not Allowed', 'identity', ['Allow: GET, HEAD'], b''
+            elif payload is None:
+                status, encoding, lines, body = '404 Not Found', 'identity', [], b'Not found\n'
+            else:
+                encoding, body = payload.choose(headers.get('accept-encoding', ''))
+                etag = payload.etag(encoding)
+                lines = [
+                    f'ETag: {etag}',
+                    'Cache-Control: no-cache',
+                    'Vary: Accept-Encoding',
+                    'Content-Type: application/javascript; charset=utf-8',
+                ]
+                if encoding != 'identity':
+                    lines += [f'Content-Encoding: {encoding}']
+
+                # Any of this version's ETags will do, in case the client switched encodings.
+                matches = {i.strip().removeprefix('W/') for i in headers.get('if-none-match', '').split(',')}
+                if '*' in matches or matches & {payload.etag(i) for i in ('identity', 'gzip', 'br')}:
+                    status, body = '304 Not Modified', b''
+                else:
+                    status = '200 OK'
+
+            REQUESTS.inc(dimension=dimension if payload else 'unknown', status=status.split()[0], encoding=encoding)
+
+            head = [f'HTTP/1.1 {status}', *lines, f'Content-Length: {len(body)}', 'Connection: close']
+            writer.write(('\r\n'.join(head) + '\r\n\r\n').encode())
+            if request[:1] != ['HEAD'] and not status.startswith('304'):
+                writer.write(body)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, port: int, host: str = '127.0.0.1') -> asyncio.Server:
+        """
+        Start serving the markers.
+
+        Args:
+            port (int): The port to listen on.
+            host (str): The address to listen on. Defaults to local connections only,
+                e.g. for a web server that proxies `/maps/` to it.
+
+        Returns:
+            asyncio.Server: The running server.
+        """
+        return await asyncio.start_server(self.handle_request, host, port)
@@ -0,0 +1,325 @@
+"""
+Runtime metrics for the bot, served over HTTP in the Prometheus text format.
+
+Metrics are plain in-process counters and histograms. They are cheap to update from
+the event loop, and are only formatted when something scrapes the `/metrics` endpoint.
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+import aiohttp
+from pymongo import monitoring
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def escape(value: str) -> str:
+    """
+    Escape a label value for the text format.
+
+    Args:
+        value (str): The label value.
+
+    Returns:
+        str: The escaped value, without quotes.
+    """
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = '') -> str:
+    """
+    Format a set of labels for the text format.
+
+    Args:
+        names (tuple[str, ...]): The label names.
+        values (tuple[str, ...]): The label values, in the same order.
+        extra (str): An extra, already formatted label, e.g. a histogram bucket.
+
+    Returns:
+        str: The labels in braces, or an empty string if there are none.
+    """
+
+    labels = [f'{name}="{escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        labels += [extra]
+    return '{' + ','.join(labels) + '}' if labels else ''
+
+
+class Metric:
+    """
+    Base class for metrics, which may be split up by labels.
+    """
+
+    type = 'untyped'
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labels = labels
+        REGISTRY.append(self)
+
+    def key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        """
+        Get the label values in a fixed order.
+
+        Args:
+            labels (dict[str, str]): The label values by name.
+
+        Returns:
+            tuple[str, ...]: The label values, ordered like `self.labels`.
+        """
+        return tuple(str(labels.get(i, '')) for i in self.labels)
+
+    def samples(self) -> Iterator[str]:
+        """
+        Format every sample of this metric.
+
+        Returns:
+            Iterator[str]: One line per sample.
+        """
+        return iter(())
+
+    def render(self) -> str:
+        """
+        Format this metric, including its help and type lines.
+
+        Returns:
+            str: The formatted metric.
+        """
+        return '\n'.join([f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.type}', *self.samples()])
+
+
+class Counter(Metric):
+    """
+    A value that only ever goes up.
+    """
+
+    type = 'counter'
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()) -> None:
+        super().__init__(name, help, labels)
+        self.values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """
+        Increase the counter.
+
+        Args:
+            amount (float): How much to increase it by.
+            **labels: The label values of the sample to increase.
+        """
+        key = self.key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self) -> Iterator[str]:
+        for key, value in self.values.items():
+            yield f'{self.name}{format_labels(self.labels, key)} {value}'
+
+
+class Gauge(Counter):
+    """
+    A value that can go up and down.
+    """
+
+    type = 'gauge'
+
+    def set(self, value: float, **labels: str) -> None:
+        """
+        Set the gauge to a value.
+
+        Args:
+            value (float): The new value.
+            **labels: The label values of the sample to set.
+        """
+        self.values[self.key(labels)] = value
+
+
+class Histogram(Metric):
+    """
+    A distribution of observed values, such as latencies, counted in buckets.
+    """
+
+    type = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+        self.values: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """
+        Record an observed value.
+
+        Args:
+            value (float): The value, e.g. a duration in seconds.
+            **labels: The label values of the distribution to add it to.
+        """
+
+        key = self.key(labels)
+        if (counts := self.values.get(key)) is None:
+            # One count per bucket, then the total count and the sum.
+            counts = self.values[key] = [0] * (len(self.buckets) + 2)
+
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+        counts[-2] += 1
+        counts[-1] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """
+        Time a block of code and record how long it took, even if it raised.
+
+        Args:
+            **labels: The label values of the distribution to add it to.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> Iterator[str]:
+        for key, counts in self.values.items():
+            for bound, count in zip((*self.buckets, '+Inf'), (*counts[:-2], counts[-2])):
+                labels = format_labels(self.labels, key, 'le="' + str(bound) + '"')
+                yield f'{self.name}_bucket{labels} {count}'
+            yield f'{self.name}_count{format_labels(self.labels, key)} {counts[-2]}'
+            yield f'{self.name}_sum{format_labels(self.labels, key)} {counts[-1]}'
+
+
+REGISTRY: list[Metric] = []
+LAG_TASKS: set[asyncio.Task] = set()
+
+COMMAND_SECONDS = Histogram('bot_command_seconds', 'Time taken to run a command.', ('command', 'subcommand'))
+MONGO_OPERATIONS = Counter('bot_mongo_operations_total', 'MongoDB commands sent.', ('operation', 'outcome'))
+MONGO_SECONDS = Histogram('bot_mongo_operation_seconds', 'Time taken by MongoDB commands.', ('operation',))
+STATUS_TICK_SECONDS = Histogram('bot_status_tick_seconds', 'Time taken to sync the status message and markers.')
+GATEWAY_EVENTS = Counter('bot_gateway_events_total', 'Gateway events received from Discord.', ('type',))
+REST_REQUESTS = Counter('bot_discord_rest_requests_total', 'Requests made to the Discord REST API.', ('method', 'status'))
+REST_SECONDS = Histogram('bot_discord_rest_seconds', 'Time taken by Discord REST API requests.', ('method',))
+LOOP_LAG_SECONDS = Histogram('bot_event_loop_lag_seconds', 'How late the event loop was to wake up a sleeping task.')
+
+
+def render() -> str:
+    """
+    Format every registered metric.
+
+    Returns:
+        str: All metrics in the Prometheus text format.
+    """
+    return '\n'.join(i.render() for i in REGISTRY) + '\n'
+
+
+class MongoListener(monitoring.CommandListener):
+    """
+    Records the count and duration of every command sent to MongoDB.
+    """
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        pass
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        MONGO_OPERATIONS.inc(operation=event.command_name, outcome='success')
+        MONGO_SECONDS.observe(event.duration_micros / 1e6, operation=event.command_name)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        MONGO_OPERATIONS.inc(operation=event.command_name, outcome='failure')
+        MONGO_SECONDS.observe(event.duration_micros / 1e6, operation=event.command_name)
+
+
+def http_trace() -> aiohttp.TraceConfig:
+    """
+    Build an aiohttp trace config that records every request discord.py makes to the REST API.
+
+    Returns:
+        aiohttp.TraceConfig: The trace config, to pass to `discord.Client(http_trace=...)`.
+    """
+
+    async def on_request_start(session, context, params) -> None:
+        context.start = time.perf_counter()
+
+    async def on_request_end(session, context, params) -> None:
+        REST_REQUESTS.inc(method=params.method, status=str(params.response.status))
+        REST_SECONDS.observe(time.perf_counter() - context.start, method=params.method)
+
+    async def on_request_exception(session, context, params) -> None:
+        REST_REQUESTS.inc(method=params.method, status='error')
+        REST_SECONDS.observe(time.perf_counter() - context.start, method=params.method)
+
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(on_request_start)
+    trace.on_request_end.append(on_request_end)
+    trace.on_request_exception.append(on_request_exception)
+    return trace
+
+
+async def sample_loop_lag(interval: float = 0.5) -> None:
+    """
+    Continuously measure how late the event loop is to wake up a sleeping task.
+    A large lag means something is blocking the loop.
+
+    Args:
+        interval (float): How long to sleep between samples.
+    """
+
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        LOOP_LAG_SECONDS.observe(max(0.0, loop.time() - start - interval))
+
+
+async def handle_request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """
+    Answer a single HTTP request for the metrics.
+    """
+
+    try:
+        request = (await reader.readline()).decode('latin-1').split()
+        while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+            pass
+
+        if len(request) >= 2 and request[0] == 'GET' and request[1].split('?')[0] == '/metrics':
+            status, body = '200 OK', render().encode()
+        else:
+            status, body = '404 Not Found', b'Not found\n'
+
+        writer.write(
+            f'HTTP/1.1 {status}\r\n'
+            'Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            'Connection: close\r\n\r\n'.encode() + body
+        )
+        await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(port: int, host: str = '127.0.0.1') -> asyncio.Server:
+    """
+    Start serving the metrics endpoint and sampling the event loop lag.
+
+    Args:
+        port (int): The port to listen on.
+        host (str): The address to listen on. Defaults to local connections only.
+
+    Returns:
+        asyncio.Server: The running server.
+    """
+
+    server = await asyncio.start_server(handle_request, host, port)
+    LAG_TASKS.add(asyncio.create_task(sample_loop_lag()))
+    return server
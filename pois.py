@@ -0,0 +1,372 @@
+"""
+Points of interest, as stored in the `messages` collection, and importing and exporting them as files.
+
+A point of interest is a message with coordinates that has been marked with at least one dimension.
+Exports are streamed: documents are read from MongoDB in batches and written straight into a
+gzip-compressed temporary file, so even a very large map never has to fit in memory at once.
+Imports go the other way, checking each row with the same parser as chat messages and writing
+messages and markers with batched bulk writes.
+
+Formats:
+    csv: One row per point of interest, with a header.
+    geojson: A FeatureCollection, with each point at `[x, z]` (or `[x, z, y]` if the height is known).
+        These are Minecraft block coordinates, not longitude and latitude.
+    jsonl: One JSON object per line.
+
+Imports also accept a plain JSON list of objects, and files compressed with gzip.
+Rows have `label`, `x`, `z`, and optionally `y` and `dimensions` (which defaults to `overworld`),
+or a `text` field that is read like a chat message, e.g. `village -123 456`.
+"""
+
+import csv
+import gzip
+import io
+import json
+import re
+import tempfile
+from datetime import datetime
+from typing import IO, Any, Iterable, Iterator
+
+from pymongo import DeleteMany, InsertOne, UpdateOne
+from pymongo.collection import Collection
+from pymongo.database import Database
+
+import markers
+
+FORMATS = ('csv', 'geojson', 'jsonl')
+FIELDS = ('label', 'x', 'y', 'z', 'dimensions', 'author', 'created')
+DIMENSIONS = ('overworld', 'nether', 'end')
+
+# Two or more integers in a row, separated by spaces or commas, e.g. `-123 456` or `-12,34,-56`.
+COORDINATES = re.compile(r'(-?\b([0-9]+)([, ]+|$)){2,}')
+
+BATCH_SIZE = 1000
+
+# How far from the centre of a Minecraft world any coordinate can be.
+WORLD_LIMIT = 30_000_000
+
+# The largest file that can be imported, after decompressing it.
+MAX_IMPORT_BYTES = 32 * 1024 ** 2
+
+# Files up to this size stay in memory, and larger ones spill to disk.
+SPOOL_BYTES = 4 * 1024 ** 2
+
+
+def normalize_label(text: str) -> str:
+    """
+    Tidy up the label of a point of interest, so labels can be compared without worrying about case.
+
+    Args:
+        text (str): The label, as written.
+
+    Returns:
+        str: The label in upper case, without commas or colons.
+    """
+    return text.replace(',', '').replace(':', '').strip().upper()
+
+
+def parse(text: str) -> tuple[str, list[int]] | None:
+    """
+    Find the coordinates in a message, and label the point of interest with the rest of it.
+
+    Args:
+        text (str): The message, e.g. `village -123 456`.
+
+    Returns:
+        tuple[str, list[int]] | None: The label and coordinates, or None if there are no coordinates.
+    """
+
+    match = COORDINATES.search(text)
+    if not match:
+        return None
+
+    begin, end = match.span(0)
+    return normalize_label(f'{text[0:begin]} {text[end::]}'), [int(i) for i in match[0].replace(',', ' ').split()]
+
+
+def position(coords: list[int]) -> tuple[int, int | None, int]:
+    """
+    Work out where a point of interest is from the coordinates in its message.
+    Two numbers are `x z`, and three or more are `x y z`.
+
+    Args:
+        coords (list[int]): The coordinates, as written in the message.
+
+    Returns:
+        tuple[int, int | None, int]: The x, y and z coordinates. y is None if it wasn't given.
+    """
+
+    if len(coords) == 2:
+        return coords[0], None, coords[1]
+    return coords[0], coords[1], coords[2]
+
+
+def find(collection: Collection) -> Iterator[dict[str, Any]]:
+    """
+    Read every point of interest, sorted by label, a batch at a time.
+
+    Args:
+        collection (Collection): The `messages` collection.
+
+    Returns:
+        Iterator[dict[str, Any]]: The points of interest, as they are exported.
+    """
+
+    cursor = collection.find(
+        {'emojis.0': {'$exists': True}},
+        {'_id': 0, 'label': 1, 'coords': 1, 'emojis': 1, 'author': 1, 'created': 1},
+    ).sort({'label': 1}).batch_size(BATCH_SIZE)
+
+    for doc in cursor:
+        x, y, z = position(doc['coords'])
+        created = doc.get('created')
+        yield {
+            'label': doc.get('label', ''),
+            'x': x,
+            'y': y,
+            'z': z,
+            'dimensions': doc['emojis'],
+            'author': doc.get('author'),
+            'created': created.isoformat() if isinstance(created, datetime) else created,
+        }
+
+
+def write(pois: Iterable[dict[str, Any]], fp: IO[str], format: str) -> int:
+    """
+    Write points of interest to a text file, one at a time.
+
+    Args:
+        pois (Iterable[dict[str, Any]]): The points of interest, from `find`.
+        fp (IO[str]): The file to write to.
+        format (str): One of `FORMATS`.
+
+    Returns:
+        int: The number of points of interest written.
+    """
+
+    count = 0
+
+    if format == 'csv':
+        writer = csv.writer(fp)
+        writer.writerow(FIELDS)
+        for poi in pois:
+            writer.writerow([*(poi[i] for i in FIELDS[:4]), ';'.join(poi['dimensions']), *(poi[i] for i in FIELDS[5:])])
+            count += 1
+
+    elif format == 'geojson':
+        fp.write('{"type":"FeatureCollection","features":[')
+        for poi in pois:
+            point = [poi['x'], poi['z']] if poi['y'] is None else [poi['x'], poi['z'], poi['y']]
+            properties = {key: val for key, val in poi.items() if key not in ('x', 'y', 'z')}
+            fp.write(',\n' if count else '\n')
+            fp.write(json.dumps({'type': 'Feature', 'geometry': {'type': 'Point', 'coordinates': point}, 'properties': properties}))
+            count += 1
+        fp.write('\n]}\n')
+
+    else:
+        for poi in pois:
+            fp.write(json.dumps(poi) + '\n')
+            count += 1
+
+    return count
+
+
+def export(collection: Collection, format: str) -> tuple[IO[bytes], int]:
+    """
+    Export every point of interest into a gzip-compressed file. This blocks, so run it in a thread.
+
+    Args:
+        collection (Collection): The `messages` collection.
+        format (str): One of `FORMATS`.
+
+    Returns:
+        tuple[IO[bytes], int]: The compressed file, rewound to the start, and the number of points of interest in it.
+    """
+
+    output = tempfile.SpooledTemporaryFile(SPOOL_BYTES)
+    with gzip.GzipFile(fileobj=output, mode='wb', mtime=0) as compressed:
+        fp = io.TextIOWrapper(compressed, encoding='utf8', newline='')
+        count = write(find(collection), fp, format)
+        # Detach (which flushes) rather than close, so the gzip stream is left for `with` to finish.
+        fp.detach()
+
+    output.seek(0)
+    return output, count
+
+
+def read(data: bytes, filename: str) -> list[dict[str, Any]]:
+    """
+    Read the rows of a file to import.
+
+    Args:
+        data (bytes): The contents of the file.
+        filename (str): The name of the file. Files ending in `.gz` are decompressed,
+            and files ending in `.csv` (before any `.gz`) are read as CSV. Anything else is read as JSON.
+
+    Returns:
+        list[dict[str, Any]]: The rows.
+
+    Raises:
+        ValueError: If the file is too large, or is not valid CSV or JSON.
+    """
+
+    filename = filename.lower()
+    if filename.endswith('.gz'):
+        with gzip.GzipFile(fileobj=io.BytesIO(data)) as fp:
+            try:
+                data = fp.read(MAX_IMPORT_BYTES + 1)
+            except (OSError, EOFError) as e:
+                raise ValueError(f'Unable to decompress the file: {e}') from e
+        filename = filename.removesuffix('.gz')
+
+    if len(data) > MAX_IMPORT_BYTES:
+        raise ValueError(f'The file is larger than {MAX_IMPORT_BYTES // 1024 ** 2} MB.')
+
+    try:
+        text = data.decode('utf-8-sig')
+    except UnicodeDecodeError as e:
+        raise ValueError('The file is not UTF-8 text.') from e
+
+    if filename.endswith('.csv'):
+        try:
+            return list(csv.DictReader(io.StringIO(text)))
+        except csv.Error as e:
+            raise ValueError(f'The file is not valid CSV: {e}') from e
+
+    try:
+        rows = json.loads(text)
+    except json.JSONDecodeError:
+        # JSON Lines, as written by `export`.
+        try:
+            rows = [json.loads(i) for i in text.splitlines() if i.strip()]
+        except json.JSONDecodeError as e:
+            raise ValueError(f'The file is not valid JSON: {e}') from e
+
+    if isinstance(rows, dict) and rows.get('type') == 'FeatureCollection':
+        rows = [
+            {**(i.get('properties') or {}), **dict(zip(('x', 'z', 'y'), (i.get('geometry') or {}).get('coordinates', [])))}
+            for i in rows.get('features', [])
+        ]
+
+    if isinstance(rows, dict):
+        # A single point of interest, or JSON Lines with only one line.
+        rows = [rows]
+
+    if not isinstance(rows, list):
+        raise ValueError('The file should contain a list of points of interest.')
+
+    return [i if isinstance(i, dict) else {} for i in rows]
+
+
+def validate(row: dict[str, Any]) -> tuple[str, list[int], list[str]]:
+    """
+    Check a row of an imported file, reading it the same way as points of interest sent in chat.
+
+    Args:
+        row (dict[str, Any]): The row.
+
+    Returns:
+        tuple[str, list[int], list[str]]: The label, coordinates and dimensions.
+
+    Raises:
+        ValueError: If the row is not a valid point of interest.
+    """
+
+    if row.get('text'):
+        if not (parsed := parse(str(row['text']))):
+            raise ValueError('no coordinates found in `text`')
+        label, coords = parsed
+    else:
+        if any(row.get(i) in (None, '') for i in ('x', 'z')):
+            raise ValueError('`x` and `z` are required')
+
+        fields = [row['x'], row['z']] if row.get('y') in (None, '') else [row['x'], row['y'], row['z']]
+        text = ' '.join(str(i).strip() for i in fields)
+        if not (match := COORDINATES.fullmatch(text)) or len(match[0].split()) != len(fields):
+            raise ValueError(f'invalid coordinates `{text}`')
+
+        label = normalize_label(str(row.get('label') or ''))
+        coords = [int(i) for i in text.split()]
+
+    if any(abs(i) > WORLD_LIMIT for i in coords):
+        raise ValueError(f'coordinates `{" ".join(map(str, coords))}` are outside the world')
+
+    dimensions = row.get('dimensions') or ['overworld']
+    if isinstance(dimensions, str):
+        dimensions = re.split(r'[;,\s]+', dimensions.strip())
+    dimensions = list(dict.fromkeys(str(i).strip().lower() for i in dimensions if str(i).strip()))
+    if invalid := [i for i in dimensions if i not in DIMENSIONS]:
+        raise ValueError(f'unknown dimension `{invalid[0]}`')
+
+    return label, coords, dimensions
+
+
+def insert(db: Database, rows: Iterable[dict[str, Any]], author: int) -> tuple[int, int, list[str]]:
+    """
+    Import points of interest, replacing any markers already at the same positions.
+    Messages and markers are written in batches. This blocks, so run it in a thread.
+
+    Imported points of interest have no Discord message, so they have no `message_id`. Instead each
+    gets an `import_key` from its position, so importing the same file again updates them rather than
+    adding copies, and rows at the same position as an earlier row replace it.
+
+    Args:
+        db (Database): The database to import into.
+        rows (Iterable[dict[str, Any]]): The rows, from `read`.
+        author (int): The ID of the user importing them.
+
+    Returns:
+        tuple[int, int, list[str]]: The number of points of interest imported, the number of rows
+            that replaced an earlier row at the same position, and a description of each row that was skipped.
+    """
+
+    rows_imported = 0
+    positions = set()
+    errors = []
+    messages: list[UpdateOne] = []
+    marker_ops: list[DeleteMany | InsertOne] = []
+    now = datetime.utcnow()
+
+    def flush() -> None:
+        if messages:
+            db.messages.bulk_write(messages)
+            db.markers.bulk_write(marker_ops)
+            messages.clear()
+            marker_ops.clear()
+
+    for number, row in enumerate(rows, 1):
+        try:
+            label, coords, dimensions = validate(row)
+        except ValueError as e:
+            errors.append(f'Row {number}: {e}')
+            continue
+
+        x, _, z = position(coords)
+        positions.add((x, z))
+        messages.append(UpdateOne({'import_key': f'{x}:{z}'}, {
+            '$set': {
+                'emojis': dimensions,
+                'text': str(row.get('text') or f'{label} {" ".join(map(str, coords))}'),
+                'label': label,
+                'coords': coords,
+                'author': author,
+                'updated': False,
+                'last_updated': now,
+                'imported': True,
+            },
+            '$setOnInsert': {'created': now},
+        }, upsert=True))
+
+        # The same as `update_markers` does for a message, so later rows win.
+        marker_ops.append(DeleteMany({'x': x, 'z': z}))
+        marker_ops += [
+            InsertOne({'x': x, 'z': z, 'dimension': i, 'text': label, **markers.STYLE})
+            for i in dimensions
+        ]
+
+        rows_imported += 1
+        if len(messages) >= BATCH_SIZE:
+            flush()
+
+    flush()
+    return len(positions), rows_imported - len(positions), errors
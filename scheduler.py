@@ -0,0 +1,167 @@
+"""
+Runs the bot's repeating tasks, such as syncing the status message and checking music queues.
+
+Each task is added once by name and keeps running across gateway reconnects, so `on_ready`
+can safely try to start everything again. A task never overlaps with itself: if a run takes
+longer than its interval, the ticks it overran are skipped and counted as missed, instead of
+piling up. Start times are jittered so tasks with the same interval don't all wake together.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable
+
+import metrics
+import stall_detector
+
+log = logging.getLogger(__name__)
+
+RUN_SECONDS = metrics.Histogram('bot_repeat_task_seconds', 'Time taken by each run of a repeating task.', ('task',))
+MISSED_TICKS = metrics.Counter('bot_repeat_task_missed_ticks_total', 'Ticks skipped because the previous run overran.', ('task',))
+ERRORS = metrics.Counter('bot_repeat_task_errors_total', 'Runs of a repeating task that raised an exception.', ('task',))
+
+
+class Job:
+    """
+    A repeating task.
+    """
+
+    def __init__(self, name: str, fn: Callable[[], Awaitable[Any]], interval: float, jitter: float) -> None:
+        self.name = name
+        self.fn = fn
+        self.interval = interval
+        self.jitter = jitter
+        self.task: asyncio.Task | None = None
+        self.runs = 0
+        self.missed = 0
+        self.errors = 0
+        self.last_duration = 0.0
+
+    def running(self) -> bool:
+        """
+        Check whether the task is currently repeating.
+
+        Returns:
+            bool: Whether the task has been started and not stopped.
+        """
+        return self.task is not None and not self.task.done()
+
+    def start(self) -> None:
+        """
+        Start repeating the task, unless it is already running. This must be called from the event loop.
+        """
+
+        if not self.running():
+            self.task = asyncio.get_running_loop().create_task(self.loop(), name=f'repeat: {self.name}')
+
+    async def loop(self) -> None:
+        """
+        Run the task once per interval, forever.
+        """
+
+        stall_detector.name_task(f'repeat: {self.name}')
+        due = time.monotonic() + random.uniform(0, self.jitter * self.interval)
+
+        while True:
+            await asyncio.sleep(max(0.0, due - time.monotonic()))
+
+            start = time.monotonic()
+            try:
+                await self.fn()
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                self.errors += 1
+                ERRORS.inc(task=self.name)
+                log.exception('Repeating task %s failed: %s', self.name, e, extra={'task': self.name})
+
+            end = time.monotonic()
+            self.runs += 1
+            self.last_duration = end - start
+            RUN_SECONDS.observe(self.last_duration, task=self.name)
+
+            # Skip any ticks that passed while this run was going, rather than running back to back.
+            due += self.interval
+            if end > due:
+                missed = int((end - due) // self.interval) + 1
+                due += missed * self.interval
+                self.missed += missed
+                MISSED_TICKS.inc(missed, task=self.name)
+
+    def stop(self) -> None:
+        """
+        Stop repeating the task.
+        """
+
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+
+class Scheduler:
+    """
+    Owns every repeating task, and makes sure each one only runs once at a time.
+    """
+
+    def __init__(self, jitter: float = 0.1) -> None:
+        self.jitter = jitter
+        self.jobs: dict[str, Job] = {}
+        self.started = False
+
+    def add(self, name: str, fn: Callable[[], Awaitable[Any]], interval: float) -> bool:
+        """
+        Add a repeating task. If the scheduler has been started, the task starts right away.
+
+        Args:
+            name (str): A unique name for the task.
+            fn (Callable[[], Awaitable[Any]]): The coroutine function to call each interval.
+            interval (float): The number of seconds between runs.
+
+        Returns:
+            bool: Whether the task was added, i.e. there was no task with that name already.
+        """
+
+        if name in self.jobs:
+            return False
+
+        job = self.jobs[name] = Job(name, fn, interval, self.jitter)
+        if self.started:
+            job.start()
+        return True
+
+    def start(self) -> None:
+        """
+        Start every task that is not already running. This must be called from the event loop.
+        """
+
+        self.started = True
+        for job in self.jobs.values():
+            job.start()
+
+    def stop(self) -> None:
+        """
+        Stop every task.
+        """
+
+        self.started = False
+        for job in self.jobs.values():
+            job.stop()
+
+    def stats(self) -> dict[str, str]:
+        """
+        Summarize how each task has been running, e.g. for the `!stats` command.
+
+        Returns:
+            dict[str, str]: A description of each task, by name.
+        """
+
+        return {
+            f'Task {job.name}': (
+                f'{job.runs} runs, last {job.last_duration * 1000:.0f} ms, ' +
+                f'{job.missed} missed ticks, {job.errors} errors'
+            )
+            for job in self.jobs.values()
+        }
+
+
+SCHEDULER = Scheduler()
@@ -0,0 +1,162 @@
+"""
+Detects when the event loop stalls, and captures what it was doing at the time.
+
+A heartbeat task on the event loop updates a timestamp, and a watchdog thread checks it.
+If the loop has not ticked for longer than the threshold, the watchdog captures the stack of the
+loop's thread and the name of the task that is running, e.g. `discord.py: on_message` or the name
+of a repeating task, and keeps the incident in a ring buffer so admins can look at it later.
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+
+import metrics
+
+log = logging.getLogger(__name__)
+
+STALLS = metrics.Counter('bot_event_loop_stalls_total', 'Times the event loop stalled for longer than the threshold.', ('handler',))
+
+
+class Incident:
+    """
+    A single stall of the event loop.
+    """
+
+    __slots__ = ('started', 'duration', 'handler', 'stack')
+
+    def __init__(self, duration: float, handler: str, stack: list[str]) -> None:
+        self.started = datetime.now()
+        self.duration = duration
+        self.handler = handler
+        self.stack = stack
+
+
+class StallDetector:
+    """
+    Watches the event loop from a separate thread and records any stalls.
+    """
+
+    def __init__(self, threshold: float, history: int = 20) -> None:
+        self.threshold = threshold
+        self.incidents: deque[Incident] = deque(maxlen=history)
+        self.lock = threading.Lock()
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.loop_thread = 0
+        self.last_tick = time.monotonic()
+        self.current: Incident | None = None
+        self.task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """
+        Start watching the running event loop. This must be called from the event loop's thread,
+        and does nothing if the detector is already running.
+        """
+
+        if self.loop is not None:
+            return
+
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread = threading.get_ident()
+        self.last_tick = time.monotonic()
+        self.task = self.loop.create_task(self.heartbeat(), name='stall detector heartbeat')
+        threading.Thread(target=self.watch, name='stall detector', daemon=True).start()
+
+    async def heartbeat(self) -> None:
+        """
+        Record that the event loop is still responsive, several times per threshold.
+        """
+
+        while True:
+            self.last_tick = time.monotonic()
+            await asyncio.sleep(self.threshold / 4)
+
+    def watch(self) -> None:
+        """
+        Check the heartbeat from the watchdog thread, until the heartbeat task ends.
+        """
+
+        while self.task is not None and not self.task.done():
+            time.sleep(self.threshold / 4)
+            behind = time.monotonic() - self.last_tick
+
+            if behind <= self.threshold:
+                self.current = None
+            elif self.current is None:
+                self.current = self.capture(behind)
+            else:
+                # Still stuck on the same stall, so just keep its duration up to date.
+                self.current.duration = behind
+
+    def capture(self, behind: float) -> Incident:
+        """
+        Record a new stall, along with the event loop's current stack and task.
+
+        Args:
+            behind (float): How long the event loop has been stalled so far.
+
+        Returns:
+            Incident: The new incident.
+        """
+
+        frame = sys._current_frames().get(self.loop_thread)  # pylint: disable=protected-access
+        stack = traceback.format_stack(frame) if frame is not None else []
+
+        task = asyncio.current_task(self.loop) if self.loop is not None else None
+        handler = task.get_name() if task is not None else 'event loop callback'
+
+        incident = Incident(behind, handler, stack)
+        with self.lock:
+            self.incidents.append(incident)
+
+        STALLS.inc(handler=handler)
+        log.warning('Event loop stalled for %.0f ms in %s', behind * 1000, handler, extra={'handler': handler})
+        return incident
+
+    def recent(self) -> list[Incident]:
+        """
+        Get the recorded incidents.
+
+        Returns:
+            list[Incident]: The incidents, newest first.
+        """
+        with self.lock:
+            return list(reversed(self.incidents))
+
+
+def name_task(name: str) -> None:
+    """
+    Rename the running task, so that stalls inside it are attributed to something meaningful.
+
+    Args:
+        name (str): The new name of the task.
+    """
+
+    if task := asyncio.current_task():
+        task.set_name(name)
+
+
+DETECTOR: StallDetector | None = None
+
+
+def start(threshold: float) -> StallDetector:
+    """
+    Start the stall detector on the running event loop, if it isn't running already.
+
+    Args:
+        threshold (float): How long, in seconds, the loop may go without ticking before it counts as stalled.
+
+    Returns:
+        StallDetector: The running detector.
+    """
+
+    global DETECTOR
+    if DETECTOR is None:
+        DETECTOR = StallDetector(threshold)
+    DETECTOR.start()
+    return DETECTOR
@@ -0,0 +1,125 @@
+"""
+The Minecraft worlds that the bot looks after.
+
+Each world has its own server address, console (a screen session), log directory and allowlist.
+They are configured under `worlds` in secrets.json, e.g.
+
+    "worlds": [
+        {"name": "flatearth"},
+        {"name": "creative", "address": "127.0.0.1:19134", "screen": "creative"}
+    ]
+
+Any field that is left out defaults to the layout of the original single world,
+e.g. `../minecraftbe/{name}/logs/`. Without a `worlds` section, there is just `flatearth`.
+"""
+
+import asyncio
+import logging
+import subprocess
+from pathlib import Path
+from typing import Any
+
+from mcstatus import BedrockServer
+
+import metrics
+
+log = logging.getLogger(__name__)
+
+PLAYERS = metrics.Gauge('bot_world_players', 'Players online in each world, as of the last successful poll.', ('world',))
+POLLS = metrics.Counter('bot_world_polls_total', 'Status polls of each world.', ('world', 'outcome'))
+POLL_SECONDS = metrics.Histogram('bot_world_poll_seconds', 'Time taken to poll the status of each world.', ('world',))
+
+DEFAULT_CONFIG = [{'name': 'flatearth'}]
+
+
+class World:
+    """
+    A Minecraft world, and how to reach its server.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        address: str = '127.0.0.1',
+        screen: str | None = None,
+        logs: str | None = None,
+        allowlist: str | None = None,
+        timeout: float = 2.0,
+    ) -> None:
+        self.name = name
+        self.address = address
+        self.screen = screen or name
+        self.logs = Path(logs or f'../minecraftbe/{name}/logs/')
+        self.allowlist = Path(allowlist or f'../minecraftbe/{name}/allowlist.json')
+        self.timeout = timeout
+        self.server: BedrockServer | None = None
+
+    def __str__(self) -> str:
+        return self.name
+
+    def command(self, text: str) -> None:
+        """
+        Send a command to the server's console, running in a screen session.
+
+        Args:
+            text (str): The command to send to the Minecraft server.
+        """
+
+        subprocess.run(
+            [
+                'screen', '-r', self.screen, '-p', '0', '-X', 'stuff',
+                text.replace('\\', '\\\\').replace('$', '\\$') + '\\n'
+            ],
+            check=False
+        )
+
+    async def players_online(self) -> int | None:
+        """
+        Ask the server how many players are online, giving up after the world's timeout.
+
+        Returns:
+            int | None: The number of players online, or None if the server could not be reached.
+        """
+
+        if self.server is None:
+            self.server = BedrockServer.lookup(self.address, timeout=self.timeout)
+
+        try:
+            with POLL_SECONDS.time(world=self.name):
+                status = await asyncio.wait_for(self.server.async_status(), self.timeout)
+        except (OSError, asyncio.TimeoutError, ValueError) as e:
+            POLLS.inc(world=self.name, outcome='failure')
+            log.debug('Failed to poll %s: %s', self.name, e, extra={'world': self.name})
+            return None
+
+        POLLS.inc(world=self.name, outcome='success')
+        PLAYERS.set(status.players.online, world=self.name)
+        return status.players.online
+
+
+def load(config: list[dict[str, Any]] | None) -> dict[str, World]:
+    """
+    Build the worlds from their configuration.
+
+    Args:
+        config (list[dict[str, Any]] | None): The `worlds` section of secrets.json, if there is one.
+
+    Returns:
+        dict[str, World]: The worlds by name, with the default world first.
+    """
+    return {i['name']: World(**i) for i in config or DEFAULT_CONFIG}
+
+
+async def players_online(worlds: list[World]) -> dict[str, int | None]:
+    """
+    Poll every world at once, so one slow server doesn't hold up the rest.
+
+    Args:
+        worlds (list[World]): The worlds to poll.
+
+    Returns:
+        dict[str, int | None]: The number of players online in each world, or None if it could not be reached.
+    """
+
+    counts = await asyncio.gather(*[i.players_online() for i in worlds])
+    return {world.name: count for world, count in zip(worlds, counts)}